@@ -0,0 +1,261 @@
+"""Speculative execution of the post-router node while the router is still deciding.
+
+Opt-in via ``ROUTER_SPECULATIVE=1``. When ``classify_node`` has to pay for a
+router LLM call, it first starts the stream of the node it expects to win
+(``execute`` or ``conversational``, guessed by the local pre-classifier) on a
+background thread. Chunks are buffered, never printed. Once the router has
+decided:
+
+* same node  → the node claims the speculation, replays the buffered chunks
+  through ``stream_to_stdout`` and keeps consuming the live stream;
+* other node → the speculation is cancelled and its output discarded.
+
+The stream runs as an asyncio task: on the caller's event loop under
+``ainvoke``, on a shared background loop under ``invoke``. Cancelling the task
+aborts a pending HTTP read at once, so Ollama stops even during prefill,
+before the first token. A speculation is also cancelled with its turn's
+:class:`~core.cancellation.CancelToken`.
+
+Ollama must be allowed to serve two requests at once (``OLLAMA_NUM_PARALLEL``
+≥ 2), otherwise the speculative request just queues in front of the router.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+
+from core.cancellation import current_token
+from core.tracing import DeferredSpan, tracer
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_ENABLED = os.getenv("ROUTER_SPECULATIVE", "0").strip() in ("1", "true", "yes")
+# Turns (across sessions / batch workers) that may have a speculation in flight.
+MAX_ACTIVE = int(os.getenv("ROUTER_SPECULATIVE_MAX", "4"))
+
+ROUTE_TO_NODE = {
+    "DIRECT_EXECUTION": "execute",
+    "NEEDS_PLANNING": "plan",
+    "CONVERSATIONAL": "conversational",
+}
+
+# node name → (build_messages(state), get_chain(state)) registered by the node modules.
+_targets: Dict[str, tuple] = {}
+
+
+def register_target(node: str, build_messages: Callable, get_chain: Callable) -> None:
+    _targets[node] = (build_messages, get_chain)
+
+
+def _fingerprint(messages) -> str:
+    digest = hashlib.sha256()
+    for m in messages:
+        digest.update(type(m).__name__.encode())
+        digest.update(repr(getattr(m, "content", m)).encode())
+        digest.update(repr(getattr(m, "tool_calls", None)).encode())
+    return digest.hexdigest()
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """The caller's running loop, else one background loop shared by all speculations.
+
+    The async Ollama client keeps its connections per loop, so sync turns
+    always use the same one.
+    """
+    global _loop
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="speculate", daemon=True).start()
+    return _loop
+
+
+def _turn_key(state) -> Optional[str]:
+    messages = state.get("messages", [])
+    if not messages:
+        return None
+    # Message ids are unique per turn; without one, the whole history tells
+    # two sessions' identical "hi" apart.
+    return getattr(messages[-1], "id", None) or _fingerprint(messages)
+
+
+class Speculation:
+    """One speculative LLM stream, consumed by an asyncio task into a buffer."""
+
+    def __init__(self, node: str, fingerprint: str, chain, stream_factory: Callable[[], AsyncIterator]):
+        self.node = node
+        self.fingerprint = fingerprint
+        self.chain = chain
+        self._stream_factory = stream_factory
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._cond = threading.Condition()
+        # The LLM call is traced to the node that claims the stream, not classify.
+        self.trace = DeferredSpan()
+        # Scheduled from this context, so the task sees the turn's contextvars.
+        self._future = asyncio.run_coroutine_threadsafe(self._run(), _event_loop())
+
+    async def _run(self) -> None:
+        try:
+            with tracer.attach(self.trace):
+                async for chunk in self._stream_factory():
+                    with self._cond:
+                        self._chunks.append(chunk)
+                        self._cond.notify_all()
+        except asyncio.CancelledError:
+            pass  # cancel(): the HTTP request was aborted with the task
+        except Exception as e:  # noqa: BLE001 — re-raised in the consumer
+            self._error = e
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def cancel(self) -> None:
+        """Abort the request now, even while Ollama is still evaluating the prompt."""
+        self._future.cancel()
+
+    def replay(self) -> Iterator:
+        """Yield buffered chunks, then follow the live stream until it ends."""
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self._chunks) and not self._done:
+                    self._cond.wait()
+                pending = self._chunks[i:]
+                done = self._done
+            for chunk in pending:
+                yield chunk
+            i += len(pending)
+            if done and i >= len(self._chunks):
+                break
+        if self._error is not None:
+            raise self._error
+
+
+class SpeculationManager:
+    """Speculations by turn key, so concurrent sessions each keep their own.
+
+    Each entry is removed when its turn claims, resolves or drops it; past
+    ``MAX_ACTIVE`` (turns that ended without doing so) the oldest is cancelled.
+    """
+
+    def __init__(self, max_active: int = MAX_ACTIVE):
+        self.max_active = max(1, max_active)
+        self._active: "OrderedDict[str, Speculation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+        self.mismatched = 0
+
+    def start(self, state, node: str) -> bool:
+        """Begin streaming ``node``'s reply for this turn. Returns True if started."""
+        if not SPECULATIVE_ENABLED or node not in _targets:
+            return False
+        key = _turn_key(state)
+        if key is None:
+            return False
+        build_messages, get_chain = _targets[node]
+        # classify_node always clears a pending plan, so speculate on that state.
+        spec_state = {**state, "pending_plan": None}
+        messages = build_messages(spec_state)
+        chain = get_chain(spec_state)
+        speculation = Speculation(
+            node, _fingerprint(messages), chain, lambda: chain.astream(messages)
+        )
+        token = current_token()
+        if token is not None:
+            token.on_cancel(speculation.cancel)
+        stale = []
+        with self._lock:
+            previous = self._active.pop(key, None)
+            if previous is not None:
+                stale.append(previous)
+            self._active[key] = speculation
+            while len(self._active) > self.max_active:
+                stale.append(self._active.popitem(last=False)[1])
+                self.discarded += 1
+            self.started += 1
+        for old in stale:
+            old.cancel()
+        logger.info(f"[SPECULATION] Started speculative '{node}' stream")
+        return True
+
+    def resolve(self, state, route: str) -> None:
+        """Called with the router's decision; cancels a speculation it disagrees with."""
+        key = _turn_key(state)
+        node = ROUTE_TO_NODE.get(route)
+        with self._lock:
+            speculation = self._active.get(key)
+            if speculation is None or speculation.node == node:
+                return
+            del self._active[key]
+            self.discarded += 1
+        speculation.cancel()
+        logger.info(
+            f"[SPECULATION] Router chose '{node}', discarding speculative '{speculation.node}'"
+        )
+
+    def drop(self, state) -> None:
+        """Cancel this turn's speculation because the node will not need it."""
+        key = _turn_key(state)
+        with self._lock:
+            speculation = self._active.pop(key, None)
+            if speculation is None:
+                return
+            self.discarded += 1
+        speculation.cancel()
+
+    def claim(self, state, node: str, messages, chain) -> Optional[Iterator]:
+        """Hand the node its speculative stream if it was built from the same input."""
+        key = _turn_key(state)
+        with self._lock:
+            speculation = self._active.pop(key, None)
+        if speculation is None:
+            return None
+        if (
+            speculation.node != node
+            or speculation.chain is not chain
+            or speculation.fingerprint != _fingerprint(messages)
+        ):
+            speculation.cancel()
+            with self._lock:
+                self.mismatched += 1
+            logger.info(f"[SPECULATION] Input changed before '{node}' ran — discarded")
+            return None
+        with self._lock:
+            self.used += 1
+        span = tracer.current()
+        if span is not None:
+            speculation.trace.hand_to(span)
+        logger.info(f"[SPECULATION] '{node}' reusing speculative stream")
+        return speculation.replay()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": SPECULATIVE_ENABLED,
+                "active": len(self._active),
+                "started": self.started,
+                "used": self.used,
+                "discarded": self.discarded,
+                "mismatched": self.mismatched,
+                "hit_rate": self.used / self.started if self.started else 0.0,
+            }
+
+
+speculation = SpeculationManager()
@@ -1,4 +1,43 @@
-"""Shared helper for streaming an LLM reply to stdout, live, for the CLI."""
+"""Shared helper for streaming an LLM reply to stdout, live, for the CLI.
+
+Everything the nodes print goes through :func:`emit`, which writes to the
+sink set by :func:`output_to` for the current context (thread or asyncio
+task) and to ``sys.stdout`` otherwise. Batch mode gives every concurrent
+task its own sink, so their streamed replies don't interleave.
+
+Both stream helpers stop early when the turn is cancelled
+(:mod:`core.cancellation`). They close the stream, which drops the HTTP
+request to Ollama, and return the part of the reply received so far.
+"""
+
+import asyncio
+import re
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, TextIO
+
+from langchain_core.messages import AIMessageChunk
+
+from core.cancellation import current_token
+
+
+_sink: ContextVar[Optional[TextIO]] = ContextVar("zkzk_output", default=None)
+
+
+def emit(*parts, end: str = "\n", flush: bool = False) -> None:
+    """``print`` to the current context's output sink."""
+    print(*parts, end=end, flush=flush, file=_sink.get() or sys.stdout)
+
+
+@contextmanager
+def output_to(sink: TextIO):
+    """Send everything :func:`emit` writes in this context to ``sink``."""
+    token = _sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _sink.reset(token)
 
 
 def stream_to_stdout(stream):
@@ -13,13 +52,99 @@ def stream_to_stdout(stream):
     """
     response = None
     started = False
-    for chunk in stream:
-        response = chunk if response is None else response + chunk
-        if chunk.content:
-            if not started:
-                print("\n[AI]: ", end="", flush=True)
-                started = True
-            print(chunk.content, end="", flush=True)
+    token = current_token()
+    try:
+        for chunk in stream:
+            response = chunk if response is None else response + chunk
+            if chunk.content:
+                if not started:
+                    emit("\n[AI]: ", end="", flush=True)
+                    started = True
+                emit(chunk.content, end="", flush=True)
+            if token is not None and token.cancelled:
+                break
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()  # a generator: closes the HTTP response too
     if started:
-        print("\n")
+        emit("\n")
+    return _mark_cancelled(response, token)
+
+
+def _mark_cancelled(response, token):
+    if token is None or not token.cancelled:
+        return response
+    emit(f"  ⏹ stopped ({token.reason})")
+    if response is not None:
+        response.response_metadata["cancelled"] = token.reason
+        # A half-streamed tool call is never run.
+        response.tool_calls = []
+        response.tool_call_chunks = []
     return response
+
+
+def replay_chunks(text: str) -> list:
+    """Split a stored reply into word-sized chunks so it streams like a live one."""
+    return [AIMessageChunk(content=piece) for piece in re.findall(r"\s*\S+\s*", text)]
+
+
+async def _aiter_chunks(stream):
+    """Async-iterate ``stream`` — a native async stream, or a sync iterator
+    (e.g. a replayed speculative stream) pulled in a worker thread so the event
+    loop never blocks on it."""
+    if hasattr(stream, "__aiter__"):
+        async for chunk in stream:
+            yield chunk
+        return
+    if isinstance(stream, list):  # already in memory — no thread hop needed
+        for chunk in stream:
+            yield chunk
+        return
+    iterator = iter(stream)
+    done = object()
+    while True:
+        chunk = await asyncio.to_thread(next, iterator, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+async def astream_to_stdout(stream):
+    """Async counterpart of :func:`stream_to_stdout` (same output, same return).
+
+    The stream is read in a child task. On cancellation the token's callback
+    cancels that task, which aborts a pending read at once instead of at the
+    next chunk, and the node carries on with the partial reply.
+    """
+    response = None
+    started = False
+
+    async def read() -> None:
+        nonlocal response, started
+        async for chunk in _aiter_chunks(stream):
+            response = chunk if response is None else response + chunk
+            if chunk.content:
+                if not started:
+                    emit("\n[AI]: ", end="", flush=True)
+                    started = True
+                emit(chunk.content, end="", flush=True)
+
+    token = current_token()
+    if token is None:
+        await read()
+    else:
+        loop = asyncio.get_running_loop()
+        reader = asyncio.ensure_future(read())
+        unregister = token.on_cancel(lambda: loop.call_soon_threadsafe(reader.cancel))
+        try:
+            await reader
+        except asyncio.CancelledError:
+            # Swallowed only when the token stopped the reader, not when this task is cancelled.
+            if asyncio.current_task().cancelling() or not token.cancelled:
+                raise
+        finally:
+            unregister()
+    if started:
+        emit("\n")
+    return _mark_cancelled(response, token)
@@ -1,8 +1,13 @@
 from core.state import AgentState
 import re
-import json, logging
-from models.LLM import llm
+import json, logging, os, threading, time
+from models.registry import model_registry
 from core.loadPrompts import LoadPrompts
+from routing.pre_classifier import pre_classifier, FAST_PATH_ENABLED, FAST_CONFIDENCE
+from routing.decision_cache import RouterDecisionCache, CACHE_ENABLED
+from routing.decision_log import log_decision
+from routing.intent_model import intent_model, INTENT_CONFIDENCE
+from agent_nodes._speculation import speculation, SPECULATIVE_ENABLED, ROUTE_TO_NODE
 from langchain_core.messages import SystemMessage, HumanMessage
 from typing import Dict, Any
 from json import JSONDecodeError
@@ -13,7 +18,17 @@ load_prompts = LoadPrompts()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+INTENT_MODEL_ENABLED = os.getenv("ROUTER_INTENT_MODEL_ENABLED", "1").strip() not in ("0", "false", "no")
+
+# Route to speculate on when no local signal has a guess ("when unsure, prefer
+# DIRECT_EXECUTION" — router.yaml).
+SPECULATE_DEFAULT = os.getenv("ROUTER_SPECULATE_DEFAULT", "DIRECT_EXECUTION").strip()
+
+llm = model_registry.get("router")
+
 _router_chain = None
+_decision_cache = None
+_decision_cache_lock = threading.Lock()
 
 def safe_json_parse(raw: str) -> Dict[str, Any]:
     cleaned = re.sub(r'^.*?(?=\{)', '', raw, flags=re.DOTALL)
@@ -43,29 +58,105 @@ def get_router_chain():
     return _router_chain
 
 
-def classify_node(state: AgentState) -> AgentState:
-    query = state["messages"][-1].content
-    logger.info(f"[ROUTER] Query: {query}")
+def get_decision_cache():
+    global _decision_cache
+    if _decision_cache is None and CACHE_ENABLED:
+        with _decision_cache_lock:
+            if _decision_cache is None:
+                try:
+                    _decision_cache = RouterDecisionCache(model_name=model_registry.model_name("router"))
+                except Exception as e:  # noqa: BLE001 — a broken cache must not break routing
+                    logger.warning(f"[ROUTER CACHE] Disabled: {e}")
+                    return None
+    return _decision_cache
+
+
+def get_intent_model():
+    if not INTENT_MODEL_ENABLED:
+        return None
+    return intent_model.get()
+
+
+def _route_locally(state: AgentState, query: str, cache):
+    """Cache → fast path → intent model.
+
+    Returns ``(decision, guess)``: a finished state update when one of them
+    settles the route, else None plus the best local guess for speculation.
+    """
+    if cache is not None:
+        cached = cache.get(query)
+        if cached is not None:
+            category, rationale = cached
+            logger.info(f"[ROUTER] → {category} | [cache] {rationale[:80]}")
+            log_decision(query, category, rationale, source="cache")
+            return {
+                "category": category,
+                "router_rationale": f"[cache] {rationale}",
+                "pending_plan": None,
+            }, None
+
+    # Local fast path — settle obvious routes without an Ollama round trip.
+    fast = pre_classifier.classify(query) if FAST_PATH_ENABLED else None
+    guess = fast.route if fast is not None else SPECULATE_DEFAULT
+    if fast is not None:
+        if fast.confidence >= FAST_CONFIDENCE:
+            rationale = f"[fast-path {fast.source} {fast.confidence:.2f}] {fast.rationale}"
+            logger.info(f"[ROUTER] → {fast.route} | {rationale}")
+            log_decision(query, fast.route, rationale, source="fast-path")
+            return {"category": fast.route, "router_rationale": rationale, "pending_plan": None}, None
+        logger.info(
+            f"[ROUTER] Fast path unsure ({fast.source} → {fast.route} @ {fast.confidence:.2f}) → asking LLM"
+        )
+
+    # Trained intent model — only used once `python -m routing.train_intent` exported one.
+    model = get_intent_model()
+    if model is not None:
+        route, confidence = model.predict(query)
+        if confidence >= INTENT_CONFIDENCE:
+            rationale = f"[intent-model {confidence:.2f}] learned from past router decisions"
+            logger.info(f"[ROUTER] → {route} | {rationale}")
+            log_decision(query, route, rationale, source="intent-model")
+            return {"category": route, "router_rationale": rationale, "pending_plan": None}, None
+        logger.info(f"[ROUTER] Intent model unsure ({route} @ {confidence:.2f}) → asking LLM")
+        if confidence > 0:
+            guess = route
+
+    return None, guess
+
+
+def _prepare_llm_call(state: AgentState, query: str, guess: str):
+    """Start speculation if enabled and build the router LLM input."""
+    # We are about to pay for a router call — optionally start the likely
+    # node's stream now so its time-to-first-token overlaps the router's.
+    if SPECULATIVE_ENABLED and ROUTE_TO_NODE.get(guess) in ("execute", "conversational"):
+        try:
+            speculation.start(state, ROUTE_TO_NODE[guess])
+        except Exception as e:  # noqa: BLE001 — speculation is best-effort
+            logger.warning(f"[SPECULATION] Could not start: {e}")
 
     router_prompt_messages = load_prompts.load_prompt("router.yaml")
     system_content = router_prompt_messages[0].content
 
-    if len(query) > 4000:
-        query = query[:3800] + "\n… [truncated]"
+    # Only the router prompt is truncated; caches and the log key on the full query.
+    prompt_query = query if len(query) <= 4000 else query[:3800] + "\n… [truncated]"
 
-    try:
-        response = get_router_chain().invoke([
-            SystemMessage(content=system_content),
-            HumanMessage(content=query),
-        ]).content
-    except Exception as e:
-        logger.exception("[ROUTER] LLM call failed")
-        return {
-            "category": "CONVERSATIONAL",
-            "router_rationale": f"LLM error: {str(e)}",
-            "pending_plan": None,
-        }
+    return [
+        SystemMessage(content=system_content),
+        HumanMessage(content=prompt_query),
+    ]
 
+
+def _router_failed(state: AgentState, e: Exception) -> dict:
+    logger.exception("[ROUTER] LLM call failed")
+    speculation.resolve(state, "CONVERSATIONAL")
+    return {
+        "category": "CONVERSATIONAL",
+        "router_rationale": f"LLM error: {str(e)}",
+        "pending_plan": None,
+    }
+
+
+def _apply_router_response(state: AgentState, query: str, response: str, cache) -> dict:
     logger.debug(f"[ROUTER] Raw:\n{response}")
 
     parsed = safe_json_parse(response)
@@ -77,8 +168,56 @@ def classify_node(state: AgentState) -> AgentState:
         category = "CONVERSATIONAL"
 
     rationale = parsed.get("rationale", "").strip()[:300]
+    speculation.resolve(state, category)
+    if parsed.get("route") in valid_categories:
+        pre_classifier.remember(query, category)
+        if cache is not None:
+            cache.put(query, category, rationale)
+        log_decision(query, category, rationale, source="llm")
 
     logger.info(f"[ROUTER] → {category} | {rationale[:80]}{'…' if len(rationale) > 80 else ''}")
     # Reaching the classifier means this message wasn't a plan approval (those
     # bypass classify via route_entry), so drop any stale pending plan.
-    return {"category": category, "router_rationale": rationale, "pending_plan": None}
\ No newline at end of file
+    return {"category": category, "router_rationale": rationale, "pending_plan": None}
+
+
+def classify_node(state: AgentState) -> AgentState:
+    query = state["messages"][-1].content
+    logger.info(f"[ROUTER] Query: {query}")
+
+    cache = get_decision_cache()
+    decision, guess = _route_locally(state, query, cache)
+    if decision is not None:
+        return decision
+
+    router_messages = _prepare_llm_call(state, query, guess)
+    try:
+        started = time.perf_counter()
+        response = get_router_chain().invoke(router_messages).content
+        if cache is not None:
+            cache.record_llm_latency(time.perf_counter() - started)
+    except Exception as e:
+        return _router_failed(state, e)
+
+    return _apply_router_response(state, query, response, cache)
+
+
+async def aclassify_node(state: AgentState) -> AgentState:
+    query = state["messages"][-1].content
+    logger.info(f"[ROUTER] Query: {query}")
+
+    cache = get_decision_cache()
+    decision, guess = _route_locally(state, query, cache)
+    if decision is not None:
+        return decision
+
+    router_messages = _prepare_llm_call(state, query, guess)
+    try:
+        started = time.perf_counter()
+        response = (await get_router_chain().ainvoke(router_messages)).content
+        if cache is not None:
+            cache.record_llm_latency(time.perf_counter() - started)
+    except Exception as e:
+        return _router_failed(state, e)
+
+    return _apply_router_response(state, query, response, cache)
@@ -1,30 +1,69 @@
-from preprocessing.get_clean_history import get_clean_history
-from langchain_core.messages import SystemMessage, AIMessage
+from preprocessing.get_clean_history import get_clean_history, HISTORY_BUDGETS
+from langchain_core.messages import AIMessage
 from core.state import AgentState
-import logging
-from models.LLM import llm
+import asyncio, logging, threading
+from models.registry import model_registry
 from core.loadPrompts import LoadPrompts
-from core.tools import __all__ as tool_functions
-from agent_nodes._stream import stream_to_stdout
+from core.tool_selection import resolve_tool_scope, tools_for
+from agent_nodes._stream import emit, stream_to_stdout, astream_to_stdout, replay_chunks
+from agent_nodes._speculation import speculation, register_target
+from core.context import ContextAssembler
+from core.cancellation import cancelled_note, is_cancelled
+from core.response_cache import ResponseCache, CACHE_ENABLED, SEMANTIC_ENABLED, EMBED_MODEL
 
 
 load_prompts = LoadPrompts()
-conversational_prompt = load_prompts.load_prompt("conversational.yaml")
+context = ContextAssembler("conversational")
+llm = model_registry.get("conversational")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-_model_chain = None
+# Bound chains, one per tool subset (None = every tool).
+_model_chains = {}
+_model_chains_lock = threading.Lock()
 
+_response_cache = None
+_response_cache_lock = threading.Lock()
 
-def get_model_chain():
-    global _model_chain
-    if _model_chain is None:
-        logger.info("[MODEL INIT] Lazily binding tools to ChatOllama")
-        _model_chain = llm.bind_tools(tool_functions)
-        logger.info("[MODEL INIT] Model initialized and tools bound")
-    logger.info("[MODEL INIT] Model already initialized")
-    return _model_chain
+
+def get_model_chain(tool_names=None):
+    key = frozenset(tool_names) if tool_names is not None else None
+    chain = _model_chains.get(key)
+    if chain is None:
+        with _model_chains_lock:
+            chain = _model_chains.get(key)
+            if chain is None:
+                tools = tools_for(tool_names)
+                logger.info(f"[MODEL INIT] Binding {len(tools)} tools to ChatOllama")
+                chain = llm.bind_tools(tools)
+                _model_chains[key] = chain
+    return chain
+
+
+def get_chain_for_state(state: AgentState):
+    scope = resolve_tool_scope(state)
+    return get_model_chain(scope["tools"] if scope else None)
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None and CACHE_ENABLED:
+        with _response_cache_lock:
+            if _response_cache is None:
+                try:
+                    embeddings = None
+                    if SEMANTIC_ENABLED:
+                        from langchain_ollama import OllamaEmbeddings
+
+                        embeddings = OllamaEmbeddings(model=EMBED_MODEL, base_url=model_registry.base_url)
+                    _response_cache = ResponseCache(
+                        model_name=model_registry.model_name("conversational"), embeddings=embeddings
+                    )
+                except Exception as e:  # noqa: BLE001 — a broken cache must not break replies
+                    logger.warning(f"[RESPONSE CACHE] Disabled: {e}")
+                    return None
+    return _response_cache
 
 
 DANGEROUS_TOOLS = [
@@ -36,21 +75,78 @@ DANGEROUS_TOOLS = [
 ]
 
 
-def conversation_node(state: AgentState) -> AgentState:
-    messages = get_clean_history(state, include_tool_messages=False)
-    messages = [SystemMessage(conversational_prompt[0].content), *messages]
-    model_chain = get_model_chain()
+def build_messages(state: AgentState) -> list:
+    messages = get_clean_history(
+        state,
+        include_tool_messages=False,
+        token_budget=HISTORY_BUDGETS["conversational"],
+        node="conversational",
+    )
+    return context.assemble(load_prompts.load_prompt("conversational.yaml")[0], messages)
 
-    # Stream tokens to stdout live (same pattern as execute_node) so the CLI
-    # shows the reply as it is generated instead of in one block.
-    response = stream_to_stdout(model_chain.stream(messages))
 
+def _cached_reply(state: AgentState):
+    """Chunks replaying a cached answer to this question, or None."""
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    answer = cache.get(state.get("messages", []))
+    if answer is None:
+        return None
+    speculation.drop(state)
+    return replay_chunks(answer)
+
+
+def _finish(state: AgentState, messages: list, response, cached: bool = False, chain=None) -> dict:
     content = (response.content if response is not None else "").strip()
-    if not content:
+    if not cached:
+        context.record(messages, response, chain)
+        cache = get_response_cache()
+        # Replies that tried to call tools depended on what the tools would do;
+        # a cancelled reply is only the start of one.
+        if cache is not None and content and not getattr(response, "tool_calls", None) and not is_cancelled():
+            cache.put(state.get("messages", []), content)
+
+    if not content and is_cancelled():
+        content = cancelled_note()
+    elif not content:
         content = "Got it — what would you like to do next?"
-        print(f"\n[AI]: {content}\n")
+        emit(f"\n[AI]: {content}\n")
         logger.warning("[CONVERSATIONAL] Empty reply — emitted fallback message")
     else:
         logger.info(f"[CONVERSATIONAL] Cleaned text: {content}")
 
     return {"messages": [AIMessage(content=content)], "pending_plan": None}
+
+
+def conversation_node(state: AgentState) -> AgentState:
+    cached = _cached_reply(state)
+    if cached is not None:
+        return _finish(state, [], stream_to_stdout(cached), cached=True)
+
+    messages = build_messages(state)
+    model_chain = get_chain_for_state(state)
+
+    # Stream tokens to stdout live (same pattern as execute_node) so the CLI
+    # shows the reply as it is generated instead of in one block. A matching
+    # speculative stream started by classify_node is replayed instead.
+    stream = speculation.claim(state, "conversational", messages, model_chain) or model_chain.stream(
+        messages
+    )
+    return _finish(state, messages, stream_to_stdout(stream), chain=model_chain)
+
+
+async def aconversation_node(state: AgentState) -> AgentState:
+    cached = await asyncio.to_thread(_cached_reply, state)
+    if cached is not None:
+        return _finish(state, [], await astream_to_stdout(cached), cached=True)
+
+    messages = build_messages(state)
+    model_chain = get_chain_for_state(state)
+    stream = speculation.claim(state, "conversational", messages, model_chain) or model_chain.astream(
+        messages
+    )
+    return _finish(state, messages, await astream_to_stdout(stream), chain=model_chain)
+
+
+register_target("conversational", build_messages, get_chain_for_state)
@@ -1,30 +1,47 @@
-from preprocessing.get_clean_history import get_clean_history
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from preprocessing.get_clean_history import get_clean_history, HISTORY_BUDGETS
+from langchain_core.messages import HumanMessage, AIMessage
 from core.state import AgentState
 from core.loadPrompts import LoadPrompts
-import logging
-from models.LLM import llm
+import logging, threading
+from models.registry import model_registry
 from core.tools import __all__ as tool_functions
-from agent_nodes._stream import stream_to_stdout
+from core.tool_selection import resolve_tool_scope, widen_tool_scope, tools_for
+from core.tool_output_store import tool_output_store
+from agent_nodes._stream import emit, stream_to_stdout, astream_to_stdout
+from agent_nodes._speculation import speculation, register_target
+from core.context import ContextAssembler
+from core.cancellation import cancelled_note, is_cancelled
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_prompts = LoadPrompts()
-execution_prompt = load_prompts.load_prompt("executor.yaml")
+context = ContextAssembler("execute")
+llm = model_registry.get("executor")
 
-_model_chain = None
+# Bound chains, one per tool subset (None = every tool).
+_model_chains = {}
+_model_chains_lock = threading.Lock()
 
 
-def get_model_chain():
-    global _model_chain
-    if _model_chain is None:
-        logger.info("[MODEL INIT] Lazily binding tools to ChatOllama")
-        _model_chain = llm.bind_tools(tool_functions)
-        logger.info("[MODEL INIT] Model initialized and tools bound")
-    logger.info("[MODEL INIT] Model already initialized")
-    return _model_chain
+def get_model_chain(tool_names=None):
+    key = frozenset(tool_names) if tool_names is not None else None
+    chain = _model_chains.get(key)
+    if chain is None:
+        with _model_chains_lock:
+            chain = _model_chains.get(key)
+            if chain is None:
+                tools = tools_for(tool_names)
+                logger.info(f"[MODEL INIT] Binding {len(tools)} tools to ChatOllama")
+                chain = llm.bind_tools(tools)
+                _model_chains[key] = chain
+    return chain
+
+
+def get_chain_for_state(state: AgentState):
+    scope = resolve_tool_scope(state)
+    return get_model_chain(scope["tools"] if scope else None)
 
 
 DANGEROUS_TOOLS = [
@@ -36,19 +53,13 @@ DANGEROUS_TOOLS = [
 ]
 
 
-def execute_node(state: AgentState):
-    """
-    The main agent node.
-    It handles:
-    1. Checking for pending confirmations.
-    2. Invoking the LLM.
-    """
-    messages = get_clean_history(state)
-    messages = [SystemMessage(execution_prompt[0].content), *messages]
-    pending_confirmation = state.get(
-        "pending_confirmation", {"tool_name": None, "user_message": None}
-    )
+def build_messages(state: AgentState) -> list:
+    """System prompt + cleaned history — the executor's LLM input for this state."""
+    messages = get_clean_history(state, token_budget=HISTORY_BUDGETS["execute"], node="execute")
+    return context.assemble(load_prompts.load_prompt("executor.yaml")[0], messages)
+
 
+def _log_context(messages: list) -> None:
     logger.info(f"[AGENT] Processing with {len(messages)} messages in context")
     if len(messages) > 1:
         last_msg = messages[-1]
@@ -57,70 +68,96 @@ def execute_node(state: AgentState):
                 f"[AGENT] Last message: {last_msg.content[:100]}..."
             )  # First 100 chars
 
-    # 1. Handle Pending Confirmation
-    if pending_confirmation and pending_confirmation.get("tool_name"):
-        tool_name = pending_confirmation["tool_name"]
 
-        # Search backwards — plan_node may have appended an AI message after the user's "yes"
-        last_human = next(
-            (m for m in reversed(messages) if isinstance(m, HumanMessage)),
-            None,
+def _confirmation_step(state: AgentState, messages: list):
+    """Resolve a pending dangerous-tool confirmation.
+
+    Returns None when nothing is pending, a finished state update when the
+    action was cancelled or the tool is unknown, or ``(tool, args)`` for the
+    caller to run (sync or async).
+    """
+    pending_confirmation = state.get(
+        "pending_confirmation", {"tool_name": None, "user_message": None}
+    )
+    if not (pending_confirmation and pending_confirmation.get("tool_name")):
+        return None
+    tool_name = pending_confirmation["tool_name"]
+
+    # Search backwards — plan_node may have appended an AI message after the user's "yes"
+    last_human = next(
+        (m for m in reversed(messages) if isinstance(m, HumanMessage)),
+        None,
+    )
+    if not last_human:
+        return None
+
+    confirm = last_human.content.strip().lower()
+    logger.info(
+        f"[AGENT] Handling pending confirmation for tool: {tool_name}, user said: {confirm}"
+    )
+    if confirm not in ("yes", "y"):
+        return _confirmation_result(
+            HumanMessage(content=f"[SAFEGUARD] Action '{tool_name}' canceled.")
         )
 
-        if last_human:
-            confirm = last_human.content.strip().lower()
-            logger.info(
-                f"[AGENT] Handling pending confirmation for tool: {tool_name}, user said: {confirm}"
-            )
+    tool_args = pending_confirmation.get("tool_args", {})
+    matched_tool = next((t for t in tool_functions if t.name == tool_name), None)
+    if not matched_tool:
+        return _confirmation_result(
+            HumanMessage(content=f"[TOOL ERROR] Unknown tool '{tool_name}'")
+        )
+    logger.info(
+        f"[AGENT] User confirmed. Executing tool: {tool_name} with args: {tool_args}"
+    )
+    return matched_tool, tool_args
 
-            if confirm in ("yes", "y"):
-                tool_name = pending_confirmation["tool_name"]
-                tool_args = pending_confirmation.get("tool_args", {})
-                matched_tool = next(
-                    (t for t in tool_functions if t.name == tool_name), None
-                )
-                if matched_tool:
-                    logger.info(
-                        f"[AGENT] User confirmed. Executing tool: {tool_name} with args: {tool_args}"
-                    )
-                    try:
-                        output = matched_tool.invoke(tool_args)
-                        messages.append(HumanMessage(content=f"[TOOL OUTPUT] {output}"))
-                    except Exception as e:
-                        messages.append(HumanMessage(content=f"[TOOL ERROR] {e}"))
 
-                return {
-                    "messages": messages,
-                    "pending_confirmation": {"tool_name": None, "tool_args": None},
-                }
-            else:
-                messages.append(
-                    HumanMessage(content=f"[SAFEGUARD] Action '{tool_name}' canceled.")
-                )
-                return {
-                    "messages": messages,
-                    "pending_confirmation": {"tool_name": None, "tool_args": None},
-                }
+def _confirmation_result(message: HumanMessage) -> dict:
+    # Only the new message goes back into state — history is append-only.
+    return {
+        "messages": [message],
+        "pending_confirmation": {"tool_name": None, "tool_args": None},
+    }
+
+
+def _tool_output_message(tool, output) -> HumanMessage:
+    output = str(output)
+    output = tool_output_store.maybe_spill(output, tool.name) or output
+    return HumanMessage(content=f"[TOOL OUTPUT] {output}")
+
 
+def _prepare_call(state: AgentState, messages: list):
+    """Persist an approved plan into the input and pick the bound chain."""
     # If the user just approved a pending plan, inject it as an explicit
-    # instruction so the executor carries it out instead of replanning.
+    # instruction so the executor carries it out instead of replanning. It is
+    # persisted into state (not just this call's input) so later tool
+    # iterations see the exact same prefix and Ollama can reuse its KV cache.
+    new_messages = []
+    query = None
     pending_plan = state.get("pending_plan")
     if pending_plan:
         logger.info("[AGENT] Executing approved plan")
-        messages.append(
-            HumanMessage(
-                content=(
-                    "I approve the plan below. Execute it now: call the necessary "
-                    "tools, then give me the final answer.\n\n" + pending_plan
-                )
+        plan_instruction = HumanMessage(
+            content=(
+                "I approve the plan below. Execute it now: call the necessary "
+                "tools, then give me the final answer.\n\n" + pending_plan
             )
         )
+        messages.append(plan_instruction)
+        new_messages.append(plan_instruction)
+        query = plan_instruction.content
 
-    # Lazy load the model chain if not ready
-    chain = get_model_chain()
+    # Bind only the tools this request needs (cached per tool set).
+    tool_scope = resolve_tool_scope(state, query)
+    chain = get_model_chain(tool_scope["tools"] if tool_scope else None)
+    return new_messages, tool_scope, chain
 
-    response = stream_to_stdout(chain.stream(messages))
+
+def _finish(messages: list, new_messages: list, tool_scope, chain, response) -> dict:
     logger.info(f"[AGENT] Response finished")
+    context.record(messages, response, chain)
+    if response is not None:
+        tool_scope = widen_tool_scope(tool_scope, response.tool_calls)
 
     # Check for dangerous tools in the response
     if response is not None and response.tool_calls:
@@ -129,6 +166,7 @@ def execute_node(state: AgentState):
                 logger.info(f"[AGENT] Dangerous tool detected: {tc['name']}")
                 return {
                     "messages": [
+                        *new_messages,
                         response,
                         HumanMessage(
                             content=f"I'm about to perform '{tc['name']}'. This will delete data permanently. Please confirm with 'yes' or 'no'."
@@ -139,6 +177,7 @@ def execute_node(state: AgentState):
                         "tool_args": tc["args"],
                     },  # We assume only one dangerous tool at a time
                     "pending_plan": None,  # plan (if any) is now being executed
+                    "tool_scope": tool_scope,
                 }
 
     # The stream produced nothing usable (no text, no tool calls) — emit a
@@ -146,9 +185,72 @@ def execute_node(state: AgentState):
     if response is None or (
         not (response.content or "").strip() and not response.tool_calls
     ):
+        if is_cancelled():
+            return {
+                "messages": [*new_messages, AIMessage(content=cancelled_note())],
+                "pending_plan": None,
+                "tool_scope": tool_scope,
+            }
         fallback = "I wasn't able to produce a response for that. Could you rephrase?"
-        print(f"\n[AI]: {fallback}\n")
+        emit(f"\n[AI]: {fallback}\n")
         logger.warning("[AGENT] Empty response — emitted fallback message")
-        return {"messages": [AIMessage(content=fallback)], "pending_plan": None}
+        return {
+            "messages": [*new_messages, AIMessage(content=fallback)],
+            "pending_plan": None,
+            "tool_scope": tool_scope,
+        }
+
+    return {"messages": [*new_messages, response], "pending_plan": None, "tool_scope": tool_scope}
+
+
+def execute_node(state: AgentState):
+    """
+    The main agent node.
+    It handles:
+    1. Checking for pending confirmations.
+    2. Invoking the LLM.
+    """
+    messages = build_messages(state)
+    _log_context(messages)
+
+    # 1. Handle Pending Confirmation
+    step = _confirmation_step(state, messages)
+    if isinstance(step, dict):
+        return step
+    if step is not None:
+        tool, tool_args = step
+        try:
+            result = _tool_output_message(tool, tool.invoke(tool_args))
+        except Exception as e:
+            result = HumanMessage(content=f"[TOOL ERROR] {e}")
+        return _confirmation_result(result)
+
+    # 2. Invoke the LLM
+    new_messages, tool_scope, chain = _prepare_call(state, messages)
+    # Reuse the stream classify_node started speculatively, if it matches.
+    stream = speculation.claim(state, "execute", messages, chain) or chain.stream(messages)
+    return _finish(messages, new_messages, tool_scope, chain, stream_to_stdout(stream))
+
+
+async def aexecute_node(state: AgentState):
+    """Async :func:`execute_node` — same steps, awaiting the tool and the stream."""
+    messages = build_messages(state)
+    _log_context(messages)
+
+    step = _confirmation_step(state, messages)
+    if isinstance(step, dict):
+        return step
+    if step is not None:
+        tool, tool_args = step
+        try:
+            result = _tool_output_message(tool, await tool.ainvoke(tool_args))
+        except Exception as e:
+            result = HumanMessage(content=f"[TOOL ERROR] {e}")
+        return _confirmation_result(result)
+
+    new_messages, tool_scope, chain = _prepare_call(state, messages)
+    stream = speculation.claim(state, "execute", messages, chain) or chain.astream(messages)
+    return _finish(messages, new_messages, tool_scope, chain, await astream_to_stdout(stream))
+
 
-    return {"messages": [response], "pending_plan": None}
+register_target("execute", build_messages, get_chain_for_state)
@@ -1,19 +1,20 @@
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage
 from core.state import AgentState
 import logging
-from models.LLM import llm
+from models.registry import model_registry
 from core.loadPrompts import LoadPrompts
-from agent_nodes._stream import stream_to_stdout
+from agent_nodes._stream import emit, stream_to_stdout, astream_to_stdout
+from core.cancellation import cancelled_note, is_cancelled
 
 
 load_prompts = LoadPrompts()
-planning_prompt = load_prompts.load_prompt("planner.yaml")
+llm = model_registry.get("planner")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def plan_node(state: AgentState) -> AgentState:
+def _planner_messages(state: AgentState) -> list:
     # Use only the last user message for a focused plan — no history noise
     messages = state.get("messages", [])
     last_user_msg = next(
@@ -27,28 +28,39 @@ def plan_node(state: AgentState) -> AgentState:
     if rationale:
         planning_input += f"\nContext (why planning is needed): {rationale}"
 
-    response = stream_to_stdout(
-        llm.stream(
-            [
-                SystemMessage(planning_prompt[0].content),
-                HumanMessage(content=planning_input),
-            ]
-        )
-    )
+    return [
+        load_prompts.load_prompt("planner.yaml")[0],
+        HumanMessage(content=planning_input),
+    ]
+
+
+def _finish(response) -> dict:
     content = (response.content if response is not None else "").strip()
 
+    if is_cancelled():
+        # Half a plan is not something to approve.
+        return {"messages": [AIMessage(content=f"{content}\n{cancelled_note()}".strip())], "pending_plan": None}
+
     if not content:
         # Never end a planning turn silently — the stream produced nothing.
         content = "I couldn't draft a plan for that. Could you rephrase the request?"
-        print(f"\n[AI]: {content}\n")
+        emit(f"\n[AI]: {content}\n")
         logger.warning("[PLANNING] Empty plan — emitted fallback message")
         return {"messages": [AIMessage(content=content)], "pending_plan": None}
 
 
     hint = "\nReply 'ok' (or 'yes') to run this plan, or tell me what to change."
-    print(hint + "\n")
+    emit(hint + "\n")
     logger.info("[PLANNING] Plan generated — awaiting approval")
     return {
         "messages": [AIMessage(content=content + hint)],
         "pending_plan": content,
     }
+
+
+def plan_node(state: AgentState) -> AgentState:
+    return _finish(stream_to_stdout(llm.stream(_planner_messages(state))))
+
+
+async def aplan_node(state: AgentState) -> AgentState:
+    return _finish(await astream_to_stdout(llm.astream(_planner_messages(state))))
@@ -0,0 +1 @@
+"""Mock Ollama server and end-to-end latency benchmarks (``python -m bench.run_benchmarks``)."""
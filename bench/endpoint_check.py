@@ -0,0 +1,109 @@
+"""Failover check for the Ollama endpoint pool against two mock servers.
+
+Starts :class:`bench.mock_ollama.MockOllama` instances that answer with
+their own name, points an :class:`models.endpoints.EndpointPool` at them and
+checks, with real HTTP streams through the ``ollama`` client:
+
+* a session stays pinned to the endpoint that served it first;
+* when that endpoint goes down, the next call fails over before its first
+  chunk and the session is re-pinned to the other endpoint;
+* an endpoint that lacks the model (404) is skipped for one that has it;
+* pins are bounded (``max_pins``, least recently used dropped) and
+  :meth:`EndpointPool.unpin` forgets a closed session;
+* ``PooledChatOllama`` streams through the pool like ``ChatOllama``.
+
+    python -m bench.endpoint_check
+
+Exits non-zero if any check fails.
+"""
+
+import argparse
+import logging
+import sys
+from typing import List
+
+from bench.mock_ollama import DEFAULT_MODELS, MockOllama, Reply, scripted
+from models.endpoints import EndpointPool, PooledChatOllama
+
+MODEL = DEFAULT_MODELS[0]
+
+
+def _mock(name: str, models=DEFAULT_MODELS) -> MockOllama:
+    return MockOllama(scripted([Reply(name)]), ttft=0.0, tokens_per_s=1000.0, models=models).start()
+
+
+def _ask(pool: EndpointPool, session: str, model: str = MODEL) -> str:
+    def call(endpoint):
+        return endpoint.client.chat(model=model, messages=[{"role": "user", "content": "hi"}], stream=True)
+
+    return "".join(part["message"]["content"] for part in pool.stream(model, call, session))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench.endpoint_check", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--verbose", action="store_true", help="show the pool's logs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    failures: List[str] = []
+
+    def check(name: str, ok: bool, detail: str = "") -> None:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}{f' — {detail}' if detail and not ok else ''}")
+        if not ok:
+            failures.append(name)
+
+    a, b = _mock("A"), _mock("B")
+    pool = EndpointPool([a.url, b.url], probe_interval=3600)
+    try:
+        first = _ask(pool, "s1")
+        again = [_ask(pool, "s1") for _ in range(3)]
+        check("session stays pinned", again == [first] * 3, f"{first} then {again}")
+
+        pinned, other = (a, b) if first == "A" else (b, a)
+        pinned.stop()
+        reply = _ask(pool, "s1")
+        check("fails over when the pinned endpoint is down", reply != first, f"got {reply!r}")
+        check("counts the failover", pool.failovers == 1, f"failovers={pool.failovers}")
+        check("re-pins the session", _ask(pool, "s1") == reply)
+        down = next(e for e in pool.endpoints if e.url == pinned.url)
+        check("marks the dead endpoint unhealthy", not down.healthy)
+    finally:
+        pool.stop()
+        other.stop()
+
+    # The first endpoint lacks the model: a 404 before the first chunk moves on.
+    c, d = _mock("C", models=("other:1b",)), _mock("D")
+    pool = EndpointPool([c.url, d.url], probe_interval=3600)
+    try:
+        reply = _ask(pool, "s2")
+        check("skips an endpoint without the model", reply == "D", f"got {reply!r}")
+        missing = next(e for e in pool.endpoints if e.url == c.url)
+        check("remembers the missing model", not missing.has_model(MODEL))
+
+        llm = PooledChatOllama(pool, model=MODEL, base_url=d.url)
+        content = "".join(chunk.content for chunk in llm.stream("hi"))
+        check("PooledChatOllama streams through the pool", content == "D", f"got {content!r}")
+    finally:
+        pool.stop()
+        c.stop()
+        d.stop()
+
+    e = _mock("E")
+    pool = EndpointPool([e.url], probe_interval=3600, max_pins=2)
+    try:
+        for session in ("x", "y", "z"):
+            _ask(pool, session)
+        check("keeps at most max_pins pins", pool.stats()["pinned_sessions"] == 2)
+        check("drops the least recently used pin", "x" not in pool._pins and "z" in pool._pins)
+        pool.unpin("z")
+        check("unpin forgets a closed session", "z" not in pool._pins)
+    finally:
+        pool.stop()
+        e.stop()
+
+    print(f"\n{'all checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
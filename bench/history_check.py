@@ -0,0 +1,133 @@
+"""Check that every node's history window finds the rolling summary.
+
+Builds a conversation whose early turns ran tools, folds it with
+:data:`preprocessing.history_summary.history_summarizer` (the summarizer LLM
+is replaced by a canned reply, so no server is needed) and checks that:
+
+* the executor's view (with ToolMessages) and the conversational node's view
+  (without) both use the summary instead of dropping the old turns;
+* a second fold builds on the first summary;
+* while a fold is still being summarized, the previous summary is used.
+
+    python -m bench.history_check
+
+Exits non-zero if any check fails.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from typing import List
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from preprocessing import get_clean_history as history
+from preprocessing.history_summary import history_summarizer
+
+BUDGET = 50
+
+
+def _tool_turn(n: int) -> list:
+    call = {"name": "find_file", "args": {"filename": f"notes{n}.txt"}, "id": f"call-{n}"}
+    return [
+        HumanMessage(content=f"where is notes{n}.txt? " + "please look everywhere " * 5, id=f"h{n}"),
+        AIMessage(content="", tool_calls=[call], id=f"a{n}"),
+        ToolMessage(content=f"/home/u/docs/notes{n}.txt " * 10, tool_call_id=f"call-{n}", name="find_file", id=f"t{n}"),
+        AIMessage(content=f"It is at /home/u/docs/notes{n}.txt.", id=f"r{n}"),
+    ]
+
+
+def _chat_turn(n: int) -> list:
+    return [
+        HumanMessage(content=f"thanks, what did you find in turn {n}?", id=f"h{n}"),
+        AIMessage(content="The notes file, in your documents folder.", id=f"r{n}"),
+    ]
+
+
+def _settle(timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while history_summarizer._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _windows(messages: list):
+    state = {"messages": messages}
+    executor = history.get_clean_history(state, token_budget=BUDGET, node="execute")
+    conversational = history.get_clean_history(
+        state, include_tool_messages=False, token_budget=BUDGET, node="conversational"
+    )
+    return executor, conversational, history.history_reports["execute"], history.history_reports["conversational"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench.history_check", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--verbose", action="store_true", help="show the windowing logs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    failures: List[str] = []
+
+    def check(name: str, ok: bool, detail: str = "") -> None:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}{f' — {detail}' if detail and not ok else ''}")
+        if not ok:
+            failures.append(name)
+
+    calls = []
+
+    def summarize(previous, new_messages):
+        calls.append((previous, len(new_messages)))
+        return f"summary #{len(calls)}"
+
+    history_summarizer._call_llm = summarize
+    history_summarizer.keep_turns = 1
+    history.HISTORY_BUDGETS.update(execute=BUDGET, conversational=BUDGET)
+
+    # A tool-using turn, then a conversational one: the fold ends on the
+    # tool turn's final answer, which the conversational view also has.
+    messages = _tool_turn(1) + _chat_turn(2)
+    history_summarizer.schedule({"messages": messages})
+    _settle()
+    executor, conversational, ex_report, conv_report = _windows(messages)
+    check("executor window uses the summary", executor[0].content.endswith("summary #1"), executor[0].content)
+    check(
+        "conversational window uses the summary",
+        conversational[0].content.endswith("summary #1"),
+        conversational[0].content,
+    )
+    check("conversational window drops nothing", conv_report["dropped_tokens"] == 0, str(conv_report))
+    check("conversational window counts the summarized turn", conv_report["summarized_tokens"] > 0, str(conv_report))
+    check("no ToolMessage reaches the conversational window", not any(isinstance(m, ToolMessage) for m in conversational))
+
+    # A turn that ends on a ToolMessage (no final answer) is covered too.
+    messages = messages + _tool_turn(3)[:3] + _chat_turn(4)
+    history_summarizer.schedule({"messages": messages})
+    _settle()
+    executor, conversational, ex_report, conv_report = _windows(messages)
+    check("second fold builds on the first summary", calls[-1] == ("summary #1", 5), str(calls))
+    check(
+        "both windows use the rolling summary",
+        executor[0].content.endswith("summary #2") and conversational[0].content.endswith("summary #2"),
+        f"{executor[0].content!r} / {conversational[0].content!r}",
+    )
+    check("executor window keeps no covered message", executor[1:] == messages[-2:], str(executor[1:]))
+    check("conversational window drops nothing", conv_report["dropped_tokens"] == 0, str(conv_report))
+
+    # A fold still being summarized: the windows fall back to the last summary.
+    history_summarizer._call_llm = lambda previous, new_messages: time.sleep(0.5) or "late"
+    messages = messages + _chat_turn(5)
+    history_summarizer.schedule({"messages": messages})
+    executor, conversational, ex_report, conv_report = _windows(messages)
+    check(
+        "pending fold falls back to the previous summary",
+        conversational[0].content.endswith("summary #2"),
+        conversational[0].content,
+    )
+    _settle()
+
+    print(f"\n{'all checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
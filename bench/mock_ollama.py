@@ -0,0 +1,317 @@
+"""Local stand-in for the Ollama HTTP API, for tests and benchmarks.
+
+Serves just enough of the API for ``ChatOllama`` and the model registry:
+``/api/chat`` (streamed NDJSON or a single JSON reply), ``/api/generate``
+(model loads), ``/api/tags``, ``/api/ps``, ``/api/show`` and ``/api/embed``.
+Replies come from a *responder* — a callable that receives the parsed
+``/api/chat`` request and returns a :class:`Reply` — so a script can answer
+with text or tool calls depending on which node is asking. Timing is
+synthetic and reproducible: each reply waits ``ttft`` seconds before its
+first chunk and then streams one word per ``1 / tokens_per_s`` seconds. The
+final chunk carries Ollama's usual ``eval_count`` / ``prompt_eval_count`` /
+durations, so tracing and ``/models`` work against the mock too.
+
+Standalone::
+
+    python -m bench.mock_ollama --port 11435 --ttft 0.05 --tps 80 \\
+        --script replies.json    # a JSON list of Reply fields, served in order
+    OLLAMA_BASE_URL=http://127.0.0.1:11435 ./cli.sh
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODELS = ("qwen3:1.7b-q4_K_M",)
+
+
+@dataclass
+class Reply:
+    content: str = ""
+    tool_calls: List[dict] = field(default_factory=list)  # [{"name": …, "args": {…}}]
+    ttft: Optional[float] = None  # overrides the server default for this reply
+    tokens_per_s: Optional[float] = None
+
+    def message(self, content: str = None) -> dict:
+        message = {"role": "assistant", "content": self.content if content is None else content}
+        if self.tool_calls:
+            message["tool_calls"] = [
+                {"function": {"name": tc["name"], "arguments": tc.get("args", {})}}
+                for tc in self.tool_calls
+            ]
+        return message
+
+
+Responder = Callable[[dict], Reply]
+
+
+def scripted(replies: List[Reply]) -> Responder:
+    """Responder that serves ``replies`` in order, repeating the last one."""
+    replies = list(replies) or [Reply("ok")]
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def respond(request: dict) -> Reply:
+        with lock:
+            i = next(counter)
+        return replies[min(i, len(replies) - 1)]
+
+    return respond
+
+
+def _words(text: str) -> List[str]:
+    """Split into streamable pieces that join back to ``text``."""
+    pieces, current = [], ""
+    for ch in text:
+        current += ch
+        if ch == " ":
+            pieces.append(current)
+            current = ""
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _prompt_tokens(request: dict) -> int:
+    chars = sum(len(str(m.get("content") or "")) for m in request.get("messages", []))
+    chars += len(json.dumps(request.get("tools") or []))
+    return max(1, chars // 4)
+
+
+class MockOllama:
+    """Threaded mock server. Use as a context manager or call start()/stop()."""
+
+    def __init__(
+        self,
+        responder: Optional[Responder] = None,
+        ttft: float = 0.05,
+        tokens_per_s: float = 100.0,
+        models=DEFAULT_MODELS,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.responder = responder or scripted([Reply("ok")])
+        self.ttft = ttft
+        self.tokens_per_s = tokens_per_s
+        self.models = list(models)
+        self.requests = 0
+        self.model_seconds = 0.0  # time spent "generating", summed over chat calls
+        self.log: List[dict] = []  # one row per chat call: node-agnostic request summary
+        self._lock = threading.Lock()
+        self._connections: set = set()  # open client sockets, closed by stop()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        # Keep-alive connections outlive the listener; drop them like a dead host would.
+        with self._lock:
+            connections, self._connections = list(self._connections), set()
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "MockOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _has_model(self, name: Optional[str]) -> bool:
+        return name in self.models or f"{name}:latest" in self.models
+
+    # ------------------------------------------------------------------ #
+    # Chat
+    # ------------------------------------------------------------------ #
+    def _chat(self, request: dict, write: Callable[[dict], None]) -> None:
+        reply = self.responder(request)
+        ttft = self.ttft if reply.ttft is None else reply.ttft
+        tps = self.tokens_per_s if reply.tokens_per_s is None else reply.tokens_per_s
+        model = request.get("model")
+        stream = request.get("stream", True)
+        started = time.perf_counter()
+
+        time.sleep(ttft)
+        pieces = _words(reply.content) or [""]
+        eval_started = time.perf_counter()
+        if stream:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(1 / tps)
+                write({"model": model, "message": {"role": "assistant", "content": piece}, "done": False})
+        else:
+            time.sleep((len(pieces) - 1) / tps)
+        eval_s = time.perf_counter() - eval_started
+        final = {
+            "model": model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": reply.message("" if stream else None),
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": _prompt_tokens(request),
+            "prompt_eval_duration": int(ttft * 1e9),
+            "eval_count": len(pieces),
+            "eval_duration": int(eval_s * 1e9),
+        }
+        write(final)
+        took = time.perf_counter() - started
+        with self._lock:
+            self.requests += 1
+            self.model_seconds += took
+            self.log.append({
+                "messages": len(request.get("messages", [])),
+                "tools": len(request.get("tools") or []),
+                "tool_calls": len(reply.tool_calls),
+                "seconds": took,
+            })
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with mock._lock:
+                    mock._connections.add(self.connection)
+
+            def finish(self):
+                with mock._lock:
+                    mock._connections.discard(self.connection)
+                super().finish()
+
+            def _json(self, obj, code: int = 200) -> None:
+                body = json.dumps(obj).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._json({"models": [{"name": m, "model": m, "size": 0} for m in mock.models]})
+                elif self.path == "/api/ps":
+                    self._json({"models": [
+                        {"name": m, "model": m, "size": 0, "size_vram": 0} for m in mock.models
+                    ]})
+                elif self.path == "/api/version":
+                    self._json({"version": "0.0.0-mock"})
+                else:
+                    self._json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                request = self._body()
+                model = request.get("model")
+                if self.path in ("/api/chat", "/api/generate", "/api/show") and not mock._has_model(model):
+                    return self._json({"error": f"model '{model}' not found"}, 404)
+                if self.path == "/api/generate":
+                    return self._json({"model": model, "response": "", "done": True, "done_reason": "load"})
+                if self.path == "/api/show":
+                    return self._json({"modelfile": "", "details": {}, "model_info": {}, "capabilities": ["completion", "tools"]})
+                if self.path == "/api/embed":
+                    inputs = request.get("input")
+                    inputs = [inputs] if isinstance(inputs, str) else list(inputs or [])
+                    return self._json({"model": model, "embeddings": [_embed(text) for text in inputs]})
+                if self.path != "/api/chat":
+                    return self._json({"error": "not found"}, 404)
+
+                if not request.get("stream", True):
+                    replies = []
+                    mock._chat(request, replies.append)
+                    return self._json(replies[-1])
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write(obj: dict) -> None:
+                    data = (json.dumps(obj) + "\n").encode()
+                    self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+
+                try:
+                    mock._chat(request, write)
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client closed the stream early
+
+        return Handler
+
+
+def _embed(text: str, dims: int = 64) -> List[float]:
+    """Deterministic bag-of-words vector, so similar texts get similar embeddings."""
+    vector = [0.0] * dims
+    for word in text.lower().split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dims] += 1.0
+    return vector
+
+
+def _load_script(path: str) -> List[Reply]:
+    with open(path, "r") as f:
+        return [Reply(**row) for row in json.load(f)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench.mock_ollama", description="Mock Ollama HTTP server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft", type=float, default=0.05, help="seconds before the first chunk")
+    parser.add_argument("--tps", type=float, default=100.0, help="streamed words per second")
+    parser.add_argument("--model", action="append", help="model name to serve (repeatable)")
+    parser.add_argument("--script", help="JSON list of replies, served in order")
+    args = parser.parse_args()
+
+    responder = scripted(_load_script(args.script)) if args.script else None
+    server = MockOllama(
+        responder, ttft=args.ttft, tokens_per_s=args.tps,
+        models=args.model or DEFAULT_MODELS, host=args.host, port=args.port,
+    )
+    print(f"mock Ollama on {server.url} (ttft {args.ttft}s, {args.tps} tok/s) — Ctrl-C to stop")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""End-to-end latency benchmarks for the agent graph.
+
+Drives ``core.agent.app`` through fixed scenarios against
+:mod:`bench.mock_ollama`, so runs are reproducible and comparable between
+commits. Model time comes from the mock's fixed TTFT and tokens/s. It is
+measured on the server side and subtracted, together with the tools' own
+run time (from the tracing spans). What is left is the graph's overhead:
+routing, history assembly, tool binding, state merging and HTTP parsing.
+
+    python -m bench.run_benchmarks                      # every scenario, 20 runs
+    python -m bench.run_benchmarks -s tool_loop -n 50 --ttft 0.02 --tps 200
+    python -m bench.run_benchmarks --json bench.json    # also write raw numbers
+
+Local routing (fast path, intent model, decision cache), speculation and the
+response cache are switched off unless ``--local-routing`` is given, so every
+turn takes the same path through the router LLM on every run.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from bench.mock_ollama import MockOllama, Reply
+
+LOOP_ITERATIONS = 15
+
+
+# --------------------------------------------------------------------------- #
+# Scenarios
+# --------------------------------------------------------------------------- #
+def _tool_results(request: dict) -> int:
+    return sum(1 for m in request.get("messages", []) if m.get("role") == "tool")
+
+
+def _route(route: str) -> Reply:
+    return Reply(json.dumps({"route": route, "rationale": "benchmark"}))
+
+
+def _run(command: str) -> Reply:
+    return Reply(tool_calls=[{"name": "run_command", "args": {"command": command}}])
+
+
+def _offered(request: dict) -> List[str]:
+    return [t.get("function", {}).get("name") for t in request.get("tools") or []]
+
+
+# Tools the executor called that the same request had not bound — the tool
+# scope should already cover whatever the turn goes on to use.
+_unbound: List[str] = []
+
+
+def _call(request: dict, name: str, args: dict) -> Reply:
+    if name not in _offered(request):
+        _unbound.append(name)
+    return Reply(tool_calls=[{"name": name, "args": args}])
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    turns: List[str]
+    respond: Callable[[str, dict], Reply]  # (node, /api/chat request) -> reply
+
+
+def _direct(node: str, request: dict) -> Reply:
+    if node == "router":
+        return _route("DIRECT_EXECUTION")
+    if _tool_results(request) == 0:
+        return _run("echo bench")
+    return Reply("The command printed: bench")
+
+
+_projects = itertools.count()
+_project = ""
+
+
+def _plan(node: str, request: dict) -> Reply:
+    global _project
+    if node == "router":
+        return _route("NEEDS_PLANNING")
+    if node == "planner":
+        _project = f"bench-plan-{next(_projects)}"
+        return Reply(
+            f"1. create_project_folder `{_project}` in the data directory.\n"
+            "2. write_file `README.md` in it.\n3. Report what was created."
+        )
+    # The approval ("ok") says nothing about these tools: they must be bound
+    # from the plan, on the first executor call as on the second.
+    root = os.environ["ZKZK_DATA_DIR"]
+    done = _tool_results(request)
+    if done == 0:
+        return _call(request, "create_project_folder", {"working_directory": root, "project_name": _project})
+    if done == 1:
+        return _call(
+            request, "write_file",
+            {"working_directory": os.path.join(root, _project), "file_path": "README.md", "content": "# bench\n"},
+        )
+    return Reply(f"Created {_project} with a README.md.")
+
+
+def _dangerous(node: str, request: dict) -> Reply:
+    if node == "router":
+        return _route("DIRECT_EXECUTION")
+    # Only ever proposed — the scenario answers "no", so nothing is deleted.
+    return Reply(tool_calls=[{"name": "empty_trash", "args": {}}])
+
+
+def _loop(node: str, request: dict) -> Reply:
+    if node == "router":
+        return _route("DIRECT_EXECUTION")
+    done = _tool_results(request)
+    if done < LOOP_ITERATIONS:
+        return _run(f"echo iteration {done + 1}")
+    return Reply(f"Ran {LOOP_ITERATIONS} iterations.")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    s.name: s
+    for s in (
+        Scenario("direct", "router → execute → run_command → execute", ["run echo bench"], _direct),
+        Scenario(
+            "plan_approve", "router → plan; 'ok' → execute create_project_folder + write_file",
+            ["set up a small project with a readme", "ok"], _plan,
+        ),
+        Scenario(
+            "dangerous_confirm", "router → execute proposes empty_trash; 'no' cancels it",
+            ["empty my trash", "no"], _dangerous,
+        ),
+        Scenario(
+            "tool_loop", f"router → execute ↔ tools for {LOOP_ITERATIONS} iterations",
+            [f"run echo {LOOP_ITERATIONS} times"], _loop,
+        ),
+    )
+}
+
+
+# --------------------------------------------------------------------------- #
+# Runner
+# --------------------------------------------------------------------------- #
+def _configure_env(url: str, data_dir: str, local_routing: bool) -> None:
+    os.environ["OLLAMA_BASE_URL"] = url
+    os.environ.pop("OLLAMA_BASE_URLS", None)
+    os.environ["ZKZK_DATA_DIR"] = data_dir
+    os.environ["ROUTER_SPECULATIVE"] = "0"
+    os.environ["RESPONSE_CACHE"] = "0"
+    os.environ["ROUTER_DECISION_LOG"] = "0"
+    if not local_routing:
+        for name in ("ROUTER_FAST_PATH", "ROUTER_CACHE", "ROUTER_INTENT_MODEL_ENABLED"):
+            os.environ[name] = "0"
+
+
+def _node_detector() -> Callable[[dict], str]:
+    """Tell which node sent a request from its system prompt."""
+    from core.loadPrompts import LoadPrompts
+
+    prompts = LoadPrompts()
+    by_prompt = {
+        prompts.load_prompt(f"{name}.yaml")[0].content: node
+        for name, node in (
+            ("router", "router"), ("planner", "planner"),
+            ("executor", "executor"), ("conversational", "conversational"),
+        )
+    }
+
+    def detect(request: dict) -> str:
+        messages = request.get("messages") or [{}]
+        return by_prompt.get(messages[0].get("content"), "executor")
+
+    return detect
+
+
+def _fresh_state() -> dict:
+    return {
+        "messages": [],
+        "pending_confirmation": {"tool_name": None, "user_message": None},
+        "running_processes": {},
+        "category": None,
+        "iteration_count": 0,
+    }
+
+
+def run_scenario(app, mock: MockOllama, detect, scenario: Scenario, runs: int, warmup: int) -> dict:
+    from langchain_core.messages import HumanMessage
+
+    from core.tracing import tracer
+
+    mock.responder = lambda request: scenario.respond(detect(request), request)
+    samples = []
+    for i in range(warmup + runs):
+        session = f"bench-{scenario.name}-{i}"
+        config = {"configurable": {"thread_id": session}}
+        state = _fresh_state()
+        requests_before, model_before = mock.requests, mock.model_seconds
+        unbound_before = len(_unbound)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for text in scenario.turns:
+                state["messages"] = [*state["messages"], HumanMessage(content=text)]
+                state["iteration_count"] = 0
+                state = app.invoke(state, config)
+        total = time.perf_counter() - started
+        if i < warmup:
+            continue
+        rows = tracer.summary(session)
+        tools = sum(r["total_ms"] for r in rows if r["kind"] == "tool") / 1000
+        model = mock.model_seconds - model_before
+        samples.append({
+            "total_s": total,
+            "model_s": model,
+            "tools_s": tools,
+            "graph_s": total - model - tools,
+            "llm_calls": mock.requests - requests_before,
+            "tool_calls": sum(r["count"] for r in rows if r["kind"] == "tool"),
+            "unbound": _unbound[unbound_before:],
+        })
+    return {"scenario": scenario.name, "description": scenario.description, "samples": samples}
+
+
+def summarize(result: dict) -> dict:
+    from core.tracing import percentile
+
+    samples = result["samples"]
+    summary = {"scenario": result["scenario"], "runs": len(samples)}
+    for key in ("total_s", "model_s", "tools_s", "graph_s"):
+        values = [s[key] for s in samples]
+        summary[key] = {
+            "p50": percentile(values, 50), "p95": percentile(values, 95),
+            "mean": statistics.fmean(values), "min": min(values), "max": max(values),
+        }
+    summary["llm_calls"] = samples[0]["llm_calls"] if samples else 0
+    summary["tool_calls"] = samples[0]["tool_calls"] if samples else 0
+    summary["unbound"] = sorted({name for s in samples for name in s["unbound"]})
+    return summary
+
+
+def print_report(summaries: List[dict], ttft: float, tps: float) -> None:
+    print(f"\nmock model: ttft {ttft * 1000:.0f}ms · {tps:.0f} tok/s\n")
+    header = f"{'scenario':<19}{'runs':>5}{'llm':>5}{'tools':>6}   {'total p50/p95':>17}   {'model p50':>10}   {'tools p50':>10}   {'graph p50/p95':>17}"
+    print(header)
+    print("─" * len(header))
+    for s in summaries:
+        ms = lambda key, q: s[key][q] * 1000  # noqa: E731
+        print(
+            f"{s['scenario']:<19}{s['runs']:>5}{s['llm_calls']:>5}{s['tool_calls']:>6}   "
+            f"{ms('total_s', 'p50'):>7.1f} / {ms('total_s', 'p95'):>6.1f}ms   "
+            f"{ms('model_s', 'p50'):>8.1f}ms   {ms('tools_s', 'p50'):>8.1f}ms   "
+            f"{ms('graph_s', 'p50'):>7.1f} / {ms('graph_s', 'p95'):>6.1f}ms"
+        )
+    print()
+    for s in summaries:
+        if s["unbound"]:
+            print(f"!! {s['scenario']}: the executor called {', '.join(s['unbound'])} without having it bound")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench.run_benchmarks", description=__doc__.split("\n\n")[0])
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="run only these (repeatable)")
+    parser.add_argument("-n", "--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--ttft", type=float, default=0.05, help="mock time to first token, seconds")
+    parser.add_argument("--tps", type=float, default=100.0, help="mock tokens per second")
+    parser.add_argument("--local-routing", action="store_true", help="keep the fast path / caches on")
+    parser.add_argument("--json", metavar="PATH", help="write summaries and raw samples as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the agent's logs")
+    args = parser.parse_args()
+
+    mock = MockOllama(ttft=args.ttft, tokens_per_s=args.tps).start()
+    data_dir = tempfile.mkdtemp(prefix="zkzk-bench-")
+    _configure_env(mock.url, data_dir, args.local_routing)
+
+    # Imported only now: the registry and routing read the environment at import.
+    from core.agent import app
+    from models.registry import model_registry
+
+    mock.models = sorted({config.model for config in model_registry.configs.values()})
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.ERROR)
+    detect = _node_detector()
+
+    results = []
+    for name in args.scenario or SCENARIOS:
+        print(f"running {name} ({args.warmup} warm-up + {args.runs} runs)…", file=sys.stderr)
+        results.append(run_scenario(app, mock, detect, SCENARIOS[name], args.runs, args.warmup))
+    mock.stop()
+
+    summaries = [summarize(r) for r in results]
+    print_report(summaries, args.ttft, args.tps)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {"ttft": args.ttft, "tokens_per_s": args.tps, "summaries": summaries, "results": results},
+                f, indent=2,
+            )
+        print(f"wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Live file search: the in-process walker against ``find``.
+
+Generates a tree under a temporary directory (source-like folders, plus a
+``node_modules`` and a ``.git`` in every tenth folder), then times, over
+``--runs`` runs on a warm page cache:
+
+* ``find <root> -name <pattern>`` as a subprocess — what ``find_file`` did;
+* :class:`core.fs_walk.Walk` with pruning off, on 1 and ``--workers`` threads
+  (same matches as ``find``; the counts are checked);
+* the walker with its default pruning, as ``find_file`` runs it;
+* time to the first match: the first line ``find`` prints against a walker
+  with ``max_results=1``.
+
+    python -m bench.walk_benchmark
+    python -m bench.walk_benchmark --dirs 5000 --files 100 --workers 8 -n 5
+    python -m bench.walk_benchmark --root ~/src -p '*.py'   # an existing tree instead
+
+Cold-cache numbers need ``echo 3 > /proc/sys/vm/drop_caches`` between runs
+(root only), which this script does not do.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+from core.fs_walk import Walk
+
+
+# --------------------------------------------------------------------------- #
+# Tree
+# --------------------------------------------------------------------------- #
+def make_tree(root: str, dirs: int, files: int, depth: int) -> int:
+    """Create ``dirs`` folders ``depth`` levels deep with ``files`` files each; returns the file count."""
+    fanout = max(2, round(dirs ** (1 / depth)))
+    created = 0
+    for i in range(dirs):
+        parts, n = [], i
+        for level in range(depth):
+            parts.append(f"dir{level}_{n % fanout}")
+            n //= fanout
+        folder = os.path.join(root, *parts, f"pkg{i}")
+        os.makedirs(folder, exist_ok=True)
+        for j in range(files):
+            name = f"target_{i}_{j}.log" if j % 50 == 0 else f"module_{i}_{j}.py"
+            open(os.path.join(folder, name), "w").close()
+        created += files
+        if i % 10 == 0:
+            # Dependency and VCS folders: most of the files, none of the interest.
+            for sub in ("node_modules/lib/dist", ".git/objects/ab"):
+                junk = os.path.join(folder, sub)
+                os.makedirs(junk, exist_ok=True)
+                for j in range(files * 3):
+                    open(os.path.join(junk, f"target_junk_{j}.log" if j % 50 == 0 else f"blob{j}"), "w").close()
+                created += files * 3
+    return created
+
+
+# --------------------------------------------------------------------------- #
+# Contenders
+# --------------------------------------------------------------------------- #
+def run_find(root: str, pattern: str) -> int:
+    out = subprocess.run(["find", root, "-name", pattern], capture_output=True, text=True).stdout
+    return len(out.splitlines())
+
+
+def find_first(root: str, pattern: str) -> int:
+    process = subprocess.Popen(
+        ["find", root, "-name", pattern], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    found = 1 if process.stdout.readline() else 0
+    process.kill()
+    process.wait()
+    return found
+
+
+def run_walk(root: str, pattern: str, **kwargs) -> int:
+    return sum(1 for _ in Walk(root, pattern, **kwargs))
+
+
+def measure(func: Callable[[], int], runs: int) -> Tuple[List[float], int]:
+    samples, count = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        count = func()
+        samples.append(time.perf_counter() - start)
+    return samples, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench.walk_benchmark", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--root", help="search this existing tree instead of generating one")
+    parser.add_argument("--dirs", type=int, default=2000, help="generated folders")
+    parser.add_argument("--files", type=int, default=50, help="files per generated folder")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("-p", "--pattern", default="target_*.log")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("-n", "--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    scratch = None
+    root = os.path.expanduser(args.root) if args.root else None
+    if root is None:
+        scratch = tempfile.mkdtemp(prefix="zkzk-walk-")
+        root = scratch
+        start = time.perf_counter()
+        total = make_tree(root, args.dirs, args.files, args.depth)
+        print(f"generated {total} files in {args.dirs} folders under {root} ({time.perf_counter() - start:.1f}s)")
+    try:
+        run_find(root, args.pattern)  # warm the page cache
+        contenders = [
+            ("find", lambda: run_find(root, args.pattern)),
+            ("walk, 1 thread", lambda: run_walk(root, args.pattern, prune=[], workers=1, max_results=None)),
+            (f"walk, {args.workers} threads", lambda: run_walk(root, args.pattern, prune=[], workers=args.workers, max_results=None)),
+            (f"walk, {args.workers} threads, pruned", lambda: run_walk(root, args.pattern, workers=args.workers, max_results=None)),
+            ("find, first match", lambda: find_first(root, args.pattern)),
+            ("walk, first match", lambda: run_walk(root, args.pattern, workers=args.workers, max_results=1)),
+        ]
+        print(f"\npattern {args.pattern!r} · {args.runs} runs · warm cache\n")
+        print(f"{'contender':28} {'matches':>8} {'p50':>10} {'min':>10}")
+        print("─" * 60)
+        results = {}
+        for name, func in contenders:
+            samples, count = measure(func, args.runs)
+            results[name] = count
+            print(f"{name:28} {count:8d} {statistics.median(samples) * 1000:8.1f}ms {min(samples) * 1000:8.1f}ms")
+        if results["find"] != results["walk, 1 thread"]:
+            print(f"\n!! walker found {results['walk, 1 thread']} matches, find {results['find']}")
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,18 +12,23 @@ Run it via the launcher:
     ./cli.sh --verbose       # show the agent's internal INFO logs
     ./cli.sh --debug         # show everything (DEBUG)
     ./cli.sh --user alice    # override the dummy user id
+    ./cli.sh --resume <id>   # continue a saved session
+    ./cli.sh --sync          # blocking REPL instead of the asyncio one
 
 or directly:
     python -m chat_cli
 """
 
 import argparse
+import asyncio
 import contextlib
-import io
 import logging
 import os
+import signal
 import sys
+import threading
 import time
+from datetime import datetime
 
 from dotenv import load_dotenv
 
@@ -76,74 +81,282 @@ def read_user_input(prompt: str) -> str:
 def load_runtime(verbose_default: bool):
     """
     Import the heavy agent graph while showing INFO logs so the ~5s init isn't
-    a silent wait. Returns (app, model_name). Logging level is restored to the
+    a silent wait. Returns (app, model_name); the app persists sessions in the
+    SQLite checkpointer unless CHECKPOINTS=0. Logging level is restored to the
     user's chosen verbosity afterwards.
     """
     set_level(logging.INFO)  # show init progress regardless of --verbose
     log.info("loading agent runtime…")
     start = time.time()
-    from core.agent import app
-    from models.LLM import MODEL_NAME
+    from core.agent import compile_app
+    from core.checkpointer import get_checkpointer
+    from models.registry import model_registry
 
+    app = compile_app(get_checkpointer())
     log.info("agent graph imported in %.1fs", time.time() - start)
     if not verbose_default:
         set_verbose(False)  # back to quiet for the chat itself
-    return app, MODEL_NAME
+    return app, model_registry.describe()
 
 
-def warm_up(app, verbose_default: bool) -> None:
-    from langchain_core.messages import HumanMessage
+def start_preload() -> None:
+    """Load the models and pre-bind tool chains in the background; input is open at once."""
+    from core.preload import preloader
 
-    set_level(logging.INFO)  # surface the model warm-up steps
-    log.info("warming up model…")
-    start = time.time()
-    warm_state = ChatSession.fresh_state()
-    warm_state["messages"] = [
-        HumanMessage(content="this is a warm up message, generate a short response"),
-    ]
-    try:
-        # Swallow the throwaway warm-up reply that the nodes stream to stdout.
-        with contextlib.redirect_stdout(io.StringIO()):
-            app.invoke(warm_state)
-        log.info("model ready in %.1fs", time.time() - start)
-    except Exception as exc:  # noqa: BLE001 — surface, don't crash startup
-        log.error("warm-up failed: %s", exc)
+    log.info("loading models in the background…")
+    preloader.start()
+
+
+_preload_reported = False
+
+
+def wait_for_preload() -> None:
+    """Called before a turn: wait for a preload still in flight instead of repeating it."""
+    global _preload_reported
+    from core.preload import preloader
+
+    if not preloader.done:
+        print(style("  … waiting for the models to finish loading", C.GREY, C.DIM))
+        preloader.wait()
+        log.info("models ready in %.1fs", preloader.seconds)
+    if preloader.failed and not _preload_reported:
+        _preload_reported = True
         print(
             style(
                 "  the model could not be reached — is Ollama running? "
-                "you can still type, but requests will error.",
+                "requests will error until it is.",
                 C.YELLOW,
             )
         )
-    finally:
-        if not verbose_default:
-            set_verbose(False)
 
-def run_turn(app, session: ChatSession, user_input: str) -> None:
+
+def resume_session(app, session: ChatSession, session_id: str) -> bool:
+    """Load a saved session's state from the checkpointer."""
     from langchain_core.messages import HumanMessage
 
-    session.state["messages"].append(HumanMessage(content=user_input))
-    session.state["iteration_count"] = 0  # reset step counter for the new request
-    session.turns += 1
+    if app.checkpointer is None:
+        print(style("  sessions are not saved (CHECKPOINTS=0) — starting fresh", C.YELLOW))
+        return False
+    start = time.perf_counter()
+    snapshot = app.get_state({"configurable": {"thread_id": session_id}})
+    if not snapshot.values:
+        print(style(f"  no saved session {session_id} — starting fresh", C.YELLOW))
+        return False
+    session.session_id = session_id
+    session.state = {**ChatSession.fresh_state(), **snapshot.values}
+    session.turns = sum(isinstance(m, HumanMessage) for m in session.state["messages"])
+    log.info(
+        "resumed session %s (%d messages) in %.1fms",
+        session_id, len(session.state["messages"]), (time.perf_counter() - start) * 1000,
+    )
+    return True
 
-    print(style(rule(), C.GREY))
-    start = time.time()
-    try:
-        session.state = app.invoke(session.state)
-    except KeyboardInterrupt:
-        print(style("\n  ⏹ request interrupted", C.YELLOW))
+
+def print_saved_sessions(app) -> None:
+    if app.checkpointer is None:
+        print(style("  sessions are not saved (CHECKPOINTS=0)", C.YELLOW))
         return
-    except Exception as exc:  # noqa: BLE001 — keep the REPL alive
-        log.error("agent error: %s", exc)
-        print(style(f"  ✖ the agent raised an error: {exc}", C.RED))
+    threads = app.checkpointer.threads()
+    if not threads:
+        print(style("  no saved sessions", C.GREY))
         return
+    print(rule("saved sessions"))
+    for t in threads:
+        updated = datetime.fromtimestamp(t["updated"])
+        print(f"  {style(t['thread_id'], C.BOLD)}  {updated:%Y-%m-%d %H:%M}  "
+              f"{style(str(t['messages']) + ' messages', C.GREY)}")
+    print(rule())
 
+
+def _reload_state(app, session: ChatSession) -> None:
+    """After a failed turn, pick up whatever the checkpointer kept of it."""
+    if app.checkpointer is not None:
+        values = app.get_state(session.config).values
+        if values:
+            session.state = {**ChatSession.fresh_state(), **values}
+
+
+def _turn_input(app, session: ChatSession, user_input: str) -> dict:
+    return session.turn_input(user_input, checkpointed=app.checkpointer is not None)
+
+
+def _finish_turn(session: ChatSession, start: float) -> None:
     ui.render_assistant_final(session)
     took = time.time() - start
+
+    # Fold old turns into the rolling history summary off the critical path.
+    from preprocessing.history_summary import history_summarizer
+
+    history_summarizer.schedule(session.state)
     print(style(f"  {took:.1f}s · session {session.session_id}", C.GREY, C.DIM))
     print()
 
 
+def _mark(span, status: str) -> None:
+    if span is not None:
+        span.attrs["status"] = status
+
+
+def run_turn(app, session: ChatSession, user_input: str) -> None:
+    wait_for_preload()
+    turn_input = _turn_input(app, session, user_input)
+
+    from core.cancellation import turn_scope
+    from core.tracing import tracer
+
+    print(style(rule(), C.GREY))
+    start = time.time()
+    with tracer.span("turn", "turn", session=session.session_id) as span, turn_scope() as token:
+        try:
+            session.state = app.invoke(turn_input, session.config)
+        except KeyboardInterrupt:
+            token.cancel("interrupted")  # kills the tools' subprocesses
+            _mark(span, "interrupted")
+            print(style("\n  ⏹ request interrupted", C.YELLOW))
+            _reload_state(app, session)
+            return
+        except Exception as exc:  # noqa: BLE001 — keep the REPL alive
+            _mark(span, "error")
+            log.error("agent error: %s", exc)
+            print(style(f"  ✖ the agent raised an error: {exc}", C.RED))
+            _reload_state(app, session)
+            return
+
+    _finish_turn(session, start)
+
+
+# --------------------------------------------------------------------------- #
+# Async REPL
+# --------------------------------------------------------------------------- #
+async def aread_user_input(prompt: str) -> str:
+    """Async :func:`read_user_input` — the event loop keeps running while waiting."""
+    if _input_session is not None:
+        from prompt_toolkit.formatted_text import ANSI
+
+        return (await _input_session.prompt_async(ANSI(prompt))).strip()
+
+    # A daemon thread, not the default executor: a pending input() must not
+    # keep the interpreter alive at exit.
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def read() -> None:
+        try:
+            line = input(prompt).strip()
+        except BaseException as exc:  # noqa: BLE001 — EOFError/KeyboardInterrupt go to the caller
+            loop.call_soon_threadsafe(_settle, future, None, exc)
+        else:
+            loop.call_soon_threadsafe(_settle, future, line, None)
+
+    threading.Thread(target=read, name="chat-input", daemon=True).start()
+    return await future
+
+
+def _settle(future, result, exc) -> None:
+    if future.done():
+        return
+    if exc is not None:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
+
+
+async def arun_turn(app, session: ChatSession, user_input: str) -> None:
+    """Run one turn with ``app.ainvoke``.
+
+    Ctrl-C (or the turn deadline) cancels the turn's token: tool subprocesses
+    are killed, the stream stops, and the turn ends with its partial reply. A
+    turn still running ``CANCEL_GRACE`` seconds later, or a second Ctrl-C,
+    cancels the task outright.
+    """
+    await asyncio.to_thread(wait_for_preload)
+    turn_input = _turn_input(app, session, user_input)
+
+    from core.cancellation import CANCEL_GRACE, turn_scope
+    from core.tracing import tracer
+
+    print(style(rule(), C.GREY))
+    start = time.time()
+    loop = asyncio.get_running_loop()
+    with tracer.span("turn", "turn", session=session.session_id) as span, turn_scope() as token:
+        # Created inside the span so the graph's node spans nest under it.
+        task = asyncio.create_task(app.ainvoke(turn_input, session.config))
+        token.on_cancel(lambda: loop.call_soon_threadsafe(loop.call_later, CANCEL_GRACE, task.cancel))
+
+        def on_sigint() -> None:
+            if token.cancelled:
+                task.cancel()
+            else:
+                token.cancel("interrupted")
+
+        try:
+            loop.add_signal_handler(signal.SIGINT, on_sigint)
+        except (NotImplementedError, RuntimeError):
+            pass  # no signal support on this loop — Ctrl-C falls back to KeyboardInterrupt
+        try:
+            session.state = await task
+            if token.cancelled:
+                _mark(span, "interrupted")
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise  # the REPL itself is being cancelled
+            _mark(span, "interrupted")
+            print(style("\n  ⏹ request interrupted", C.YELLOW))
+            _reload_state(app, session)
+            return
+        except Exception as exc:  # noqa: BLE001 — keep the REPL alive
+            _mark(span, "error")
+            log.error("agent error: %s", exc)
+            print(style(f"  ✖ the agent raised an error: {exc}", C.RED))
+            _reload_state(app, session)
+            return
+        finally:
+            with contextlib.suppress(NotImplementedError, RuntimeError):
+                loop.remove_signal_handler(signal.SIGINT)
+
+    _finish_turn(session, start)
+
+
+async def arepl(app, session: ChatSession, verbose_state: dict) -> None:
+    prompt = style("you ", C.CYAN, C.BOLD) + style("› ", C.CYAN)
+    while True:
+        try:
+            user_input = await aread_user_input(prompt)
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+
+        if not user_input:
+            continue
+
+        if user_input.startswith("/"):
+            if not handle_command(user_input, session, verbose_state):
+                break
+            continue
+
+        await arun_turn(app, session, user_input)
+
+
+def repl(app, session: ChatSession, verbose_state: dict) -> None:
+    prompt = style("you ", C.CYAN, C.BOLD) + style("› ", C.CYAN)
+    while True:
+        try:
+            user_input = read_user_input(prompt)
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+
+        if not user_input:
+            continue
+
+        if user_input.startswith("/"):
+            if not handle_command(user_input, session, verbose_state):
+                break
+            continue
+
+        run_turn(app, session, user_input)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         prog="chat_cli", description="Interactive CLI chat for the zkzkAgent project."
@@ -158,12 +371,47 @@ def main() -> None:
     parser.add_argument(
         "--debug", action="store_true", help="show all logs (DEBUG)",
     )
+    parser.add_argument(
+        "--resume", metavar="SESSION_ID", help="continue a saved session",
+    )
+    parser.add_argument(
+        "--sessions", action="store_true", help="list saved sessions and exit",
+    )
+    parser.add_argument(
+        "--sync", action="store_true",
+        help="use the blocking REPL (app.invoke) instead of the asyncio one",
+    )
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument(
+        "--batch", metavar="FILE", help="run every task in a JSONL file headlessly and exit",
+    )
+    batch.add_argument(
+        "--workers", type=int, default=4, help="tasks run concurrently (default: 4)",
+    )
+    batch.add_argument(
+        "--task-timeout", type=float, default=300, metavar="SECONDS",
+        help="give up on a task after this long (default: 300, 0 = no limit)",
+    )
+    batch.add_argument(
+        "--output", metavar="FILE", help="results JSONL (default: <FILE>.results.jsonl)",
+    )
+    batch.add_argument(
+        "--policy", metavar="FILE",
+        help="YAML policy for dangerous tools (default: deny them all)",
+    )
     args = parser.parse_args()
 
     configure_logging(verbose=args.verbose, debug=args.debug)
     verbose_default = args.verbose or args.debug
     verbose_state = {"on": verbose_default}
 
+    if args.batch:
+        from .batch import main_batch
+
+        app, _ = load_runtime(verbose_default)
+        start_preload()
+        sys.exit(main_batch(app, args))
+
     # Draw the logo first thing — instant, before any heavy import.
     ui.draw_logo()
     ui.print_tagline()
@@ -172,30 +420,27 @@ def main() -> None:
     session = ChatSession(user_id=args.user)
 
     app, model_name = load_runtime(verbose_default)
+    if args.sessions:
+        print_saved_sessions(app)
+        return
+    if args.resume:
+        resume_session(app, session, args.resume)
     ui.print_meta(session, model_name)
     log.info("starting chat for user=%s session=%s", session.user_id, session.session_id)
 
-    warm_up(app, verbose_default)
+    start_preload()
     print()
 
-    prompt = style("you ", C.CYAN, C.BOLD) + style("› ", C.CYAN)
-    while True:
+    if args.sync:
+        repl(app, session, verbose_state)
+    else:
         try:
-            user_input = read_user_input(prompt)
-        except (EOFError, KeyboardInterrupt):
+            asyncio.run(arepl(app, session, verbose_state))
+        except KeyboardInterrupt:
             print()
-            break
-
-        if not user_input:
-            continue
-
-        if user_input.startswith("/"):
-            if not handle_command(user_input, session, verbose_state):
-                break
-            continue
-
-        run_turn(app, session, user_input)
 
+    if app.checkpointer is not None and session.turns:
+        print(style(f"  resume with: ./cli.sh --resume {session.session_id}", C.GREY))
     print(style("  bye", C.MAGENTA))
     log.info("ending session %s after %d turns", session.session_id, session.turns)
 
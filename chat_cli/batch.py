@@ -0,0 +1,210 @@
+"""Headless batch mode: run the agent over a JSONL file of tasks.
+
+    python -m chat_cli --batch tasks.jsonl --workers 4 --task-timeout 300 \\
+        --output results.jsonl --policy batch_policy.yaml
+
+Each line is a task in the same shape as a backlog entry
+(``{"request_id": …, "title": …, "body": …}``; ``id`` / ``prompt`` /
+``input`` work too). Every task runs in its own session (its own thread in
+the checkpointer, so it can be inspected later with ``--resume``). At most
+``--workers`` tasks run at once, each bounded by ``--task-timeout``. A
+dangerous-tool confirmation is answered by the policy (see
+:mod:`core.tool_policy`; without ``--policy`` it is always "no"). One JSON
+line per task is appended to the output as soon as the task finishes, with
+the final message, the tool calls, the policy decisions and timings. The
+nodes' streamed output is captured per task, so it does not interleave on
+the terminal.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import pathlib
+import sys
+import time
+import uuid
+from typing import Iterator, List, Optional, Tuple
+
+from .session import ChatSession
+
+log = logging.getLogger("chat.batch")
+
+MAX_CONFIRMATIONS = 5  # dangerous-tool prompts answered per task before giving up
+
+
+def read_tasks(path: pathlib.Path) -> Iterator[Tuple[str, str]]:
+    """Yield ``(task_id, text)`` for every non-empty line of ``path``."""
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            task_id = str(row.get("request_id") or row.get("id") or f"line-{lineno}")
+            body = row.get("body") or row.get("prompt") or row.get("input") or ""
+            title = row.get("title") or ""
+            text = f"{title}\n\n{body}" if title and body else (body or title)
+            yield task_id, text.strip()
+
+
+def summarize_tools(messages: list) -> List[dict]:
+    from langchain_core.messages import AIMessage, ToolMessage
+
+    calls, by_id = [], {}
+    for message in messages:
+        if isinstance(message, AIMessage):
+            for tc in message.tool_calls or []:
+                row = {"name": tc["name"], "args": tc.get("args", {}), "status": None}
+                calls.append(row)
+                by_id[tc.get("id")] = row
+        elif isinstance(message, ToolMessage) and message.tool_call_id in by_id:
+            by_id[message.tool_call_id]["status"] = message.status
+    return calls
+
+
+def final_message(messages: list) -> str:
+    from langchain_core.messages import AIMessage, HumanMessage
+    from preprocessing.strip_think_tags import strip_think_tags
+
+    for message in reversed(messages):
+        if isinstance(message, (AIMessage, HumanMessage)) and isinstance(message.content, str):
+            text = strip_think_tags(message.content).strip()
+            if text:
+                return text
+    return ""
+
+
+def _node_timings(session_id: str) -> dict:
+    from core.tracing import tracer
+
+    return {
+        f"{row['kind']}:{row['name']}" if row["kind"] == "tool" else row["name"]: {
+            "count": row["count"],
+            "total_ms": round(row["total_ms"], 1),
+            "ttft_p50_ms": row["ttft_p50_ms"],
+        }
+        for row in tracer.summary(session_id)
+    }
+
+
+async def run_task(
+    app, session: ChatSession, task_id: str, text: str, policy, deadline: Optional[float] = None
+) -> dict:
+    """Run one task to completion, answering confirmations from ``policy``.
+
+    Past ``deadline`` the task's token is cancelled: its subprocesses are
+    killed and it ends with status ``timeout`` and whatever it had produced.
+    """
+    from langchain_core.messages import HumanMessage
+
+    from agent_nodes._stream import output_to
+    from core.cancellation import turn_scope
+
+    record = {"request_id": task_id, "session": session.session_id, "confirmations": []}
+    turn_input = {**ChatSession.fresh_state(), "messages": [HumanMessage(content=text)]}
+    started = time.perf_counter()
+    turns = 0
+    # Captured per task: the nodes stream replies as they generate them.
+    with output_to(io.StringIO()), turn_scope(deadline) as token:
+        while True:
+            state = await app.ainvoke(turn_input, session.config)
+            turns += 1
+            pending = state.get("pending_confirmation") or {}
+            tool_name = pending.get("tool_name")
+            if token.cancelled or not tool_name or len(record["confirmations"]) >= MAX_CONFIRMATIONS:
+                break
+            allowed, reason = policy.decide(tool_name, pending.get("tool_args"))
+            record["confirmations"].append(
+                {"tool": tool_name, "args": pending.get("tool_args"), "allowed": allowed, "reason": reason}
+            )
+            log.info("[%s] %s %s by %s", task_id, tool_name, "allowed" if allowed else "denied", reason)
+            if app.checkpointer is None:
+                state["messages"].append(HumanMessage(content="yes" if allowed else "no"))
+                turn_input = {**state, "iteration_count": 0}
+            else:
+                turn_input = {"messages": [HumanMessage(content="yes" if allowed else "no")], "iteration_count": 0}
+
+    messages = state.get("messages", [])
+    record.update({
+        "status": "timeout" if token.cancelled else "ok",
+        "final_message": final_message(messages),
+        "tool_calls": summarize_tools(messages),
+        "timings": {"total_s": round(time.perf_counter() - started, 3), "turns": turns},
+    })
+    return record
+
+
+async def run_batch(
+    app,
+    tasks: List[Tuple[str, str]],
+    output: pathlib.Path,
+    workers: int,
+    timeout: Optional[float],
+    policy,
+) -> int:
+    """Run ``tasks`` with at most ``workers`` in flight; returns the number that failed."""
+    from core.cancellation import CANCEL_GRACE
+
+    semaphore = asyncio.Semaphore(max(1, workers))
+    done = 0
+    failed = 0
+
+    async def one(index: int, task_id: str, text: str) -> None:
+        nonlocal done, failed
+        async with semaphore:
+            # Its own session per task: fresh state and its own checkpoint thread.
+            session = ChatSession(user_id="batch", session_id=f"batch-{task_id}-{uuid.uuid4().hex[:6]}")
+            started = time.perf_counter()
+            try:
+                # The deadline stops the task cooperatively; wait_for is the backstop.
+                record = await asyncio.wait_for(
+                    run_task(app, session, task_id, text, policy, timeout),
+                    timeout + CANCEL_GRACE * 2 if timeout else None,
+                )
+            except asyncio.TimeoutError:
+                record = {"status": "timeout", "error": f"no result after {timeout}s"}
+            except Exception as exc:  # noqa: BLE001 — one bad task must not stop the batch
+                log.exception("task %s failed", task_id)
+                record = {"status": "error", "error": f"{type(exc).__name__}: {exc}"}
+            record = {"request_id": task_id, "index": index, "session": session.session_id, **record}
+            record.setdefault("timings", {"total_s": round(time.perf_counter() - started, 3)})
+            record["timings"]["nodes"] = _node_timings(session.session_id)
+
+            # Single event loop thread: writes never interleave.
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            done += 1
+            failed += record["status"] != "ok"
+            print(
+                f"[{done}/{len(tasks)}] {task_id}  {record['status']}  {record['timings']['total_s']:.1f}s",
+                file=sys.stderr,
+            )
+
+    with open(output, "a", encoding="utf-8") as out:
+        await asyncio.gather(*(one(i, task_id, text) for i, (task_id, text) in enumerate(tasks)))
+    return failed
+
+
+def main_batch(app, args) -> int:
+    """Entry point for ``--batch``; returns the process exit code."""
+    from core.preload import preloader
+    from core.tool_policy import ToolPolicy
+
+    source = pathlib.Path(args.batch)
+    output = pathlib.Path(args.output) if args.output else source.with_name(source.stem + ".results.jsonl")
+    policy = ToolPolicy.load(pathlib.Path(args.policy) if args.policy else None)
+    tasks = list(read_tasks(source))
+    print(
+        f"{len(tasks)} tasks · {args.workers} workers · timeout {args.task_timeout or 'none'}s · "
+        f"dangerous tools: {policy.source} (default {policy.default}) → {output}",
+        file=sys.stderr,
+    )
+    preloader.wait()
+    started = time.perf_counter()
+    failed = asyncio.run(run_batch(app, tasks, output, args.workers, args.task_timeout or None, policy))
+    print(
+        f"done in {time.perf_counter() - started:.1f}s · {len(tasks) - failed} ok · {failed} failed",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
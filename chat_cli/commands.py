@@ -21,6 +21,12 @@ def handle_command(cmd: str, session: ChatSession, verbose_state: dict) -> bool:
         ui.print_history(session)
     elif name == "session":
         ui.print_session_info(session)
+    elif name == "router":
+        ui.print_router_stats()
+    elif name == "models":
+        ui.print_model_report()
+    elif name == "stats":
+        ui.print_trace_stats(session)
     elif name == "verbose":
         verbose_state["on"] = not verbose_state["on"]
         set_verbose(verbose_state["on"])
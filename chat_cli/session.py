@@ -5,9 +5,9 @@ from datetime import datetime
 
 
 class ChatSession:
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, session_id: str = None):
         self.user_id = user_id
-        self.session_id = uuid.uuid4().hex[:12]
+        self.session_id = session_id or uuid.uuid4().hex[:12]
         self.started_at = datetime.now()
         self.turns = 0
         self.state = self.fresh_state()
@@ -29,6 +29,28 @@ class ChatSession:
         self.turns = 0
         self.state = self.fresh_state()
 
+    def turn_input(self, user_input: str, checkpointed: bool) -> dict:
+        """Graph input for one user message (counts the turn)."""
+        from langchain_core.messages import HumanMessage
+
+        message = HumanMessage(content=user_input)
+        if checkpointed:
+            # The checkpointer holds the state — send only what this turn adds.
+            turn_input = {"messages": [message], "iteration_count": 0}
+            if not self.state["messages"]:
+                turn_input = {**self.fresh_state(), **turn_input}
+        else:
+            self.state["messages"].append(message)
+            self.state["iteration_count"] = 0  # reset step counter for the new request
+            turn_input = self.state
+        self.turns += 1
+        return turn_input
+
+    @property
+    def config(self) -> dict:
+        """Graph config — the session id is the checkpointer's thread id."""
+        return {"configurable": {"thread_id": self.session_id}}
+
     @property
     def awaiting_confirmation(self) -> bool:
         pending = self.state.get("pending_confirmation") or {}
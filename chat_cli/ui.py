@@ -185,6 +185,123 @@ def print_session_info(session) -> None:
     print(rule())
 
 
+def print_router_stats() -> None:
+    from agent_nodes._speculation import speculation
+    from agent_nodes.classify_node import get_decision_cache
+
+    cache = get_decision_cache()
+    print(rule("router cache"))
+    if cache is None:
+        print(style("  disabled (ROUTER_CACHE=0)", C.GREY))
+    else:
+        stats = cache.stats()
+        print(f"  {style('entries', C.GREY)}  {stats['entries']}")
+        print(f"  {style('hits', C.GREY)}     {stats['hits']}  ({stats['hit_rate']:.0%})")
+        print(f"  {style('misses', C.GREY)}   {stats['misses']}  ({stats['expired']} expired)")
+        print(f"  {style('llm avg', C.GREY)}  {stats['avg_llm_seconds']:.2f}s")
+        print(f"  {style('saved', C.GREY)}    ~{stats['saved_seconds']:.1f}s")
+
+    from agent_nodes.conversation_node import get_response_cache
+
+    responses = get_response_cache()
+    print(rule("response cache"))
+    if responses is None:
+        print(style("  disabled (RESPONSE_CACHE=0)", C.GREY))
+    else:
+        stats = responses.stats()
+        mode = "exact + semantic" if stats["semantic"] else "exact"
+        print(f"  {style('entries', C.GREY)}  {stats['entries']}  ({mode})")
+        print(
+            f"  {style('hits', C.GREY)}     {stats['hits']}  ({stats['hit_rate']:.0%}, "
+            f"{stats['semantic_hits']} semantic)"
+        )
+        print(f"  {style('misses', C.GREY)}   {stats['misses']}  ({stats['expired']} expired)")
+
+    spec = speculation.stats()
+    print(rule("speculation"))
+    if not spec["enabled"]:
+        print(style("  disabled (ROUTER_SPECULATIVE=0)", C.GREY))
+    else:
+        print(f"  {style('started', C.GREY)}    {spec['started']}")
+        print(f"  {style('used', C.GREY)}       {spec['used']}  ({spec['hit_rate']:.0%})")
+        print(f"  {style('discarded', C.GREY)}  {spec['discarded']} router disagreed · {spec['mismatched']} input changed")
+    print(rule())
+
+
+def _mib(size) -> str:
+    return f"{size / 2**20:,.0f} MiB" if size else "—"
+
+
+def print_model_report() -> None:
+    from models.registry import model_registry
+
+    print(rule("models"))
+    for row in model_registry.report():
+        state = style("loaded", C.GREEN) if row["loaded"] else style("not loaded", C.GREY)
+        print(f"  {style(row['model'], C.BOLD)}  {state}  {style(', '.join(row['nodes']), C.GREY)}")
+        if row["loaded"]:
+            print(f"    {style('memory', C.GREY)}   {_mib(row['size'])} total · {_mib(row['size_vram'])} VRAM")
+        if row.get("calls"):
+            print(
+                f"    {style('speed', C.GREY)}    {row['tokens_per_s']:.1f} tok/s generate · "
+                f"{row['prompt_tokens_per_s']:.0f} tok/s prompt · {row['calls']} calls"
+            )
+        if row.get("preload_s") is not None:
+            print(f"    {style('preload', C.GREY)}  {row['preload_s']:.1f}s")
+
+    pool = model_registry.pool
+    if pool.size > 1:
+        stats = pool.stats()
+        print(rule("endpoints"))
+        for e in stats["endpoints"]:
+            state = style("up", C.GREEN) if e["healthy"] else style("down", C.RED)
+            print(
+                f"  {style(e['url'], C.BOLD)}  {state}  {e['in_flight']} in flight · "
+                f"{e['latency_s'] * 1000:.0f}ms · {e['requests']} requests · {e['failures']} failed"
+            )
+        print(style(f"  {stats['pinned_sessions']} pinned sessions · {stats['failovers']} failovers", C.GREY))
+    print(rule())
+
+
+def _ms(value) -> str:
+    if value is None:
+        return "—"
+    return f"{value / 1000:.2f}s" if value >= 1000 else f"{value:.0f}ms"
+
+
+def print_trace_stats(session) -> None:
+    from core.tracing import tracer
+
+    print(rule("stats"))
+    if not tracer.enabled:
+        print(style("  disabled (TRACING=0)", C.GREY))
+        print(rule())
+        return
+    rows = tracer.summary(session.session_id)
+    if not rows:
+        print(style("  no turns traced in this session yet", C.GREY))
+        print(rule())
+        return
+
+    print(style(f"  {'span':<22}{'n':>4}{'p50':>9}{'p95':>9}{'ttft p50':>10}{'ttft p95':>10}{'tok/s':>7}", C.GREY))
+    for row in rows:
+        label = row["name"] if row["kind"] != "tool" else f"tool {row['name']}"
+        speed = f"{row['tokens_per_s_p50']:.1f}" if row["tokens_per_s_p50"] else "—"
+        line = (
+            f"  {label:<22}{row['count']:>4}{_ms(row['p50_ms']):>9}{_ms(row['p95_ms']):>9}"
+            f"{_ms(row['ttft_p50_ms']):>10}{_ms(row['ttft_p95_ms']):>10}{speed:>7}"
+        )
+        print(style(line, C.BOLD) if row["kind"] == "turn" else line)
+        if row["eval_count"] or row["prompt_eval_count"]:
+            print(style(
+                f"  {'':<22}    {row['prompt_eval_count']:,} prompt-eval · {row['eval_count']:,} generated tokens",
+                C.GREY,
+            ))
+        if row["errors"]:
+            print(style(f"  {'':<22}    {row['errors']} failed", C.YELLOW))
+    print(rule())
+
+
 HELP_TEXT = f"""
 {style('commands', C.BOLD)}
   {style('/help', C.CYAN)}      show this help
@@ -192,6 +309,9 @@ HELP_TEXT = f"""
   {style('/history', C.CYAN)}   print the conversation history
   {style('/verbose', C.CYAN)}   toggle internal agent logs
   {style('/session', C.CYAN)}   show user / session info
+  {style('/router', C.CYAN)}    show router/response cache and speculation stats
+  {style('/models', C.CYAN)}    show per-node models, memory use and tokens/s
+  {style('/stats', C.CYAN)}     show p50/p95 latency, TTFT and tokens/s per node and tool
   {style('/exit', C.CYAN)}      quit (also: /quit, Ctrl-D, Ctrl-C)
 
 {style('tip', C.GREY)} use ↑ / ↓ to recall previous messages
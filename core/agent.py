@@ -1,16 +1,22 @@
 import logging, pathlib, re
 from typing import Literal
 from models.LLM import llm
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END, START
 from langgraph.prebuilt import ToolNode
 
 from core.state import AgentState
 from core.tools import __all__ as tool_functions
-from agent_nodes.classify_node import classify_node
-from agent_nodes.plan_node import plan_node
-from agent_nodes.conversation_node import conversation_node
-from agent_nodes.execute_node import execute_node
+from core.tool_output_store import tool_output_store
+from core.tool_selection import widen_tool_scope
+from core.tracing import tracer
+from core.cancellation import is_cancelled
+from agent_nodes._speculation import speculation
+from agent_nodes.classify_node import classify_node, aclassify_node
+from agent_nodes.plan_node import plan_node, aplan_node
+from agent_nodes.conversation_node import conversation_node, aconversation_node
+from agent_nodes.execute_node import execute_node, aexecute_node
 
 base_path = pathlib.Path(__file__).parent.parent
 logger = logging.getLogger(__name__)
@@ -92,6 +98,10 @@ def should_continue(state: AgentState) -> Literal["tools", "__end__", "call_mode
     if pending_confirmation and pending_confirmation.get("tool_name"):
         return "__end__"
 
+    if is_cancelled():
+        logger.info("[AGENT] Turn cancelled — stopping.")
+        return "__end__"
+
     # Stop if we've exceeded max iterations
     if iteration_count >= MAX_ITERATIONS:
         logger.warning(f"[AGENT] Max iterations ({MAX_ITERATIONS}) reached — forcing stop.")
@@ -103,24 +113,92 @@ def should_continue(state: AgentState) -> Literal["tools", "__end__", "call_mode
     return "__end__"
 
 
-_tool_node = ToolNode(tools=tool_functions)
+def _trace_tool_call(request, execute):
+    with tracer.span("tool", request.tool_call["name"]) as span:
+        result = execute(request)
+        if span is not None and isinstance(result, ToolMessage):
+            span.attrs["status"] = result.status
+        return result
 
-def tool_node_with_counter(state: AgentState) -> dict:
-    """Run tools and increment the iteration counter."""
-    result = _tool_node.invoke(state)
-    return {
+
+async def _atrace_tool_call(request, execute):
+    with tracer.span("tool", request.tool_call["name"]) as span:
+        result = await execute(request)
+        if span is not None and isinstance(result, ToolMessage):
+            span.attrs["status"] = result.status
+        return result
+
+
+_tool_node = ToolNode(
+    tools=tool_functions, wrap_tool_call=_trace_tool_call, awrap_tool_call=_atrace_tool_call
+)
+
+def _after_tools(state: AgentState, result: dict) -> dict:
+    """Spill oversized outputs and increment the iteration counter."""
+    messages = []
+    spilled = False
+    for message in result.get("messages", []):
+        preview = None
+        if isinstance(message, ToolMessage) and message.name != "read_tool_output":
+            preview = tool_output_store.maybe_spill(message.content, message.name or "")
+        if preview is not None:
+            message = message.model_copy(update={"content": preview})
+            spilled = True
+        messages.append(message)
+
+    update = {
         **result,
+        "messages": messages,
         "iteration_count": state.get("iteration_count", 0) + 1,
     }
+    if spilled:
+        # Make sure the paging tool is bound on the next executor call.
+        update["tool_scope"] = widen_tool_scope(
+            state.get("tool_scope"), [{"name": "read_tool_output"}]
+        )
+    return update
+
+
+def tool_node_with_counter(state: AgentState) -> dict:
+    """Run tools, spill oversized outputs, and increment the iteration counter."""
+    return _after_tools(state, _tool_node.invoke(state))
+
+
+async def atool_node_with_counter(state: AgentState) -> dict:
+    """Async tools node — independent tool calls run concurrently."""
+    return _after_tools(state, await _tool_node.ainvoke(state))
+
+
+def _node(name, func, afunc):
+    """A graph node with a sync body for invoke() and an async one for ainvoke(),
+    each traced as a span. Once the turn is cancelled, nodes no longer run, so
+    the graph falls through to END with what it has (and drops a speculation
+    nobody will claim)."""
+
+    def run(state):
+        if is_cancelled():
+            speculation.drop(state)
+            return {}
+        with tracer.span("node", name, iteration=state.get("iteration_count", 0)):
+            return func(state)
+
+    async def arun(state):
+        if is_cancelled():
+            speculation.drop(state)
+            return {}
+        with tracer.span("node", name, iteration=state.get("iteration_count", 0)):
+            return await afunc(state)
+
+    return RunnableLambda(run, afunc=arun, name=func.__name__)
 
 
 graph = StateGraph(AgentState)
 
-graph.add_node("classify", classify_node)
-graph.add_node("plan", plan_node)
-graph.add_node("conversational", conversation_node)
-graph.add_node("execute", execute_node)
-graph.add_node("tools", tool_node_with_counter)
+graph.add_node("classify", _node("classify", classify_node, aclassify_node))
+graph.add_node("plan", _node("plan", plan_node, aplan_node))
+graph.add_node("conversational", _node("conversational", conversation_node, aconversation_node))
+graph.add_node("execute", _node("execute", execute_node, aexecute_node))
+graph.add_node("tools", _node("tools", tool_node_with_counter, atool_node_with_counter))
 
 graph.add_conditional_edges(
     START,
@@ -153,7 +231,19 @@ graph.add_conditional_edges(
 graph.add_edge("tools", "execute")
 graph.add_edge("conversational", END)
 
-app = graph.compile()
+
+def compile_app(checkpointer=None):
+    """Compile the graph, optionally persisting state per ``thread_id``.
+
+    With a checkpointer, callers pass ``config={"configurable": {"thread_id": …}}``
+    and only the new input (e.g. the user's message) on each invoke. Every node
+    has an async body too, so ``ainvoke``/``astream`` never block the event loop
+    on the LLM or on tools.
+    """
+    return graph.compile(checkpointer=checkpointer)
+
+
+app = compile_app()
 
 if __name__ == "__main__":
     from IPython.display import Image
@@ -0,0 +1,169 @@
+"""Turn-scoped cancellation and deadlines.
+
+Each turn runs inside :func:`turn_scope`, which puts a :class:`CancelToken`
+in a contextvar, so graph nodes, streams and tools (in worker threads too)
+all see the token of the turn they belong to. The token is cancelled by
+Ctrl-C, by a client going away, or by its own timer when the turn's
+deadline (``TURN_DEADLINE`` seconds, 0 = none) passes. Cancelling it:
+
+* kills the process group of every subprocess a tool registered with
+  :func:`cancellable_process` (SIGTERM, then SIGKILL after ``CANCEL_GRACE``);
+* stops the LLM stream at the next chunk, or at once for async streams. The
+  stream is closed, which drops the HTTP connection so Ollama stops
+  generating. The text received so far is kept as the reply;
+* makes the remaining nodes of the turn no-ops, so the graph ends and the
+  turn returns what it has instead of raising.
+
+Nothing here raises on its own; code checks :func:`is_cancelled` (or
+:meth:`CancelToken.check`) at the points where stopping is safe.
+"""
+
+import contextvars
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TURN_DEADLINE = float(os.getenv("TURN_DEADLINE", "0"))  # seconds per turn, 0 = no deadline
+CANCEL_GRACE = float(os.getenv("CANCEL_GRACE", "2"))  # SIGTERM → SIGKILL, cooperative → hard cancel
+
+_current: contextvars.ContextVar[Optional["CancelToken"]] = contextvars.ContextVar("zkzk_cancel", default=None)
+
+
+class TurnCancelled(Exception):
+    """Raised by :meth:`CancelToken.check` once the turn is cancelled."""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with an optional deadline and callbacks."""
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.reason: Optional[str] = None
+        self.deadline = time.monotonic() + deadline if deadline else None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._ids = 0
+        self._timer = None
+        if deadline:
+            self._timer = threading.Timer(deadline, self.cancel, ("deadline",))
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (never negative), or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        logger.info(f"[CANCEL] Turn cancelled: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:  # noqa: BLE001 — one failing callback must not stop the rest
+                logger.warning(f"[CANCEL] Callback failed: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run ``callback`` when the token is cancelled (now, if it already is).
+
+        Returns a function that unregisters it.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._ids += 1
+                key = self._ids
+                self._callbacks[key] = callback
+                return lambda: self._callbacks.pop(key, None)
+        callback()
+        return lambda: None
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise TurnCancelled(self.reason)
+
+    def close(self) -> None:
+        """End of the turn: stop the deadline timer and drop callbacks."""
+        if self._timer is not None:
+            self._timer.cancel()
+        with self._lock:
+            self._callbacks.clear()
+
+
+def current_token() -> Optional[CancelToken]:
+    return _current.get()
+
+
+def is_cancelled() -> bool:
+    token = _current.get()
+    return token is not None and token.cancelled
+
+
+@contextmanager
+def turn_scope(deadline: Optional[float] = TURN_DEADLINE, token: Optional[CancelToken] = None):
+    """Run the block as one turn with its own token (yielded)."""
+    token = token or CancelToken(deadline)
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+        token.close()
+
+
+def kill_process_group(pid: int, grace: float = CANCEL_GRACE) -> None:
+    """SIGTERM the process group led by ``pid``; SIGKILL it if still there after ``grace``."""
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+
+    def force() -> None:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    timer = threading.Timer(grace, force)
+    timer.daemon = True
+    timer.start()
+
+
+@contextmanager
+def cancellable_process(pid: int):
+    """Kill ``pid``'s process group if the current turn is cancelled inside the block.
+
+    The process must lead its own group (``start_new_session=True``, or a
+    pexpect child, which gets its own session).
+    """
+    token = _current.get()
+    if token is None:
+        yield
+        return
+    unregister = token.on_cancel(lambda: kill_process_group(pid))
+    try:
+        yield
+    finally:
+        unregister()
+
+
+def cancelled_note() -> str:
+    """Suffix for a tool result cut short by cancellation."""
+    token = _current.get()
+    return f"[CANCELLED] stopped early ({token.reason if token else 'cancelled'})"
@@ -0,0 +1,419 @@
+"""SQLite checkpointer for the agent graph.
+
+Chat sessions used to live only in memory, and every turn handed the whole
+state dict back to ``app.invoke``. With this saver the graph keeps its own
+state per ``thread_id`` (the chat session id) in a local WAL-mode SQLite file,
+so a turn only passes the new message and a session can be resumed later.
+
+The message history dominates the state and is append-only, so it is not
+stored inside each checkpoint. Messages go to their own table, one compact
+JSON row per message, and a checkpoint records only how many of them it
+covers. Saving a checkpoint writes the messages added since the previous one
+(usually one or two), never the whole history. A loaded thread's messages are
+kept in memory, so the next turn does not read them back either.
+
+Trade-off: old checkpoints share the thread's single message log. If a later
+step rewrites an earlier message (``add_messages`` replacing by id), older
+checkpoints see the rewritten version. The agent never time-travels, so only
+the latest checkpoint per thread has to be exact, and old ones are pruned
+down to ``CHECKPOINT_KEEP``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_serializable_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from core.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS", "1").strip() not in ("0", "false", "no")
+CHECKPOINT_KEEP = int(os.getenv("CHECKPOINT_KEEP", "20"))
+
+MESSAGES_CHANNEL = "messages"
+
+
+def _compact(value: Any) -> Any:
+    """Drop None / empty fields — most of a serialized message is defaults."""
+    if isinstance(value, dict):
+        return {
+            k: _compact(v) for k, v in value.items()
+            if k == "content" or v not in (None, {}, [], "")
+        }
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+
+def dump_message(message) -> str:
+    return json.dumps(_compact(message_to_dict(message)), separators=(",", ":"), ensure_ascii=False)
+
+
+def load_messages(rows: Sequence[str]) -> list:
+    return messages_from_dict([json.loads(r) for r in rows])
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[int]):
+    def __init__(self, path=None, keep: int = CHECKPOINT_KEEP):
+        super().__init__()
+        self.path = path or data_path("sessions.sqlite")
+        self.keep = keep
+        self._lock = threading.RLock()
+        # thread_id -> (message ids, message objects) mirroring the messages table
+        self._threads: Dict[str, Tuple[List[str], list]] = {}
+        self.messages_written = 0
+        self.checkpoints_written = 0
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id     TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_id     TEXT,
+                type          TEXT,
+                checkpoint    BLOB NOT NULL,
+                metadata      TEXT,
+                msg_count     INTEGER,
+                created       REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                thread_id TEXT NOT NULL,
+                seq       INTEGER NOT NULL,
+                msg_id    TEXT,
+                data      TEXT NOT NULL,
+                PRIMARY KEY (thread_id, seq)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id     TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id       TEXT NOT NULL,
+                idx           INTEGER NOT NULL,
+                channel       TEXT NOT NULL,
+                type          TEXT,
+                value         BLOB,
+                task_path     TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+
+    # ------------------------------------------------------------------ #
+    # Message log
+    # ------------------------------------------------------------------ #
+    def _thread_messages(self, thread_id: str) -> Tuple[List[str], list]:
+        cached = self._threads.get(thread_id)
+        if cached is None:
+            rows = self._conn.execute(
+                "SELECT msg_id, data FROM messages WHERE thread_id = ? ORDER BY seq",
+                (thread_id,),
+            ).fetchall()
+            cached = ([r[0] for r in rows], load_messages([r[1] for r in rows]))
+            self._threads[thread_id] = cached
+        return cached
+
+    def _sync_messages(self, thread_id: str, messages: list) -> None:
+        """Bring the stored log in line with ``messages``, writing only what changed."""
+        ids, objects = self._thread_messages(thread_id)
+        new_ids = [m.id for m in messages]
+        same = 0
+        for old, new in zip(ids, new_ids):
+            if old is None or old != new:
+                break
+            same += 1
+        if same == len(ids) == len(new_ids):
+            return
+        if same < len(ids):
+            logger.debug(f"[CHECKPOINT] {thread_id}: rewriting messages from #{same}")
+            self._conn.execute(
+                "DELETE FROM messages WHERE thread_id = ? AND seq >= ?", (thread_id, same)
+            )
+        self._conn.executemany(
+            "INSERT INTO messages (thread_id, seq, msg_id, data) VALUES (?, ?, ?, ?)",
+            [(thread_id, same + i, m.id, dump_message(m)) for i, m in enumerate(messages[same:])],
+        )
+        self.messages_written += len(messages) - same
+        self._threads[thread_id] = (new_ids, list(messages))
+
+    # ------------------------------------------------------------------ #
+    # BaseCheckpointSaver
+    # ------------------------------------------------------------------ #
+    def _row_to_tuple(self, thread_id: str, ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, blob, metadata, msg_count = row
+        checkpoint = self.serde.loads_typed((type_, blob))
+        if msg_count is not None:
+            _, objects = self._thread_messages(thread_id)
+            checkpoint["channel_values"][MESSAGES_CHANNEL] = objects[:msg_count]
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[4], w[0], w[5]))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=json.loads(metadata) if metadata else {},
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for task_id, channel, type_, value, _, _ in writes
+            ],
+        )
+
+    _COLUMNS = "checkpoint_id, parent_id, type, checkpoint, metadata, msg_count"
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._lock:
+            if checkpoint_id:
+                row = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, ns),
+                ).fetchone()
+            return self._row_to_tuple(thread_id, ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = f"SELECT thread_id, checkpoint_ns, {self._COLUMNS} FROM checkpoints WHERE 1=1"
+        params: list = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            ns = config["configurable"].get("checkpoint_ns")
+            if ns is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        count = 0
+        for thread_id, ns, *row in rows:
+            with self._lock:
+                item = self._row_to_tuple(thread_id, ns, row)
+            if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            yield item
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+
+        values = dict(checkpoint["channel_values"])
+        messages = values.pop(MESSAGES_CHANNEL, None) if ns == "" else None
+        type_, blob = self.serde.dumps_typed({**checkpoint, "channel_values": values})
+        meta = json.dumps(get_serializable_checkpoint_metadata(config, metadata), default=str)
+
+        with self._lock, self._conn:
+            msg_count = None
+            if messages is not None:
+                self._sync_messages(thread_id, list(messages))
+                msg_count = len(messages)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_id, type, checkpoint, metadata, msg_count, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, ns, checkpoint["id"], parent_id, type_, blob, meta,
+                 msg_count, time.time()),
+            )
+            self.checkpoints_written += 1
+            self._prune(thread_id, ns)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def _prune(self, thread_id: str, ns: str) -> None:
+        if self.keep <= 0:
+            return
+        row = self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (thread_id, ns, self.keep - 1),
+        ).fetchone()
+        if row is None:
+            return
+        for table in ("checkpoints", "writes"):
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                (thread_id, ns, row[0]),
+            )
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        special = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, ns, checkpoint_id, task_id,
+                         WRITES_IDX_MAP.get(channel, idx), channel, type_, blob, task_path))
+        verb = "INSERT OR REPLACE" if special else "INSERT OR IGNORE"
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                "channel, type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self._conn:
+            for table in ("checkpoints", "messages", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._threads.pop(thread_id, None)
+
+    def forget(self, thread_id: str) -> None:
+        """Drop the thread's in-memory message mirror (it stays on disk and reloads on use)."""
+        with self._lock:
+            self._threads.pop(thread_id, None)
+
+    # The server runs every turn through ainvoke on one shared event loop, so
+    # the async API hands the SQLite work to a worker thread instead of
+    # blocking every other session's turn while it commits.
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # ------------------------------------------------------------------ #
+    # Sessions
+    # ------------------------------------------------------------------ #
+    def has_thread(self, thread_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM checkpoints WHERE thread_id = ? LIMIT 1", (thread_id,)
+            ).fetchone()
+        return row is not None
+
+    def threads(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recently updated sessions, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.thread_id, MAX(c.created), "
+                "(SELECT COUNT(*) FROM messages m WHERE m.thread_id = c.thread_id) "
+                "FROM checkpoints c WHERE c.checkpoint_ns = '' "
+                "GROUP BY c.thread_id ORDER BY MAX(c.created) DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [{"thread_id": t, "updated": u, "messages": n} for t, u, n in rows]
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "checkpoints_written": self.checkpoints_written,
+            "messages_written": self.messages_written,
+            "threads_loaded": len(self._threads),
+        }
+
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional[SQLiteCheckpointer]:
+    """Process-wide saver, or None when CHECKPOINTS=0."""
+    global _checkpointer
+    if not CHECKPOINTS_ENABLED:
+        return None
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = SQLiteCheckpointer()
+    return _checkpointer
@@ -0,0 +1,153 @@
+"""Prefix-stable context assembly for the Ollama-backed nodes.
+
+Ollama can only reuse its KV cache when the new prompt starts with exactly
+the tokens of the previous one. Every node input is therefore laid out as
+
+    [system prompt (+ tool schemas bound on the chain), *history]
+
+where history is the append-only message list from the graph state — nothing
+transient is ever inserted in the middle. ``ContextAssembler.record`` checks
+that invariant after each call and reports how many prompt tokens Ollama had
+to prefill versus how many it could reuse (``prompt_eval_count`` in the
+response metadata only counts the tokens it actually evaluated). The prompt
+size is estimated from the messages plus the tool schemas bound on the chain,
+which Ollama renders into the prompt too.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token for the Qwen/Llama tokenizers on English + code.
+CHARS_PER_TOKEN = 4
+# Per-message template overhead (role markers, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(message) -> int:
+    content = getattr(message, "content", message)
+    if not isinstance(content, str):
+        content = str(content)
+    tool_calls = getattr(message, "tool_calls", None)
+    extra = len(repr(tool_calls)) if tool_calls else 0
+    return (len(content) + extra) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_tool_tokens(chain) -> int:
+    """Estimated prompt tokens of the tool schemas bound on ``chain`` (0 without tools)."""
+    tools = (getattr(chain, "kwargs", None) or {}).get("tools")
+    if not tools:
+        return 0
+    return len(json.dumps(tools, default=str)) // CHARS_PER_TOKEN
+
+
+def _message_key(message) -> str:
+    digest = hashlib.sha1(type(message).__name__.encode())
+    digest.update(repr(getattr(message, "content", message)).encode())
+    digest.update(repr(getattr(message, "tool_calls", None)).encode())
+    return digest.hexdigest()
+
+
+class ContextAssembler:
+    """Builds a node's LLM input and tracks KV-cache reuse between its calls."""
+
+    MAX_SESSIONS = 64
+
+    def __init__(self, node: str):
+        self.node = node
+        self._last = OrderedDict()  # session key -> message keys of the previous call
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.prefill_tokens = 0
+        self.reused_tokens = 0
+        self.prefix_breaks = 0
+        self.prompt_eval_ms = 0.0
+
+    @staticmethod
+    def assemble(system_message, history) -> list:
+        return [system_message, *history]
+
+    @staticmethod
+    def _session_key(messages) -> str:
+        # The first history message (after the system prompt) never changes for a session.
+        first = messages[1] if len(messages) > 1 else messages[0]
+        return getattr(first, "id", None) or _message_key(first)
+
+    def record(self, messages, response, chain=None) -> dict:
+        """Compare with the previous call and log prefill vs reused prompt tokens.
+
+        ``chain`` is the runnable that made the call; its bound tool schemas
+        count towards the prompt.
+        """
+        keys = [_message_key(m) for m in messages]
+        session = self._session_key(messages)
+        with self._lock:
+            previous = self._last.pop(session, None)
+            self._last[session] = keys
+            while len(self._last) > self.MAX_SESSIONS:
+                self._last.popitem(last=False)
+
+        shared = 0
+        if previous:
+            for old, new in zip(previous, keys):
+                if old != new:
+                    break
+                shared += 1
+        prefix_stable = previous is None or shared == len(previous)
+
+        tool_est = estimate_tool_tokens(chain)
+        prompt_est = tool_est + sum(estimate_tokens(m) for m in messages)
+        stable_est = (tool_est if shared else 0) + sum(estimate_tokens(m) for m in messages[:shared])
+        metadata = getattr(response, "response_metadata", None) or {}
+        prefill = metadata.get("prompt_eval_count")
+        eval_ms = (metadata.get("prompt_eval_duration") or 0) / 1e6
+        reused = max(0, prompt_est - prefill) if prefill is not None else stable_est
+
+        report = {
+            "node": self.node,
+            "messages": len(messages),
+            "prompt_tokens_est": prompt_est,
+            "tool_tokens_est": tool_est,
+            "stable_prefix_tokens_est": stable_est,
+            "prefill_tokens": prefill,
+            "reused_tokens_est": reused,
+            "prompt_eval_ms": eval_ms,
+            "prefix_stable": prefix_stable,
+        }
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_est
+            self.prefill_tokens += prefill or 0
+            self.reused_tokens += reused
+            self.prompt_eval_ms += eval_ms
+            if not prefix_stable:
+                self.prefix_breaks += 1
+
+        if not prefix_stable:
+            logger.warning(
+                f"[CONTEXT] {self.node}: prefix changed at message {shared}/{len(previous)} "
+                "— Ollama has to re-evaluate the rest of the prompt"
+            )
+        logger.info(
+            f"[CONTEXT] {self.node}: ~{prompt_est} prompt tokens, "
+            f"prefill {prefill if prefill is not None else '?'}, reused ~{reused} "
+            f"({reused / prompt_est:.0%}), prompt eval {eval_ms:.0f}ms"
+        )
+        return report
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens_est": self.prompt_tokens,
+                "prefill_tokens": self.prefill_tokens,
+                "reused_tokens_est": self.reused_tokens,
+                "reuse_rate": self.reused_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+                "prefix_breaks": self.prefix_breaks,
+                "prompt_eval_ms": self.prompt_eval_ms,
+            }
@@ -0,0 +1,414 @@
+"""Persistent filename index behind ``find_file`` and ``find_folder``.
+
+``find ~/ -name …`` walks the whole home directory on every call, which takes
+tens of seconds once it holds millions of files. :func:`get_file_index` keeps every
+path under ``FS_INDEX_ROOTS`` in a SQLite file (``$ZKZK_DATA_DIR/fs_index.sqlite``)
+and answers the same ``-name`` globs from it in milliseconds:
+
+* names go into an FTS5 trigram table, so ``*report*`` and ``*.pdf`` are index
+  lookups rather than scans (an exact name uses a plain index; SQLite builds
+  without FTS5 fall back to scanning the name column);
+* a daemon thread builds the index once, then rescans every
+  ``FS_INDEX_RESCAN`` seconds. A rescan stats each known directory and
+  re-lists only those whose mtime changed, so it costs a ``stat`` per
+  directory instead of a full walk;
+* a search falls back to a live walk (the caller's job — :meth:`search`
+  returns None) when the path is outside the indexed roots or under an
+  excluded name, when the last finished scan is older than
+  ``FS_INDEX_MAX_AGE``, and when the index has no match (a file created since
+  the last rescan is still found). Hits deleted since the last rescan are
+  dropped (``os.path.lexists``) and trigger an early rescan.
+
+Like ``find``, symlinks are listed but not followed. Directories that cannot be
+read are skipped. Directories the live walk prunes (``FS_WALK_PRUNE``:
+``.git``, ``node_modules``, virtual envs, ``/proc`` …) are listed but not
+entered here either, so both answer the same searches; a search below one
+walks it. Changing the prune or exclude lists rebuilds the index.
+"""
+
+import fnmatch
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from core.fs_walk import PRUNE
+from core.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+INDEX_ENABLED = os.getenv("FS_INDEX", "1").strip() not in ("0", "false", "no")
+INDEX_ROOTS = [r.strip() for r in os.getenv("FS_INDEX_ROOTS", "~").split(",") if r.strip()]
+INDEX_EXCLUDE = [e.strip() for e in os.getenv("FS_INDEX_EXCLUDE", "").split(",") if e.strip()]
+RESCAN_INTERVAL = float(os.getenv("FS_INDEX_RESCAN", "300"))
+MAX_AGE = float(os.getenv("FS_INDEX_MAX_AGE", "900"))
+MAX_RESULTS = int(os.getenv("FS_INDEX_MAX_RESULTS", "2000"))
+COMMIT_EVERY = 500  # directories per write transaction
+
+_GLOB_CHARS = set("*?[")
+
+
+class SearchResult(NamedTuple):
+    paths: List[str]
+    truncated: bool
+    age: float  # seconds since the scan the answer comes from
+
+    def note(self) -> str:
+        if self.truncated:
+            return f"[TRUNCATED] first {len(self.paths)} matches from the file index"
+        return ""
+
+
+def _under(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip("/") + "/")
+
+
+def _subtree_bounds(path: str):
+    """``(low, high)`` such that ``low <= p < high`` selects the paths below ``path``."""
+    prefix = path.rstrip("/") + "/"
+    return prefix, prefix[:-1] + "0"  # '0' sorts right after '/'
+
+
+def _longest_literal(pattern: str) -> int:
+    return max((len(run) for run in re.split(r"[*?]|\[[^\]]*\]", pattern)), default=0)
+
+
+def _sqlite_glob(pattern: str) -> str:
+    # find / fnmatch negate a bracket set with '!', SQLite's GLOB with '^'.
+    return pattern.replace("[!", "[^")
+
+
+class FileIndex:
+    def __init__(
+        self,
+        path=None,
+        roots: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        prune: Optional[List[str]] = None,
+        rescan_interval: float = RESCAN_INTERVAL,
+        max_age: float = MAX_AGE,
+    ):
+        self.path = path or data_path("fs_index.sqlite")
+        self.roots = [os.path.realpath(os.path.expanduser(r)) for r in (INDEX_ROOTS if roots is None else roots)]
+        self.exclude = INDEX_EXCLUDE if exclude is None else exclude
+        prune = PRUNE if prune is None else prune
+        self.prune_names = {p for p in prune if not p.startswith("/")}
+        self.prune_paths = {p.rstrip("/") for p in prune if p.startswith("/")}
+        self.rescan_interval = rescan_interval
+        self.max_age = max_age
+
+        self.hits = 0
+        self.fallbacks = 0
+        self.last_scan_seconds: Optional[float] = None
+        self.dirs_relisted = 0
+
+        self._lock = threading.Lock()  # guards the reader connection
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._conn = self._connect()
+        self.fts = self._create_schema(self._conn)
+        self._check_filters()
+
+    # ------------------------------------------------------------------ #
+    # Storage
+    # ------------------------------------------------------------------ #
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> bool:
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                id     INTEGER PRIMARY KEY,
+                path   TEXT NOT NULL UNIQUE,
+                parent TEXT NOT NULL,
+                name   TEXT NOT NULL,
+                is_dir INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent);
+            CREATE INDEX IF NOT EXISTS entries_name ON entries (name);
+            CREATE TABLE IF NOT EXISTS dirs (
+                path     TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS roots (
+                path    TEXT PRIMARY KEY,
+                scanned REAL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key   TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        try:
+            conn.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(
+                    name, content='entries', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+                    INSERT INTO names (rowid, name) VALUES (new.id, new.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+                    INSERT INTO names (names, rowid, name) VALUES ('delete', old.id, old.name);
+                END;
+                """
+            )
+            return True
+        except sqlite3.OperationalError as e:
+            logger.info(f"[FS INDEX] No FTS5 trigram support ({e}); name globs will scan")
+            return False
+
+    def _check_filters(self) -> None:
+        """Drop everything indexed under a different exclude or prune list.
+
+        Rescans only re-list directories whose mtime changed, so a newly
+        pruned ``node_modules`` would otherwise stay in the index for good.
+        """
+        filters = "|".join(
+            [",".join(sorted(self.exclude)), ",".join(sorted(self.prune_names | self.prune_paths))]
+        )
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'filters'").fetchone()
+            if row is not None and row[0] == filters:
+                return
+            if self._conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone() is not None:
+                logger.info("[FS INDEX] Exclude or prune list changed; rebuilding the index")
+                self._conn.executescript(
+                    "DROP TABLE IF EXISTS names; DROP TABLE IF EXISTS entries;"
+                    " DROP TABLE IF EXISTS dirs; DROP TABLE IF EXISTS roots;"
+                )
+                self.fts = self._create_schema(self._conn)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('filters', ?)", (filters,))
+            self._conn.commit()
+
+    # ------------------------------------------------------------------ #
+    # Background scanning
+    # ------------------------------------------------------------------ #
+    def start(self) -> None:
+        """Start the scan thread (idempotent; a no-op with ``FS_INDEX=0``)."""
+        if not INDEX_ENABLED:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="fs-index", daemon=True)
+            self._thread.start()
+
+    def refresh(self) -> None:
+        """Ask the scan thread for a rescan now instead of at the next interval."""
+        self.start()
+        self._wake.set()
+
+    def _run(self) -> None:
+        conn = self._connect()
+        while True:
+            self._wake.clear()
+            for root in self.roots:
+                try:
+                    self.scan(root, conn)
+                except Exception as e:  # noqa: BLE001 — keep the thread alive for the next round
+                    logger.warning(f"[FS INDEX] Scan of {root} failed: {e}")
+            self._wake.wait(self.rescan_interval)
+
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.exclude)
+
+    def _pruned(self, path: str) -> bool:
+        return os.path.basename(path) in self.prune_names or path in self.prune_paths
+
+    def scan(self, root: str, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Bring ``root``'s subtree up to date; returns the directories re-listed."""
+        conn = conn or self._conn
+        started = time.perf_counter()
+        known: Dict[str, int] = dict(
+            conn.execute(
+                "SELECT path, mtime_ns FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                (root, *_subtree_bounds(root)),
+            )
+        )
+        relisted = visited = 0
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            visited += 1
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime is not None and known.get(directory) == mtime:
+                stack.extend(
+                    p for (p,) in conn.execute(
+                        "SELECT path FROM entries WHERE parent = ? AND is_dir = 1", (directory,)
+                    )
+                    if not self._pruned(p)
+                )
+                continue
+            stack.extend(self._relist(conn, directory, mtime))
+            relisted += 1
+            if relisted % COMMIT_EVERY == 0:
+                conn.commit()
+        conn.execute("INSERT OR REPLACE INTO roots (path, scanned) VALUES (?, ?)", (root, time.time()))
+        conn.commit()
+        self.last_scan_seconds = time.perf_counter() - started
+        self.dirs_relisted += relisted
+        logger.info(
+            f"[FS INDEX] {root}: {visited} dirs checked, {relisted} re-listed in {self.last_scan_seconds:.1f}s"
+        )
+        return relisted
+
+    def _relist(self, conn: sqlite3.Connection, directory: str, mtime: Optional[int]) -> List[str]:
+        """Sync one directory's children with the disk; returns its subdirectories to visit."""
+        on_disk: Dict[str, bool] = {}
+        if mtime is not None:
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if self._excluded(entry.name):
+                            continue
+                        try:
+                            on_disk[entry.path] = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+            except OSError:
+                mtime = None  # unreadable: drop what we had, remember nothing
+        stored = dict(conn.execute("SELECT path, is_dir FROM entries WHERE parent = ?", (directory,)))
+        for path, is_dir in stored.items():
+            if on_disk.get(path) != bool(is_dir):
+                self._forget(conn, path, bool(is_dir))
+        conn.executemany(
+            "INSERT INTO entries (path, parent, name, is_dir) VALUES (?, ?, ?, ?)",
+            [
+                (path, directory, os.path.basename(path), int(is_dir))
+                for path, is_dir in on_disk.items()
+                if stored.get(path) is None or bool(stored[path]) != is_dir
+            ],
+        )
+        if mtime is None:
+            conn.execute("DELETE FROM dirs WHERE path = ?", (directory,))
+        else:
+            conn.execute("INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)", (directory, mtime))
+        return [path for path, is_dir in on_disk.items() if is_dir and not self._pruned(path)]
+
+    @staticmethod
+    def _forget(conn: sqlite3.Connection, path: str, is_dir: bool) -> None:
+        conn.execute("DELETE FROM entries WHERE path = ?", (path,))
+        if is_dir:
+            low, high = _subtree_bounds(path)
+            conn.execute("DELETE FROM entries WHERE path >= ? AND path < ?", (low, high))
+            conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+
+    # ------------------------------------------------------------------ #
+    # Queries
+    # ------------------------------------------------------------------ #
+    def coverage(self, path: str) -> Optional[float]:
+        """Age in seconds of the scan covering ``path``, or None if no finished scan does."""
+        path = os.path.realpath(path)
+        root = next((r for r in self.roots if _under(path, r)), None)
+        if root is None:
+            return None
+        relative = os.path.relpath(path, root)
+        if relative != "." and any(self._excluded(part) for part in relative.split(os.sep)):
+            return None
+        below = path
+        while below != root:  # a pruned directory's contents are never indexed
+            if self._pruned(below):
+                return None
+            below = os.path.dirname(below)
+        with self._lock:
+            row = self._conn.execute("SELECT scanned FROM roots WHERE path = ?", (root,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return time.time() - row[0]
+
+    def search(
+        self,
+        pattern: str,
+        under: str,
+        dirs_only: bool = False,
+        contains: bool = False,
+        limit: int = MAX_RESULTS,
+    ) -> Optional[SearchResult]:
+        """Paths below ``under`` whose name matches ``pattern`` (a ``find -name`` glob).
+
+        ``contains=True`` matches the pattern as a case-insensitive substring instead.
+        Hits deleted since the last rescan are dropped.
+        Returns None when the index cannot answer (disabled, not covered, stale,
+        or no match) and the caller should walk the disk itself.
+        """
+        if not INDEX_ENABLED:
+            return None
+        self.start()
+        age = self.coverage(under)
+        if age is None or age > self.max_age:
+            if age is not None:
+                self.refresh()
+            self.fallbacks += 1
+            return None
+
+        under = os.path.realpath(under)
+        low, high = _subtree_bounds(under)
+        if contains:
+            # Case-insensitive, like most "name contains" searches.
+            condition, value = "instr(lower(e.name), lower(?)) > 0", pattern
+            if self.fts and not set("%_") & set(pattern):
+                condition, value = "names.name LIKE ?", f"%{pattern}%"
+        elif not _GLOB_CHARS & set(pattern):
+            condition, value = "e.name = ?", pattern
+        elif self.fts and _longest_literal(pattern) >= 3:  # trigrams need three literal characters
+            condition, value = "names.name GLOB ?", _sqlite_glob(pattern)
+        else:
+            condition, value = "e.name GLOB ?", _sqlite_glob(pattern)
+        # CROSS JOIN keeps the FTS lookup as the outer loop; left to itself the
+        # planner walks the path range and runs the FTS query once per row.
+        source = "names CROSS JOIN entries e ON e.id = names.rowid" if condition.startswith("names") else "entries e"
+        sql = (
+            f"SELECT e.path FROM {source} WHERE {condition} AND e.path >= ? AND e.path < ?"
+            + (" AND e.is_dir = 1" if dirs_only else "")
+            + " ORDER BY e.path LIMIT ?"
+        )
+        with self._lock:
+            rows = [p for (p,) in self._conn.execute(sql, (value, low, high, limit + 1))]
+        paths = [p for p in rows if os.path.lexists(p)]
+        if len(paths) < len(rows):
+            self.refresh()  # deleted since the last rescan
+        if not paths:
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return SearchResult(paths[:limit], len(rows) > limit, age)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            roots = dict(self._conn.execute("SELECT path, scanned FROM roots"))
+        return {
+            "enabled": INDEX_ENABLED,
+            "entries": entries,
+            "roots": {r: (round(time.time() - roots[r]) if roots.get(r) else None) for r in self.roots},
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "last_scan_s": self.last_scan_seconds,
+        }
+
+
+_file_index: Optional[FileIndex] = None
+_file_index_lock = threading.Lock()
+
+
+def get_file_index() -> FileIndex:
+    """The shared index, opened on first use so importing the tools touches no disk."""
+    global _file_index
+    if _file_index is None:
+        with _file_index_lock:
+            if _file_index is None:
+                _file_index = FileIndex()
+    return _file_index
@@ -0,0 +1,173 @@
+"""In-process directory walker for live file searches.
+
+When the filename index (:mod:`core.fs_index`) cannot answer, ``find_file``
+and ``find_folder`` used to run ``find`` over the whole tree and return only
+once it had finished. :class:`Walk` searches with ``os.scandir`` instead:
+
+* ``FS_WALK_WORKERS`` threads list directories from a shared queue
+  (``scandir`` releases the GIL while it waits on the disk, so a cold tree is
+  read in parallel);
+* directories named in ``FS_WALK_PRUNE`` (``.git``, ``node_modules``, virtual
+  envs, caches) and the absolute paths listed there (``/proc``, ``/sys``) are
+  still matched but never entered;
+* matches are yielded as soon as a worker finds them, and the walk stops at
+  ``max_results`` matches, at ``max_depth``, when the ``budget`` (seconds, also
+  capped by the turn's deadline) runs out, or when the turn is cancelled.
+
+Names are matched like ``find -name``: a case-sensitive glob on the last path
+component, or with ``contains=True`` a case-insensitive substring of it.
+Symlinks are listed but not followed, and unreadable directories are skipped.
+``python -m bench.walk_benchmark`` compares the walker with ``find`` on a
+generated tree.
+"""
+
+import fnmatch
+import os
+import queue
+import re
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from core.cancellation import current_token
+
+WORKERS = int(os.getenv("FS_WALK_WORKERS", "4"))
+MAX_RESULTS = int(os.getenv("FS_WALK_MAX_RESULTS", "500"))
+DEFAULT_PRUNE = ".git,.hg,.svn,node_modules,venv,.venv,__pycache__,.cache,.Trash,/proc,/sys,/dev,/run"
+PRUNE = [p.strip() for p in os.getenv("FS_WALK_PRUNE", DEFAULT_PRUNE).split(",") if p.strip()]
+
+_DONE = object()
+
+
+class Walk:
+    """One search; iterate it for the matching paths, then read why it stopped.
+
+    ::
+
+        walk = Walk("~/", "*.pdf", max_results=50, budget=10)
+        for path in walk:
+            ...
+        walk.note()  # "" or "[TRUNCATED] …" / "[TIMEOUT] …" / "[CANCELLED] …"
+    """
+
+    def __init__(
+        self,
+        root: str,
+        pattern: str = "*",
+        *,
+        dirs_only: bool = False,
+        contains: bool = False,
+        max_results: Optional[int] = MAX_RESULTS,
+        max_depth: Optional[int] = None,
+        budget: Optional[float] = None,
+        prune: Optional[List[str]] = None,
+        workers: int = WORKERS,
+    ):
+        self.root = os.path.expanduser(root)
+        self.pattern = pattern
+        self.dirs_only = dirs_only
+        self.contains = contains
+        self.max_results = max_results
+        self.max_depth = max_depth
+        self.budget = budget
+        prune = PRUNE if prune is None else prune
+        self.prune_names = {p for p in prune if not p.startswith("/")}
+        self.prune_paths = {p.rstrip("/") for p in prune if p.startswith("/")}
+        self.workers = max(1, workers)
+
+        self.found = 0
+        self.dirs_scanned = 0
+        self.truncated = False
+        self.timed_out = False
+        self.cancelled = False
+        self.seconds = 0.0
+
+    def note(self) -> str:
+        """Why the results may be incomplete ("" when the whole tree was searched)."""
+        if self.cancelled:
+            token = current_token()
+            return f"[CANCELLED] search stopped early ({token.reason if token else 'cancelled'})"
+        if self.timed_out:
+            return f"[TIMEOUT] search stopped after {self.seconds:.0f}s; results may be incomplete"
+        if self.truncated:
+            return f"[TRUNCATED] stopped after the first {self.found} matches"
+        return ""
+
+    def _pruned(self, entry: os.DirEntry) -> bool:
+        return entry.name in self.prune_names or entry.path in self.prune_paths
+
+    def __iter__(self) -> Iterator[str]:
+        started = time.perf_counter()
+        token = current_token()  # worker threads do not inherit the turn's context
+        budget = self.budget
+        if token is not None and token.remaining() is not None:
+            budget = token.remaining() if budget is None else min(budget, token.remaining())
+        deadline = started + budget if budget is not None else None
+
+        if self.contains:
+            needle = self.pattern.lower()
+            matches_name = lambda name: needle in name.lower()  # noqa: E731
+        else:
+            matches_name = re.compile(fnmatch.translate(self.pattern)).match  # fnmatchcase without its per-call overhead
+        directories: "queue.Queue" = queue.Queue()
+        matches: "queue.Queue" = queue.Queue()
+        stop = threading.Event()
+        lock = threading.Lock()
+        pending = [1]  # directories queued or being listed
+
+        def list_directories() -> None:
+            while not stop.is_set():
+                try:
+                    path, depth = directories.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                try:
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            if stop.is_set():
+                                break
+                            try:
+                                is_dir = entry.is_dir(follow_symlinks=False)
+                            except OSError:
+                                is_dir = False
+                            if (is_dir or not self.dirs_only) and matches_name(entry.name):
+                                matches.put(entry.path)
+                            if is_dir and (self.max_depth is None or depth + 1 < self.max_depth) and not self._pruned(entry):
+                                with lock:
+                                    pending[0] += 1
+                                directories.put((entry.path, depth + 1))
+                except OSError:
+                    pass
+                finally:
+                    with lock:
+                        self.dirs_scanned += 1
+                        pending[0] -= 1
+                        if pending[0] == 0:
+                            matches.put(_DONE)
+
+        directories.put((self.root, 0))
+        for i in range(self.workers):
+            threading.Thread(target=list_directories, name=f"fs-walk-{i}", daemon=True).start()
+        try:
+            while True:
+                if token is not None and token.cancelled:
+                    self.cancelled = True
+                    return
+                wait = 0.1 if deadline is None else min(0.1, deadline - time.perf_counter())
+                if wait <= 0:
+                    self.timed_out = True
+                    return
+                try:
+                    path = matches.get(timeout=wait)
+                except queue.Empty:
+                    continue
+                if path is _DONE:
+                    return
+                self.found += 1
+                yield path
+                if self.max_results is not None and self.found >= self.max_results:
+                    self.truncated = True
+                    return
+        finally:
+            stop.set()
+            self.seconds = time.perf_counter() - started
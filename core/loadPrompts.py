@@ -1,17 +1,89 @@
-from langchain_core.prompts import load_prompt
-import os , pathlib , logging
+from langchain_core.prompts.loading import load_prompt_from_config
+from langchain_core.messages import SystemMessage
+import os , pathlib , logging , threading , time , yaml
 
 logger = logging.getLogger(__name__)
 base_path = pathlib.Path(__file__).parent.parent
 
+
 class LoadPrompts:
+    """Process-wide cache of compiled prompts.
+
+    Every instance shares one cache of formatted ``SystemMessage`` lists keyed
+    by prompt file. A prompt is re-read, re-parsed and re-formatted only when
+    its file's mtime changes, so nodes can call ``load_prompt`` on every turn
+    (and pick up edits to ``prompts/*.yaml`` without a restart) for the cost
+    of one ``stat``.
+    """
+
+    _cache = {}  # path -> {"mtime": int, "messages": [...], "timings": {...}, ...}
+    _lock = threading.Lock()
+
     def __init__(self):
         self.base_path = base_path
-    
-    def load_prompt(self, prompt_path):
-        prompt_path = self.base_path / "prompts" / prompt_path
-        prompt = load_prompt(prompt_path)
+
+    def _compile(self, prompt_path: pathlib.Path, mtime: int) -> dict:
+        started = time.perf_counter()
+        with open(prompt_path, "r") as f:
+            config = yaml.safe_load(f)
+        read_done = time.perf_counter()
+        prompt = load_prompt_from_config(config)
+        parse_done = time.perf_counter()
         home = os.path.expanduser("~")
         project_root = self.base_path
         name = ""
-        return prompt.format_prompt(home=home, project_root=project_root, name=name).to_messages()
+        messages = [
+            SystemMessage(content=m.content)
+            for m in prompt.format_prompt(home=home, project_root=project_root, name=name).to_messages()
+        ]
+        format_done = time.perf_counter()
+        return {
+            "mtime": mtime,
+            "messages": messages,
+            "timings": {
+                "read_ms": (read_done - started) * 1000,
+                "parse_ms": (parse_done - read_done) * 1000,
+                "format_ms": (format_done - parse_done) * 1000,
+            },
+        }
+
+    def load_prompt(self, prompt_path):
+        prompt_path = self.base_path / "prompts" / prompt_path
+        mtime = prompt_path.stat().st_mtime_ns
+
+        entry = self._cache.get(prompt_path)
+        if entry is not None and entry["mtime"] == mtime:
+            entry["hits"] += 1
+            return self._copies(entry)
+
+        with self._lock:
+            entry = self._cache.get(prompt_path)
+            if entry is None or entry["mtime"] != mtime:
+                compiled = self._compile(prompt_path, mtime)
+                compiled["hits"] = entry["hits"] if entry else 0
+                compiled["loads"] = (entry["loads"] + 1) if entry else 1
+                self._cache[prompt_path] = compiled
+                entry = compiled
+                timings = compiled["timings"]
+                logger.info(
+                    f"[PROMPTS] {'Reloaded' if compiled['loads'] > 1 else 'Loaded'} {prompt_path.name} — "
+                    f"read {timings['read_ms']:.1f}ms, parse {timings['parse_ms']:.1f}ms, "
+                    f"format {timings['format_ms']:.1f}ms"
+                )
+            else:
+                entry["hits"] += 1
+        return self._copies(entry)
+
+    @staticmethod
+    def _copies(entry: dict) -> list:
+        # Shallow copies — LangGraph's add_messages assigns ids in place, and the
+        # cached objects must never pick one up.
+        return [m.model_copy() for m in entry["messages"]]
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Per-prompt load counts, cache hits and the timings of the last load."""
+        return {
+            path.name: {"loads": e["loads"], "hits": e["hits"], **e["timings"]}
+            for path, e in cls._cache.items()
+        }
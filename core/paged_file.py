@@ -0,0 +1,642 @@
+"""Memory-mapped, paged access to files of any size.
+
+``read_file`` used to ``f.read()`` the whole file, so a multi-gigabyte log went
+into memory and then into the model's context. :class:`PagedFile` maps the
+file instead and serves pages of it (:func:`read_page` formats one for a tool):
+
+* **line pages** — ``lines 20000-20200`` seeks through a sparse newline index
+  (the offset of every ``INDEX_STRIDE``-th line), built once per file with
+  numpy in fixed-size chunks and extended, not rebuilt, when a file grows.
+  A page costs the same whether the file has a thousand lines or a billion;
+* **byte ranges** — any ``offset``/``count``, decoded, or hex-dumped for
+  binary files;
+* **metadata** — size, total line count, encoding, binary or not;
+* **tails** — the last lines, or the last lines matching a regex, found by
+  scanning backwards from the end (:func:`tail_page`), and :class:`Follow`
+  for the lines appended over the next few seconds.
+
+The encoding is sniffed from the first ``SNIFF_BYTES``: a BOM, NUL bytes and
+control characters (binary), then UTF-8 or Latin-1. Pages are capped at
+``max_chars`` and each line at ``MAX_LINE_CHARS``, so one minified line cannot
+flood the context either.
+"""
+
+import codecs
+import hashlib
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.cancellation import current_token, is_cancelled
+
+INDEX_STRIDE = 1024  # lines between two indexed offsets
+SCAN_CHUNK = 8 << 20  # bytes per numpy pass while indexing; larger chunks only add temporaries
+SNIFF_BYTES = 64 << 10
+MAX_LINE_CHARS = int(os.getenv("FILE_READ_MAX_LINE_CHARS", "2000"))
+INDEX_CACHE_SIZE = 32  # files whose newline index is kept
+PROBE_BYTES = 4096  # bytes at each end of the indexed prefix compared before extending
+TAIL_BLOCK = 1 << 20  # bytes per step of the backwards scan
+FOLLOW_POLL = float(os.getenv("LOG_FOLLOW_POLL", "0.25"))  # seconds between size checks while following
+FOLLOW_READ = 1 << 20  # bytes read per step while following
+
+_TEXT_CONTROL = {7, 8, 9, 10, 12, 13, 27}  # control bytes that still occur in text
+
+
+class Page(NamedTuple):
+    text: str
+    start: int  # first line (1-based) or byte offset
+    end: int  # last line, or the byte offset after the range
+    total: int  # lines, or bytes
+    clipped: bool = False  # lines were shortened or the page stopped at max_chars
+
+
+def sniff_encoding(sample: bytes) -> Optional[str]:
+    """The encoding of a text file from its first bytes, or None for binary content."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    if b"\0" in sample:
+        return None
+    control = sum(1 for b in sample[:4096] if b < 32 and b not in _TEXT_CONTROL)
+    if sample and control / min(len(sample), 4096) > 0.1:
+        return None
+    try:
+        # The sample may end inside a multi-byte character; allow for it.
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _clip_line(raw: bytes, length: int, encoding: Optional[str]) -> Tuple[str, bool]:
+    """Decode one line (``raw`` may be a prefix of its ``length`` bytes), clipped to ``MAX_LINE_CHARS``."""
+    line = raw.decode(encoding or "latin-1", errors="replace").rstrip("\r")
+    if len(line) > MAX_LINE_CHARS or length > len(raw):
+        return f"{line[:MAX_LINE_CHARS]} …[line is {length:,} bytes]", True
+    return line, False
+
+
+class LinePattern:
+    """A regex matched line by line against raw bytes, so lines need no decoding to be tested.
+
+    Smart case: a pattern without capitals ignores (ASCII) case, one with
+    capitals is case-sensitive. Ignoring case lower-cases the data rather than
+    compiling with ``re.IGNORECASE``, which keeps the regex engine's fast
+    literal search; offsets are unchanged as ``bytes.lower`` is ASCII-only.
+
+    A pattern is always matched against one line: :meth:`lines` runs it over
+    a whole block (``re.MULTILINE``, so ``^`` and ``$`` anchor at line
+    boundaries) and re-tests any match that runs across a newline (``\\s``,
+    ``[^…]``) on each line it touched, so a block scan and :meth:`search` on
+    single lines select the same lines.
+    """
+
+    def __init__(self, pattern: str, encoding: Optional[str] = "utf-8"):
+        raw = pattern.encode("latin-1" if encoding == "latin-1" else "utf-8", errors="replace")
+        self.pattern = pattern
+        self.fold = raw == raw.lower()
+        self.regex = re.compile(raw, re.MULTILINE)
+
+    def search(self, line: bytes) -> Optional["re.Match[bytes]"]:
+        return self.regex.search(line.lower() if self.fold else line)
+
+    def lines(self, data: bytes) -> List[Tuple[int, int]]:
+        """(start, end) of the lines of ``data`` that match, in order."""
+        text = data.lower() if self.fold else data
+        spans: List[Tuple[int, int]] = []
+
+        def add(start: int) -> int:
+            end = text.find(b"\n", start)
+            end = len(text) if end < 0 else end
+            if not spans or spans[-1][0] < start:
+                spans.append((start, end))
+            return end
+
+        for match in self.regex.finditer(text):
+            start = text.rfind(b"\n", 0, match.start()) + 1
+            if spans and spans[-1][0] >= start:
+                continue  # another match on a line already taken
+            if b"\n" not in match.group():
+                add(start)
+                continue
+            while start <= match.end():  # spans lines: keep those that match alone
+                end = text.find(b"\n", start)
+                end = len(text) if end < 0 else end
+                if self.regex.search(text, start, end):
+                    add(start)
+                start = end + 1
+        return spans
+
+
+class _LineIndex:
+    """Offsets of lines 0, STRIDE, 2*STRIDE, … and the newline count up to ``scanned``.
+
+    Only an append may extend it. ``write_file`` rewrites files in place (same
+    inode), so before extending, :meth:`still_valid` checks that the mtime is
+    unchanged or that the scanned prefix still starts and ends with the same
+    bytes; otherwise the index is rebuilt.
+    """
+
+    def __init__(self, identity: Tuple[int, int]):
+        self.identity = identity  # (device, inode): a replaced file starts over
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkpoints = array("Q", [0])
+        self.newlines = 0
+        self.scanned = 0
+        self.mtime_ns = 0
+        self.probe = b""
+
+    @staticmethod
+    def _probe(mm: mmap.mmap, end: int) -> bytes:
+        head = mm[:min(PROBE_BYTES, end)]
+        tail = mm[max(0, end - PROBE_BYTES):end]
+        return hashlib.blake2b(head + tail, digest_size=16).digest()
+
+    def still_valid(self, mm: Optional[mmap.mmap], stat: os.stat_result) -> bool:
+        if self.scanned == 0:
+            return True
+        if stat.st_size < self.scanned or mm is None:
+            return False
+        if stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.scanned:
+            return True
+        return self._probe(mm, self.scanned) == self.probe
+
+    def extend(self, mm: mmap.mmap, size: int) -> None:
+        position = self.scanned
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL, position - position % mmap.PAGESIZE)
+        while position < size:
+            count = min(SCAN_CHUNK, size - position)
+            chunk = np.frombuffer(mm, dtype=np.uint8, count=count, offset=position)
+            found = np.flatnonzero(chunk == 10)
+            del chunk  # release the view so the map can be closed
+            # Newline number n (1-based) starts line n; keep those with n % STRIDE == 0.
+            first = (-(self.newlines + 1)) % INDEX_STRIDE
+            self.checkpoints.extend((found[first::INDEX_STRIDE] + position + 1).tolist())
+            self.newlines += len(found)
+            if hasattr(mmap, "MADV_DONTNEED"):
+                # Unmap what was scanned from this process (it stays in the page cache): constant RSS.
+                page = position - position % mmap.PAGESIZE
+                mm.madvise(mmap.MADV_DONTNEED, page, position + count - page)
+            position += count
+        self.scanned = size
+        self.probe = self._probe(mm, size)
+
+
+_indexes: "OrderedDict[str, _LineIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _line_index(path: str, stat: os.stat_result) -> _LineIndex:
+    identity = (stat.st_dev, stat.st_ino)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None or index.identity != identity:
+            index = _LineIndex(identity)  # new or replaced file
+        _indexes[path] = index
+        _indexes.move_to_end(path)
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+class PagedFile:
+    """A read-only map of one file; use as a context manager."""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self._file = open(self.path, "rb")
+        stat = os.fstat(self._file.fileno())
+        self.size = stat.st_size
+        # mmap cannot map an empty file.
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.encoding = sniff_encoding(self._slice(0, SNIFF_BYTES))
+        self._stat = stat
+        self._index: Optional[_LineIndex] = None
+        self.scan_stopped: Optional[int] = None  # where the last backwards scan gave up, if it did
+
+    def __enter__(self) -> "PagedFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    @property
+    def is_binary(self) -> bool:
+        return self.encoding is None
+
+    @property
+    def line_pageable(self) -> bool:
+        # The newline index counts b"\n" bytes, which only works for ASCII-compatible text.
+        return self.encoding not in (None, "utf-16")
+
+    def _slice(self, start: int, end: int) -> bytes:
+        if self._mm is None:
+            return b""
+        return self._mm[max(start, 0):min(end, self.size)]
+
+    def _decode(self, data: bytes) -> str:
+        return data.decode(self.encoding or "latin-1", errors="replace")
+
+    # ------------------------------------------------------------------ #
+    # Lines
+    # ------------------------------------------------------------------ #
+    def _ensure_index(self) -> _LineIndex:
+        if self._index is None:
+            index = _line_index(self.path, self._stat)
+            with index.lock:
+                if not index.still_valid(self._mm, self._stat):
+                    index.reset()  # truncated or rewritten in place
+                if index.scanned < self.size and self._mm is not None:
+                    index.extend(self._mm, self.size)
+                index.mtime_ns = self._stat.st_mtime_ns
+            self._index = index
+        return self._index
+
+    @property
+    def line_count(self) -> int:
+        if self.size == 0:
+            return 0
+        index = self._ensure_index()
+        return index.newlines + (self._mm[self.size - 1] != 10)
+
+    def line_offset(self, line: int) -> int:
+        """Byte offset where ``line`` (1-based) starts."""
+        index = self._ensure_index()
+        target = line - 1
+        position = index.checkpoints[min(target // INDEX_STRIDE, len(index.checkpoints) - 1)]
+        for _ in range(target % INDEX_STRIDE):
+            newline = self._mm.find(b"\n", position, self.size)
+            if newline < 0:
+                return self.size
+            position = newline + 1
+        return position
+
+    def _line(self, start: int, end: int) -> Tuple[str, bool]:
+        """The line at bytes ``start`` … ``end`` (without its newline), and whether it was clipped."""
+        return _clip_line(self._slice(start, min(end, start + MAX_LINE_CHARS * 4)), end - start, self.encoding)
+
+    def read_lines(self, start: int = 1, count: int = 200, max_chars: int = 20000) -> Page:
+        """Lines ``start`` … ``start + count - 1`` (1-based), decoded and capped."""
+        total = self.line_count
+        start = max(1, start)
+        if start > total:
+            return Page("", start, start - 1, total)
+        position = self.line_offset(start)
+        lines, used, clipped = [], 0, False
+        number = start
+        while number < start + max(count, 1) and number <= total:
+            newline = self._mm.find(b"\n", position, self.size)
+            line_end = self.size if newline < 0 else newline
+            line, cut = self._line(position, line_end)
+            clipped |= cut
+            if used + len(line) + 1 > max_chars and lines:
+                clipped = True
+                break
+            lines.append(line)
+            used += len(line) + 1
+            position = line_end + 1
+            number += 1
+        return Page("\n".join(lines), start, start + len(lines) - 1, total, clipped)
+
+    # ------------------------------------------------------------------ #
+    # Bytes
+    # ------------------------------------------------------------------ #
+    def read_bytes(self, offset: int, count: int) -> Page:
+        """Bytes ``offset`` … ``offset + count``: decoded text, or a hex dump for binary files."""
+        offset = min(max(offset, 0), self.size)
+        data = self._slice(offset, offset + max(count, 0))
+        if self.is_binary:
+            text = hexdump(data, offset)
+        else:
+            text = self._decode(data)
+        return Page(text, offset, offset + len(data), self.size)
+
+    # ------------------------------------------------------------------ #
+    # Tail
+    # ------------------------------------------------------------------ #
+    def _spans_backwards(
+        self, pattern: Optional[LinePattern] = None, deadline: Optional[float] = None
+    ) -> Iterator[Tuple[int, int]]:
+        """(start, end) byte spans of the lines, last line first; only lines matching ``pattern`` if given.
+
+        The file is read backwards in ``TAIL_BLOCK`` steps that start on a line
+        boundary, so the last lines cost the same however large the file is.
+        Stops early (setting ``scan_stopped`` to the offset reached) when the
+        turn is cancelled or ``deadline`` (``time.monotonic()``) passes.
+        """
+        if self._mm is None:
+            return
+        mm = self._mm
+        token = current_token()
+        end = self.size - (mm[self.size - 1] == 10)  # a final newline does not start another line
+        while True:
+            if (token is not None and token.cancelled) or (deadline is not None and time.monotonic() > deadline):
+                self.scan_stopped = end
+                return
+            block = max(0, end - TAIL_BLOCK)
+            if block > 0:
+                newline = mm.find(b"\n", block, end)
+                # A line longer than the block becomes the whole block.
+                block = newline + 1 if newline >= 0 else mm.rfind(b"\n", 0, end) + 1
+            if pattern is None:
+                position = end
+                while True:
+                    newline = mm.rfind(b"\n", block, position)
+                    yield (newline + 1 if newline >= 0 else block), position
+                    if newline < 0:
+                        break
+                    position = newline
+            else:
+                for start, line_end in reversed(pattern.lines(mm[block:end])):
+                    yield block + start, block + line_end
+            if hasattr(mmap, "MADV_DONTNEED"):
+                page = block - block % mmap.PAGESIZE
+                mm.madvise(mmap.MADV_DONTNEED, page, end - page)
+            if block == 0:
+                return
+            end = block - 1
+
+    def tail(
+        self, count: int, pattern: Optional[LinePattern] = None, budget: Optional[float] = None
+    ) -> Tuple[List[str], int, bool]:
+        """The last ``count`` lines (matching ``pattern`` if given), oldest first.
+
+        Also returns the byte offset of the first one and whether any line was
+        clipped. ``budget`` bounds the search in seconds.
+        """
+        lines, offset, clipped = [], self.size, False
+        deadline = time.monotonic() + budget if budget is not None else None
+        if count > 0:
+            for start, end in self._spans_backwards(pattern, deadline):
+                line, cut = self._line(start, end)
+                lines.append(line)
+                offset, clipped = start, clipped or cut
+                if len(lines) >= count:
+                    break
+        lines.reverse()
+        return lines, offset, clipped
+
+    def describe(self) -> str:
+        """One-line metadata: size, lines (text only), encoding."""
+        if self.is_binary:
+            return f"{self.path} · {human_size(self.size)} · binary"
+        lines = f"{self.line_count:,} lines · " if self.line_pageable else ""
+        return f"{self.path} · {human_size(self.size)} · {lines}{self.encoding}"
+
+
+def read_page(
+    path: str,
+    start_line: int = 1,
+    num_lines: int = 400,
+    max_chars: int = 20000,
+    byte_offset: Optional[int] = None,
+    byte_count: Optional[int] = None,
+) -> str:
+    """A tool-ready page of ``path``: a line range, or a byte range if ``byte_offset`` is given.
+
+    A small file read whole comes back as plain content; anything partial gets
+    a header with the file's metadata and where to continue.
+    """
+    with PagedFile(path) as f:
+        if byte_offset is not None or f.is_binary:
+            # A hex dump takes ~4.5 characters per byte.
+            limit = max_chars // 5 if f.is_binary else max_chars
+            page = f.read_bytes(byte_offset or 0, min(byte_count or limit, limit))
+            more = f" — continue with byte_offset={page.end}" if page.end < page.total else " — end of file"
+            return f"[{f.describe()} — bytes {page.start:,}-{page.end:,}{more}]\n{page.text}"
+        if not f.line_pageable:
+            page = f.read_bytes(0, max_chars * 2)
+            more = " (only the start of this UTF-16 file is shown)" if page.end < page.total else ""
+            return f"[{f.describe()}{more}]\n{page.text}"
+        page = f.read_lines(start_line, num_lines, max_chars)
+        if page.start == 1 and page.end == page.total and not page.clipped:
+            return page.text
+        if page.end < page.start:
+            return f"[{f.describe()} — no line {page.start}; the file has {page.total:,} lines]"
+        more = f" — continue with start_line={page.end + 1}" if page.end < page.total else " — end of file"
+        return f"[{f.describe()} — lines {page.start:,}-{page.end:,}{more}]\n{page.text}"
+
+
+class Follow:
+    """Lines appended to a file over ``seconds``; iterate it, then read what happened.
+
+    ::
+
+        follow = Follow("/var/log/syslog", 10, LinePattern("error"))
+        for line in follow:
+            ...
+        follow.note()  # "" or "[ROTATED] …" / "[TRUNCATED] …" / "[CANCELLED] …"
+
+    The file's size is polled every ``FOLLOW_POLL`` seconds (no inotify
+    dependency); reading starts at ``offset``, or at the current end. A file
+    truncated in place is read again from the start, and when the path is
+    replaced (log rotation) the rest of the old file is read before switching
+    to the new one. Stops at ``seconds``, at the turn's deadline, or when the
+    turn is cancelled.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        seconds: float,
+        pattern: Optional[LinePattern] = None,
+        *,
+        encoding: Optional[str] = "utf-8",
+        offset: Optional[int] = None,
+        poll: float = FOLLOW_POLL,
+    ):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.budget = seconds
+        self.pattern = pattern
+        self.encoding = encoding
+        self.offset = offset
+        self.poll = poll
+
+        self.lines = 0
+        self.bytes = 0
+        self.rotated = 0
+        self.truncated = 0
+        self.cancelled = False
+        self.seconds = 0.0
+
+    def note(self) -> str:
+        notes = []
+        if self.rotated:
+            notes.append("[ROTATED] the file was replaced while following; the new file was followed")
+        if self.truncated:
+            notes.append("[TRUNCATED] the file was truncated while following; it was read again from the start")
+        if self.cancelled:
+            token = current_token()
+            notes.append(f"[CANCELLED] stopped following ({token.reason if token else 'cancelled'})")
+        return "\n".join(notes)
+
+    def _wanted(self, raw: bytes) -> bool:
+        return self.pattern is None or self.pattern.search(raw) is not None
+
+    def _decode(self, raw: bytes) -> str:
+        return _clip_line(raw[:MAX_LINE_CHARS * 4], len(raw), self.encoding)[0]
+
+    def __iter__(self) -> Iterator[str]:
+        started = time.monotonic()
+        token = current_token()
+        budget = self.budget
+        if token is not None and token.remaining() is not None:
+            budget = min(budget, token.remaining())
+        deadline = started + budget
+
+        f = open(self.path, "rb")
+        stat = os.fstat(f.fileno())
+        identity = (stat.st_dev, stat.st_ino)
+        position = stat.st_size if self.offset is None else self.offset
+        pending = b""  # the last line, until its newline arrives
+        try:
+            while True:
+                if token is not None and token.cancelled:
+                    self.cancelled = True
+                    return
+                if time.monotonic() >= deadline:
+                    break
+                size = os.fstat(f.fileno()).st_size
+                if size < position:
+                    self.truncated += 1
+                    position, pending = 0, b""
+                if size > position:
+                    f.seek(position)
+                    data = f.read(min(size - position, FOLLOW_READ))
+                    position += len(data)
+                    self.bytes += len(data)
+                    *complete, pending = (pending + data).split(b"\n")
+                    for raw in complete:
+                        if self._wanted(raw):
+                            self.lines += 1
+                            yield self._decode(raw)
+                    continue  # read on while the file is ahead
+                try:
+                    current = os.stat(self.path)
+                except OSError:
+                    current = None  # moved away and not recreated yet: stay on the old file
+                if current is not None and (current.st_dev, current.st_ino) != identity:
+                    f.close()
+                    f = open(self.path, "rb")
+                    identity = (current.st_dev, current.st_ino)
+                    position, pending = 0, b""
+                    self.rotated += 1
+                    continue
+                time.sleep(max(0.0, min(self.poll, deadline - time.monotonic())))
+            if pending and self._wanted(pending):
+                self.lines += 1
+                yield self._decode(pending)  # a line still being written
+        finally:
+            f.close()
+            self.seconds = time.monotonic() - started
+
+
+def _fit(lines: List[str], max_chars: int) -> Tuple[List[str], int]:
+    """The newest of ``lines`` that fit in ``max_chars``, and how many older ones were left out."""
+    used, keep = 0, 0
+    for line in reversed(lines):
+        if used + len(line) + 1 > max_chars and keep:
+            break
+        used += len(line) + 1
+        keep += 1
+    return lines[len(lines) - keep:], len(lines) - keep
+
+
+def tail_page(
+    path: str,
+    lines: int = 50,
+    pattern: Optional[str] = None,
+    follow_seconds: float = 0.0,
+    max_chars: int = 4000,
+    max_lines: int = 1000,
+    budget: Optional[float] = None,
+) -> str:
+    """A tool-ready tail of ``path``: its last ``lines`` lines (or matches of ``pattern``).
+
+    With ``follow_seconds``, the lines appended over that time follow; they
+    get half of ``max_chars`` and the tail the rest. Each part keeps its
+    newest lines when it has to be shortened. ``budget`` bounds the backwards
+    search for matches in seconds.
+    """
+    lines = min(max(lines, 0), max_lines)
+    with PagedFile(path) as f:
+        about = f"{f.path} · {human_size(f.size)}"
+        if not f.line_pageable:
+            kind = "binary" if f.is_binary else "UTF-16"
+            return f"[{about} · {kind}] This is not a line-based log; use read_file with byte_offset instead."
+        about = f"{about} · {f.encoding}"
+        regex = LinePattern(pattern, f.encoding) if pattern else None
+        found, offset, _ = f.tail(lines, regex, budget)
+        size, encoding, stopped = f.size, f.encoding, f.scan_stopped
+
+    def what(count: int) -> str:
+        noun = "line" if count == 1 else "lines"
+        return f"{noun} matching {pattern!r}" if pattern else noun
+
+    room = max(max_chars - 2 * len(about) - 300, max_chars // 2)  # for the lines; the rest is headers and notes
+    sections, budget = [], room
+    if follow_seconds > 0:
+        follow = Follow(path, follow_seconds, regex, encoding=encoding, offset=size)
+        new = deque(follow, maxlen=max_lines)
+        budget = room // 2 if lines else room
+        shown, dropped = _fit(list(new), budget)
+        budget = room - sum(len(line) + 1 for line in shown)
+        summary = f"{follow.lines:,} new {what(follow.lines)}" if follow.lines else f"no new {what(0)}"
+        if dropped or follow.lines > len(new):
+            summary += f", showing the last {len(shown)}"
+        sections.append(f"[followed for {follow.seconds:.1f}s: {summary}]" + "".join(f"\n{line}" for line in shown))
+        if follow.note():
+            sections.append(follow.note())
+
+    if lines:
+        if not found:
+            head = f"no {what(0)}" if pattern else "empty file"
+        elif len(found) < lines and pattern and stopped is None:
+            head = f"all {len(found)} {what(len(found))}, from byte {offset:,}"
+        else:
+            head = f"last {len(found)} {what(len(found))}, from byte {offset:,}"
+        shown, dropped = _fit(found, budget)
+        if dropped:
+            head += f"; the oldest {dropped} left out to stay under {max_chars:,} characters"
+        tail = f"[{about} — {head}]" + "".join(f"\n{line}" for line in shown)
+        if stopped is not None:
+            reason = "CANCELLED" if is_cancelled() else "TIMEOUT"
+            tail += f"\n[{reason}] only the last {human_size(size - stopped)} were searched"
+        sections.insert(0, tail)
+    else:
+        sections[0] = f"[{about}]\n{sections[0]}" if sections else f"[{about}]"
+    return "\n".join(sections)
+
+
+def human_size(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def hexdump(data: bytes, offset: int = 0, width: int = 16) -> str:
+    rows = []
+    for i in range(0, len(data), width):
+        chunk = data[i:i + width]
+        ascii_ = "".join(chr(b) if 32 <= b < 127 else "." for b in chunk)
+        rows.append(f"{offset + i:08x}  {chunk.hex(' '):<{width * 3}} {ascii_}")
+    return "\n".join(rows)
@@ -0,0 +1,13 @@
+"""Where the agent keeps its local state — caches, logs and session databases."""
+
+import os
+import pathlib
+
+DATA_DIR = pathlib.Path(os.getenv("ZKZK_DATA_DIR") or "~/.zkzkagent").expanduser()
+
+
+def data_path(*parts: str) -> pathlib.Path:
+    """Return DATA_DIR/<parts>, creating the parent directory on first use."""
+    path = DATA_DIR.joinpath(*parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
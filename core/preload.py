@@ -0,0 +1,117 @@
+"""Background start-up preload.
+
+Start-up used to warm the model by running the whole graph on a fake message:
+a router call plus an executor call with every tool bound, while the user
+waited. Now :data:`preloader` does the cheap parts in a daemon thread instead:
+
+* an empty-prompt load request for every configured model on every endpoint
+  (Ollama loads the model with the node's options and generates nothing);
+* the bound tool chains of the executor and conversational nodes, which builds
+  every tool's JSON schema once (later subsets reuse them);
+* the local routing pieces (prompts, decision cache, fast path, intent model);
+* the filename index's scan thread (:mod:`core.fs_index`), which runs on
+  after the preload is done.
+
+The REPL accepts input immediately. The first turn calls :meth:`Preloader.wait`
+so it never races the load or repeats it.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Preloader:
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self.errors: Dict[str, str] = {}
+        self.seconds: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def failed(self) -> bool:
+        """True if no model could be loaded (Ollama is probably not running)."""
+        return self.done and "models" in self.errors
+
+    def start(self) -> None:
+        """Start the preload thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="preload", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the preload has finished (starting it if needed)."""
+        self.start()
+        return self._done.wait(timeout)
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            # Local steps first (milliseconds), then the model loads.
+            steps = (
+                ("tools", self._bind_tools),
+                ("routing", self._warm_routing),
+                ("files", self._start_file_index),
+                ("models", self._load_models),
+            )
+            for name, step in steps:
+                try:
+                    step()
+                except Exception as e:  # noqa: BLE001 — a failed step must not kill the others
+                    self.errors[name] = str(e)
+                    logger.warning(f"[PRELOAD] {name} failed: {e}")
+        finally:
+            self.seconds = time.perf_counter() - start
+            self._done.set()
+            logger.info(f"[PRELOAD] Done in {self.seconds:.1f}s")
+
+    @staticmethod
+    def _load_models() -> None:
+        from models.registry import model_registry
+
+        results = model_registry.preload()
+        failed = {model: error for model, error in results.items() if error}
+        if failed and len(failed) == len(results):
+            raise RuntimeError("; ".join(f"{m}: {e}" for m, e in failed.items()))
+
+    @staticmethod
+    def _bind_tools() -> None:
+        from agent_nodes import conversation_node, execute_node
+
+        execute_node.get_model_chain(None)
+        conversation_node.get_model_chain(None)
+        conversation_node.get_response_cache()
+
+    @staticmethod
+    def _warm_routing() -> None:
+        from agent_nodes import classify_node
+        from core.loadPrompts import LoadPrompts
+        from routing.pre_classifier import FAST_PATH_ENABLED, pre_classifier
+
+        prompts = LoadPrompts()
+        for name in ("router.yaml", "planner.yaml", "executor.yaml", "conversational.yaml"):
+            prompts.load_prompt(name)
+        classify_node.get_router_chain()
+        classify_node.get_decision_cache()
+        classify_node.get_intent_model()
+        if FAST_PATH_ENABLED:
+            pre_classifier.warm()
+
+    @staticmethod
+    def _start_file_index() -> None:
+        from core.fs_index import get_file_index
+
+        get_file_index().start()
+
+
+preloader = Preloader()
@@ -0,0 +1,52 @@
+"""Background processes started by tools, kept per chat session.
+
+A tool that leaves something running (``run_deploy_script`` starting the
+frontend) records its PID here so a later call (``stop_frontend``) can find
+it. Entries are keyed by the graph's ``thread_id``, so two sessions served by
+one process never see or stop each other's processes. Calls made outside a
+graph run share the ``"default"`` session.
+"""
+
+import threading
+from typing import Dict, Optional
+
+DEFAULT_SESSION = "default"
+
+
+def _graph_session() -> str:
+    try:
+        from langgraph.config import get_config
+
+        return get_config().get("configurable", {}).get("thread_id") or DEFAULT_SESSION
+    except (ImportError, RuntimeError):
+        return DEFAULT_SESSION
+
+
+class ProcessRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, int]] = {}
+
+    def get(self, name: str, session: Optional[str] = None) -> Optional[int]:
+        with self._lock:
+            return self._sessions.get(session or _graph_session(), {}).get(name)
+
+    def set(self, name: str, pid: int, session: Optional[str] = None) -> None:
+        with self._lock:
+            self._sessions.setdefault(session or _graph_session(), {})[name] = pid
+
+    def pop(self, name: str, session: Optional[str] = None) -> Optional[int]:
+        with self._lock:
+            return self._sessions.get(session or _graph_session(), {}).pop(name, None)
+
+    def for_session(self, session: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._sessions.get(session, {}))
+
+    def drop_session(self, session: str) -> Dict[str, int]:
+        """Forget a closed session's processes (they keep running); returns them."""
+        with self._lock:
+            return self._sessions.pop(session, {})
+
+
+running_processes = ProcessRegistry()
@@ -0,0 +1,287 @@
+"""Opt-in cache of conversational replies.
+
+Small-talk and "what is X" questions get asked again and again, and each one
+used to cost a full generation on the conversational model. With
+``RESPONSE_CACHE=1`` finished replies are stored in a SQLite file and replayed
+on a repeat:
+
+* **exact** — the key is the normalized question (see
+  :func:`routing.decision_cache.normalize_query`) plus a fingerprint of the
+  whole conversation before it. The reply may depend on anything said earlier
+  ("what's my name?", "what did I ask before?"), so only questions asked with
+  no prior history share the empty fingerprint and hit across sessions;
+* **semantic** (``RESPONSE_CACHE_SEMANTIC=1``) — on an exact miss the question
+  is embedded with ``RESPONSE_CACHE_EMBED_MODEL`` and compared with the stored
+  questions of the same context; a cosine similarity of at least
+  ``RESPONSE_CACHE_SIMILARITY`` counts as a hit.
+
+Entries expire after ``RESPONSE_CACHE_TTL`` seconds and the least recently used
+ones are evicted past ``RESPONSE_CACHE_SIZE``. Like the router cache, the
+whole cache is dropped when ``prompts/conversational.yaml`` or the
+conversational model changes.
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+
+from core.paths import data_path
+from routing.decision_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+base_path = pathlib.Path(__file__).parent.parent
+
+CONVERSATIONAL_PROMPT = base_path / "prompts" / "conversational.yaml"
+
+CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "0").strip() not in ("0", "false", "no", "")
+CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "500"))
+SEMANTIC_ENABLED = os.getenv("RESPONSE_CACHE_SEMANTIC", "0").strip() not in ("0", "false", "no", "")
+EMBED_MODEL = os.getenv("RESPONSE_CACHE_EMBED_MODEL", "nomic-embed-text")
+SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+
+PENDING_VECTORS = 256  # embeddings of missed lookups kept for the put() that follows
+
+
+def _text(message) -> str:
+    content = getattr(message, "content", "")
+    return content if isinstance(content, str) else str(content)
+
+
+def context_fingerprint(messages) -> str:
+    """Fingerprint of the conversation before the last question ("" = no prior history)."""
+    prior = [m for m in messages[:-1] if isinstance(m, (HumanMessage, AIMessage)) and _text(m).strip()]
+    if not prior:
+        return ""
+    digest = hashlib.sha256()
+    for m in prior:
+        digest.update(m.type.encode())
+        digest.update(normalize_query(_text(m)).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        model_name: str,
+        path: Optional[pathlib.Path] = None,
+        ttl: float = CACHE_TTL,
+        max_size: int = CACHE_SIZE,
+        prompt_path: pathlib.Path = CONVERSATIONAL_PROMPT,
+        embeddings=None,
+        similarity: float = SIMILARITY,
+    ):
+        self.model_name = model_name
+        self.path = path or data_path("response_cache.sqlite")
+        self.ttl = ttl
+        self.max_size = max_size
+        self.prompt_path = prompt_path
+        self.embeddings = embeddings
+        self.similarity = similarity
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+        self.embed_errors = 0
+
+        self._lock = threading.Lock()
+        self._prompt_mtime = None
+        # (question, context) -> embedding computed by a missed lookup, reused
+        # by put(). One entry per question, so concurrent sessions keep theirs.
+        self._pending_vectors: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS responses (
+                question  TEXT NOT NULL,
+                context   TEXT NOT NULL,
+                answer    TEXT NOT NULL,
+                vector    BLOB,
+                created   REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (question, context)
+            );
+            CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+            """
+        )
+        self._check_fingerprint()
+
+    # ------------------------------------------------------------------ #
+    # Invalidation
+    # ------------------------------------------------------------------ #
+    def _fingerprint(self) -> str:
+        digest = hashlib.sha256(self.model_name.encode())
+        try:
+            digest.update(self.prompt_path.read_bytes())
+        except OSError:
+            pass
+        return digest.hexdigest()
+
+    def _check_fingerprint(self) -> None:
+        """Drop every entry if conversational.yaml or the model changed."""
+        try:
+            mtime = self.prompt_path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._prompt_mtime and mtime is not None:
+            return
+        self._prompt_mtime = mtime
+
+        fingerprint = self._fingerprint()
+        with self._lock:
+            row = self._conn.execute("SELECT v FROM meta WHERE k = 'fingerprint'").fetchone()
+            if row and row[0] == fingerprint:
+                return
+            if row:
+                self.invalidations += 1
+                logger.info("[RESPONSE CACHE] conversational.yaml or model changed → cache cleared")
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (k, v) VALUES ('fingerprint', ?)", (fingerprint,)
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------ #
+    # Keys
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def key_for(messages) -> Optional[Tuple[str, str]]:
+        """(question, context) for a history ending in the user's question."""
+        if not messages or not isinstance(messages[-1], HumanMessage):
+            return None
+        raw = _text(messages[-1])
+        question = normalize_query(raw)
+        if not question:
+            return None
+        return question, context_fingerprint(messages)
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        if self.embeddings is None:
+            return None
+        try:
+            vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        except Exception as e:  # noqa: BLE001 — semantic matching is best effort
+            self.embed_errors += 1
+            logger.warning(f"[RESPONSE CACHE] Embedding failed, exact matching only: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    # ------------------------------------------------------------------ #
+    # Lookup / store
+    # ------------------------------------------------------------------ #
+    def get(self, messages) -> Optional[str]:
+        """Return the cached reply to the last question in ``messages``, or None."""
+        key = self.key_for(messages)
+        if key is None:
+            return None
+        self._check_fingerprint()
+        question, context = key
+        now = time.time()
+        with self._lock:
+            self.expired += self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.ttl,)
+            ).rowcount
+            row = self._conn.execute(
+                "SELECT answer FROM responses WHERE question = ? AND context = ?", (question, context)
+            ).fetchone()
+            if row is not None:
+                self._touch(question, context, now)
+                self.hits += 1
+                logger.info(f"[RESPONSE CACHE] Exact hit for '{question}'")
+                return row[0]
+
+        vector = self._embed(question)
+        if vector is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self._pending_vectors[key] = vector
+            while len(self._pending_vectors) > PENDING_VECTORS:
+                self._pending_vectors.popitem(last=False)
+            # Vectors of another size come from a different embedding model.
+            rows = self._conn.execute(
+                "SELECT question, answer, vector FROM responses WHERE context = ? AND length(vector) = ?",
+                (context, vector.nbytes),
+            ).fetchall()
+            if rows:
+                scores = np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows]) @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity:
+                    match = rows[best]
+                    self._touch(match[0], context, now)
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    logger.info(
+                        f"[RESPONSE CACHE] Semantic hit for '{question}' ≈ '{match[0]}' "
+                        f"({scores[best]:.3f})"
+                    )
+                    return match[1]
+            self.misses += 1
+        return None
+
+    def _touch(self, question: str, context: str, now: float) -> None:
+        self._conn.execute(
+            "UPDATE responses SET last_used = ? WHERE question = ? AND context = ?",
+            (now, question, context),
+        )
+        self._conn.commit()
+
+    def put(self, messages, answer: str) -> None:
+        key = self.key_for(messages)
+        if key is None or not answer.strip():
+            return
+        question, context = key
+        with self._lock:
+            vector = self._pending_vectors.pop(key, None)
+        if vector is None and self.embeddings is not None:
+            vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (question, context, answer, vector, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (question, context, answer, vector.tobytes() if vector is not None else None, now, now),
+            )
+            # LRU eviction — drop the least recently used rows beyond max_size.
+            self._conn.execute(
+                "DELETE FROM responses WHERE rowid IN ("
+                " SELECT rowid FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "embed_errors": self.embed_errors,
+            "semantic": self.embeddings is not None,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,4 +1,4 @@
-from typing import Annotated, Sequence, Dict, Optional
+from typing import Annotated, Any, Sequence, Dict, Optional
 from typing_extensions import TypedDict
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
@@ -13,3 +13,4 @@ class AgentState(TypedDict):
     running_processes: Optional[Dict[str, int]]
     router_rationale: Optional[str]
     iteration_count: Optional[int]
+    tool_scope: Optional[Dict[str, Any]]
@@ -0,0 +1,310 @@
+"""Shared runtime for the tools' subprocesses.
+
+Every shell-based tool runs its command through :func:`run` (sync) or
+:func:`arun` (asyncio). Both:
+
+* start the command in its own process group and kill the whole group on
+  timeout, on cancellation of the turn (:mod:`core.cancellation`) or when
+  the caller is cancelled, so no ``find`` or ``apt`` is left running;
+* enforce the tool's limits from ``core.tools.TOOL_LIMITS``: a timeout and a
+  cap on captured output. Output past the cap is read and discarded, so a
+  chatty command never blocks on a full pipe;
+* hold one of ``SUBPROCESS_MAX_CONCURRENCY`` slots while the command runs.
+  Parallel tool calls from one AI message, or several sessions, queue for a
+  slot instead of starting everything at once.
+
+GUI launchers (``xdg-open``, ``code``) use :func:`spawn`: detached, no
+output, no slot.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import selectors
+import signal
+import subprocess
+import threading
+import time
+from typing import NamedTuple, Optional, Sequence, Union
+
+from core.cancellation import cancellable_process, current_token, kill_process_group
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = float(os.getenv("SUBPROCESS_TIMEOUT", "60"))
+DEFAULT_MAX_OUTPUT = int(os.getenv("SUBPROCESS_MAX_OUTPUT", str(1 << 20)))  # bytes per stream
+MAX_CONCURRENCY = int(os.getenv("SUBPROCESS_MAX_CONCURRENCY", "4"))
+DRAIN_AFTER_KILL = 1.0  # seconds to collect what a killed group already wrote
+
+_slots = threading.BoundedSemaphore(max(1, MAX_CONCURRENCY))
+_stats_lock = threading.Lock()
+_stats = {"running": 0, "waiting": 0, "started": 0, "timed_out": 0, "cancelled": 0}
+
+Command = Union[str, Sequence[str]]
+
+
+class ToolLimits(NamedTuple):
+    timeout: Optional[float] = None  # seconds, None = DEFAULT_TIMEOUT
+    max_output: Optional[int] = None  # bytes kept per stream, None = DEFAULT_MAX_OUTPUT
+
+
+class ProcessResult(NamedTuple):
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+    cancelled: bool = False
+    truncated: bool = False
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not (self.timed_out or self.cancelled)
+
+    def note(self) -> str:
+        """Why the output is incomplete, for the tool's reply ("" when it isn't)."""
+        notes = []
+        if self.timed_out:
+            notes.append(f"[TIMEOUT] stopped after {self.seconds:.0f}s")
+        if self.cancelled:
+            token = current_token()
+            notes.append(f"[CANCELLED] stopped early ({token.reason if token else 'cancelled'})")
+        if self.truncated:
+            notes.append("[TRUNCATED] output cut at the tool's size limit")
+        return "\n".join(notes)
+
+
+def limits_for(tool: str) -> ToolLimits:
+    """The tool's limits: ``TOOL_TIMEOUT_<TOOL>`` env, then ``TOOL_LIMITS``, then the defaults."""
+    from core.tools import TOOL_LIMITS
+
+    limits = TOOL_LIMITS.get(tool, ToolLimits())
+    timeout = os.getenv(f"TOOL_TIMEOUT_{tool.upper()}")
+    return ToolLimits(
+        float(timeout) if timeout else (limits.timeout or DEFAULT_TIMEOUT),
+        limits.max_output or DEFAULT_MAX_OUTPUT,
+    )
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return {**_stats, "max_concurrency": MAX_CONCURRENCY}
+
+
+def _count(key: str, delta: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += delta
+
+
+def _effective_timeout(timeout: float) -> float:
+    """The tool's timeout, shortened to what is left of the turn's deadline."""
+    token = current_token()
+    remaining = token.remaining() if token is not None else None
+    return timeout if remaining is None else min(timeout, remaining)
+
+
+def _popen_args(command: Command, shell: bool) -> dict:
+    return {
+        "args": command,
+        "shell": shell,
+        "executable": "/bin/bash" if shell else None,
+        "start_new_session": True,  # its own process group, killed as one
+    }
+
+
+def _force_kill(pid: int) -> None:
+    with contextlib.suppress(ProcessLookupError, PermissionError):
+        os.killpg(pid, signal.SIGKILL)
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+# --------------------------------------------------------------------------- #
+# Sync
+# --------------------------------------------------------------------------- #
+def _collect(process: subprocess.Popen, limit: int, timeout: float):
+    """Read stdout/stderr up to ``limit`` bytes each until EOF or ``timeout``."""
+    buffers = {process.stdout: bytearray(), process.stderr: bytearray()}
+    truncated = timed_out = False
+    deadline = time.monotonic() + timeout
+    with selectors.DefaultSelector() as selector:
+        for stream in buffers:
+            selector.register(stream, selectors.EVENT_READ)
+        while selector.get_map():
+            left = deadline - time.monotonic()
+            if left <= 0:
+                if timed_out:
+                    break  # the killed group still holds the pipes open
+                timed_out = True
+                kill_process_group(process.pid)
+                deadline = time.monotonic() + DRAIN_AFTER_KILL
+                continue
+            for key, _ in selector.select(left):
+                data = os.read(key.fd, 65536)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    continue
+                buffer = buffers[key.fileobj]
+                room = limit - len(buffer)
+                if room > 0:
+                    buffer += data[:room]
+                truncated |= len(data) > room
+    return bytes(buffers[process.stdout]), bytes(buffers[process.stderr]), truncated, timed_out
+
+
+def run(
+    command: Command,
+    *,
+    tool: str,
+    shell: bool = False,
+    timeout: Optional[float] = None,
+    cwd: Optional[str] = None,
+    env: Optional[dict] = None,
+) -> ProcessResult:
+    """Run ``command`` to completion under ``tool``'s limits."""
+    limits = limits_for(tool)
+    timeout = _effective_timeout(timeout or limits.timeout)
+    token = current_token()
+    started = time.perf_counter()
+    _count("waiting")
+    try:
+        while not _slots.acquire(timeout=0.1):
+            if token is not None and token.cancelled:
+                return ProcessResult(None, "", "", cancelled=True)
+    finally:
+        _count("waiting", -1)
+    _count("running")
+    try:
+        process = subprocess.Popen(
+            **_popen_args(command, shell), cwd=cwd, env=env,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        _count("started")
+        with process, cancellable_process(process.pid):
+            stdout, stderr, truncated, timed_out = _collect(process, limits.max_output, timeout)
+            try:
+                returncode = process.wait(timeout=DRAIN_AFTER_KILL)
+            except subprocess.TimeoutExpired:
+                _force_kill(process.pid)
+                returncode = process.wait()
+    finally:
+        _count("running", -1)
+        _slots.release()
+    return _result(tool, returncode, stdout, stderr, timed_out, truncated, started)
+
+
+def _result(tool, returncode, stdout, stderr, timed_out, truncated, started) -> ProcessResult:
+    token = current_token()
+    cancelled = token is not None and token.cancelled
+    result = ProcessResult(
+        returncode, _decode(stdout), _decode(stderr),
+        timed_out=timed_out and not cancelled, cancelled=cancelled,
+        truncated=truncated, seconds=time.perf_counter() - started,
+    )
+    if result.timed_out:
+        _count("timed_out")
+        logger.warning(f"[SUBPROCESS] {tool}: timed out after {result.seconds:.1f}s")
+    elif result.cancelled:
+        _count("cancelled")
+    return result
+
+
+# --------------------------------------------------------------------------- #
+# Async
+# --------------------------------------------------------------------------- #
+async def _aread(stream: asyncio.StreamReader, limit: int, flags: dict) -> bytes:
+    buffer = bytearray()
+    while True:
+        data = await stream.read(65536)
+        if not data:
+            return bytes(buffer)
+        room = limit - len(buffer)
+        if room > 0:
+            buffer += data[:room]
+        if len(data) > room:
+            flags["truncated"] = True
+
+
+async def arun(
+    command: Command,
+    *,
+    tool: str,
+    shell: bool = False,
+    timeout: Optional[float] = None,
+    cwd: Optional[str] = None,
+    env: Optional[dict] = None,
+) -> ProcessResult:
+    """Async :func:`run` — waits on the event loop instead of a thread."""
+    limits = limits_for(tool)
+    timeout = _effective_timeout(timeout or limits.timeout)
+    token = current_token()
+    started = time.perf_counter()
+    _count("waiting")
+    try:
+        # Shared with the sync path, so polled rather than awaited.
+        while not _slots.acquire(blocking=False):
+            if token is not None and token.cancelled:
+                return ProcessResult(None, "", "", cancelled=True)
+            await asyncio.sleep(0.05)
+    finally:
+        _count("waiting", -1)
+    _count("running")
+    try:
+        kwargs = dict(
+            cwd=cwd, env=env, start_new_session=True,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        if shell:
+            process = await asyncio.create_subprocess_shell(command, executable="/bin/bash", **kwargs)
+        else:
+            process = await asyncio.create_subprocess_exec(*command, **kwargs)
+        _count("started")
+        flags = {"truncated": False}
+        timed_out = False
+        with cancellable_process(process.pid):
+            reading = asyncio.gather(
+                _aread(process.stdout, limits.max_output, flags),
+                _aread(process.stderr, limits.max_output, flags),
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(asyncio.shield(reading), timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                kill_process_group(process.pid)
+                try:
+                    stdout, stderr = await asyncio.wait_for(reading, DRAIN_AFTER_KILL)
+                except asyncio.TimeoutError:
+                    stdout = stderr = b""
+            except asyncio.CancelledError:
+                kill_process_group(process.pid)
+                reading.cancel()
+                raise
+            try:
+                returncode = await asyncio.wait_for(process.wait(), DRAIN_AFTER_KILL)
+            except asyncio.TimeoutError:
+                _force_kill(process.pid)
+                returncode = await process.wait()
+    finally:
+        _count("running", -1)
+        _slots.release()
+    return _result(tool, returncode, stdout, stderr, timed_out, flags["truncated"], started)
+
+
+# --------------------------------------------------------------------------- #
+# Detached
+# --------------------------------------------------------------------------- #
+def spawn(command: Sequence[str], *, tool: str) -> int:
+    """Start a long-lived program (an editor, a browser) and return its PID.
+
+    It gets its own session and no pipes, so it outlives the turn and never
+    holds a slot.
+    """
+    process = subprocess.Popen(
+        command, start_new_session=True,
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    logger.info(f"[SUBPROCESS] {tool}: started {command[0]} (PID {process.pid})")
+    return process.pid
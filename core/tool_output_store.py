@@ -0,0 +1,140 @@
+"""Content-addressed spill store for large tool outputs.
+
+A single ``find ~/`` or a big log read used to land in the message history
+verbatim and be re-sent with every later LLM call. Outputs longer than
+``SPILL_THRESHOLD`` characters are now written to
+``$ZKZK_DATA_DIR/tool_outputs/<sha256>.txt``; the model gets a head/tail
+preview plus a handle, and pages through the rest with the
+``read_tool_output`` tool.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import Optional
+
+from core.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+SPILL_THRESHOLD = int(os.getenv("TOOL_OUTPUT_SPILL_CHARS", "4000"))
+PREVIEW_HEAD_LINES = int(os.getenv("TOOL_OUTPUT_PREVIEW_HEAD", "20"))
+PREVIEW_TAIL_LINES = int(os.getenv("TOOL_OUTPUT_PREVIEW_TAIL", "10"))
+MAX_STORE_BYTES = int(float(os.getenv("TOOL_OUTPUT_STORE_MB", "200")) * 1024 * 1024)
+# Keeps one preview (or one page) comfortably below the spill threshold.
+MAX_PREVIEW_CHARS = SPILL_THRESHOLD // 2
+
+HANDLE_PREFIX = "out-"
+_HANDLE_RE = re.compile(r"^out-([0-9a-f]{12,64})$")
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + " …"
+
+
+class ToolOutputStore:
+    def __init__(self, directory=None):
+        self.directory = directory or data_path("tool_outputs", ".keep").parent
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str):
+        return self.directory / f"{digest}.txt"
+
+    def spill(self, text: str) -> str:
+        """Store ``text`` (deduplicated by content) and return its handle."""
+        digest = hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+        path = self._path(digest)
+        with self._lock:
+            if not path.exists():
+                tmp = path.with_suffix(".tmp")
+                tmp.write_text(text, encoding="utf-8", errors="replace")
+                os.replace(tmp, path)
+                self._prune()
+            else:
+                os.utime(path)  # keep recently used outputs from being pruned
+        return HANDLE_PREFIX + digest[:16]
+
+    def _prune(self) -> None:
+        files = sorted(self.directory.glob("*.txt"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        while files and total > MAX_STORE_BYTES:
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+
+    def resolve(self, handle: str) -> Optional[str]:
+        match = _HANDLE_RE.match(handle.strip())
+        if not match:
+            return None
+        matches = list(self.directory.glob(f"{match.group(1)}*.txt"))
+        if len(matches) != 1:
+            return None
+        return matches[0].read_text(encoding="utf-8", errors="replace")
+
+    def preview(self, text: str, handle: str, tool_name: str = "") -> str:
+        lines = text.splitlines()
+        head = lines[:PREVIEW_HEAD_LINES]
+        tail = lines[-PREVIEW_TAIL_LINES:] if len(lines) > PREVIEW_HEAD_LINES + PREVIEW_TAIL_LINES else []
+        budget = MAX_PREVIEW_CHARS // 2
+        head_text = _clip("\n".join(head), budget)
+        tail_text = _clip("\n".join(tail), budget) if tail else ""
+        omitted = len(lines) - len(head) - len(tail)
+        parts = [
+            f"[{tool_name + ' ' if tool_name else ''}output too large: {len(text):,} chars, "
+            f"{len(lines):,} lines — stored as {handle}]",
+            head_text,
+        ]
+        if tail_text:
+            parts += [f"[… {omitted:,} lines omitted …]", tail_text]
+        parts.append(
+            f"[Use read_tool_output(handle=\"{handle}\", start_line=N, num_lines=M) to read more.]"
+        )
+        return "\n".join(parts)
+
+    def maybe_spill(self, text: str, tool_name: str = "") -> Optional[str]:
+        """Return a preview if ``text`` is over the threshold (after spilling it), else None."""
+        if not isinstance(text, str) or len(text) <= SPILL_THRESHOLD:
+            return None
+        handle = self.spill(text)
+        logger.info(f"[TOOL OUTPUT] {tool_name or 'tool'}: spilled {len(text):,} chars → {handle}")
+        return self.preview(text, handle, tool_name)
+
+    def page(self, handle: str, start_line: int = 1, num_lines: int = 200, line_offset: int = 0) -> str:
+        """Lines ``start_line`` … of a stored output, starting ``line_offset`` chars into the first.
+
+        A page holds at most ``MAX_PREVIEW_CHARS``; a line longer than that
+        (minified JSON, base64) comes back in slices, each naming the
+        ``line_offset`` to continue from.
+        """
+        text = self.resolve(handle)
+        if text is None:
+            return f"Error: unknown tool output handle {handle!r}"
+        lines = text.splitlines()
+        start = max(start_line, 1)
+        offset = max(line_offset, 0)
+        end = min(start - 1 + max(num_lines, 1), len(lines))
+        chunk = []
+        used = 0
+        for number in range(start, end + 1):
+            line = lines[number - 1][offset:] if number == start else lines[number - 1]
+            if used + len(line) + 1 > MAX_PREVIEW_CHARS:
+                if chunk:
+                    end = number - 1
+                    break
+                cut = offset + MAX_PREVIEW_CHARS
+                return (
+                    f"[{handle}: line {number} of {len(lines):,}, chars {offset + 1:,}-{cut:,} of "
+                    f"{len(lines[number - 1]):,} — continue with start_line={number}, line_offset={cut}]\n"
+                    + line[:MAX_PREVIEW_CHARS]
+                )
+            chunk.append(line)
+            used += len(line) + 1
+        if not chunk:
+            return f"[{handle}: no lines from {start} — output has {len(lines):,} lines]"
+        more = f" — continue with start_line={end + 1}" if end < len(lines) else " — end of output"
+        within = f" (line {start} from char {offset + 1:,})" if offset else ""
+        return f"[{handle}: lines {start}-{end} of {len(lines):,}{within}{more}]\n" + "\n".join(chunk)
+
+tool_output_store = ToolOutputStore()
@@ -0,0 +1,87 @@
+"""Unattended approval of dangerous tools.
+
+Interactively, a dangerous tool call (``empty_trash``, ``remove_file``, …)
+stops the turn and asks the user to confirm. In batch mode nobody is there
+to answer, so a policy decides instead. Without a policy file every
+dangerous tool is denied.
+
+A policy file is YAML. The first rule whose ``tool`` (a glob) and ``args``
+(globs matched against the stringified argument values; all listed args
+must match) fit the call decides; otherwise ``default`` applies.
+
+An argument glob starting with ``/`` or ``~`` is a path glob: it is matched
+against the resolved path (``~`` expanded, symlinks and ``..`` resolved), so
+``/tmp/../home/u`` does not match ``/tmp/*``. A value containing a ``..``
+component never satisfies an ``allow`` rule's path glob::
+
+    default: deny
+    rules:
+      - tool: clear_tmp
+        action: allow
+      - tool: remove_file
+        action: allow
+        args: {path: "/tmp/*"}
+"""
+
+import fnmatch
+import os
+import pathlib
+from typing import List, NamedTuple, Optional, Tuple
+
+import yaml
+
+_ACTIONS = ("allow", "deny")
+
+
+class PolicyRule(NamedTuple):
+    tool: str
+    action: str
+    args: dict
+
+    def matches(self, tool_name: str, tool_args: dict) -> bool:
+        if not fnmatch.fnmatchcase(tool_name, self.tool):
+            return False
+        return all(
+            name in tool_args and self._arg_matches(str(tool_args[name]), str(pattern))
+            for name, pattern in self.args.items()
+        )
+
+    def _arg_matches(self, value: str, pattern: str) -> bool:
+        if not pattern.startswith(("/", "~")):
+            return fnmatch.fnmatchcase(value, pattern)
+        if self.action == "allow" and ".." in value.split("/"):
+            return False
+        resolved = os.path.realpath(os.path.expanduser(value))
+        return fnmatch.fnmatchcase(resolved, os.path.expanduser(pattern))
+
+
+class ToolPolicy:
+    def __init__(self, rules: Optional[List[PolicyRule]] = None, default: str = "deny", source: str = "built-in"):
+        if default not in _ACTIONS:
+            raise ValueError(f"policy default must be one of {_ACTIONS}, got {default!r}")
+        self.rules = rules or []
+        self.default = default
+        self.source = source
+
+    @classmethod
+    def load(cls, path: Optional[pathlib.Path]) -> "ToolPolicy":
+        """Read a policy file; ``None`` gives the deny-everything policy."""
+        if path is None:
+            return cls()
+        with open(path, "r") as f:
+            data = yaml.safe_load(f) or {}
+        rules = []
+        for i, row in enumerate(data.get("rules") or []):
+            action = row.get("action", "allow")
+            if action not in _ACTIONS or "tool" not in row:
+                raise ValueError(f"{path}: rule {i + 1} needs a 'tool' and an action in {_ACTIONS}")
+            rules.append(PolicyRule(str(row["tool"]), action, dict(row.get("args") or {})))
+        return cls(rules, data.get("default", "deny"), str(path))
+
+    def decide(self, tool_name: str, tool_args: Optional[dict]) -> Tuple[bool, str]:
+        """``(allowed, reason)`` for one dangerous tool call."""
+        tool_args = tool_args or {}
+        for i, rule in enumerate(self.rules):
+            if rule.matches(tool_name, tool_args):
+                return rule.action == "allow", f"rule {i + 1} ({rule.tool}: {rule.action})"
+        return self.default == "allow", f"default ({self.default})"
@@ -0,0 +1,223 @@
+"""Per-request tool subset selection.
+
+Binding all tools to every call sends every JSON schema with every request,
+which is thousands of prompt tokens on a small-context model. Instead each
+request gets the tools whose category keywords it mentions, plus the tools
+whose names/docstrings best match it lexically, capped at ``MAX_TOOLS``.
+
+The selection is kept in ``AgentState.tool_scope`` for the rest of the turn
+(so every tool iteration binds the same schemas and keeps the prompt prefix
+stable) and is widened when the model calls a tool it was not given.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Iterable, List, Optional
+
+from core.tools import __all__ as tool_functions
+
+logger = logging.getLogger(__name__)
+
+SELECTION_ENABLED = os.getenv("TOOL_SELECTION", "1").strip() not in ("0", "false", "no")
+MAX_TOOLS = int(os.getenv("TOOL_SELECTION_MAX", "8"))
+
+# Tools that are always offered — run_command is the general-purpose escape hatch.
+ALWAYS_INCLUDE = ["run_command"]
+
+# Tools only offered once they become relevant (read_tool_output is added by
+# the tools node when an output is spilled), never ranked against the query.
+ON_DEMAND = {"read_tool_output"}
+
+TOOL_CATEGORIES = {
+    "files": {
+        "tools": [
+            "find_file", "find_folder", "read_file", "tail_log", "open_file", "get_file_content",
+            "get_files_info", "write_file", "create_project_folder",
+        ],
+        "keywords": {
+            "file", "files", "folder", "folders", "directory", "dir", "read", "write",
+            "open", "find", "locate", "content", "contents", "project", "code", "desktop",
+            "downloads", "documents", "list", "txt", "log", "logs", "py", "json", "yaml",
+            "tail", "errors", "follow",
+        },
+    },
+    "cleanup": {
+        "tools": ["empty_trash", "clear_tmp", "remove_file"],
+        "keywords": {"trash", "tmp", "temp", "delete", "remove", "rm", "clean", "clear", "wipe"},
+    },
+    "apps": {
+        "tools": ["open_vscode", "open_browser"],
+        "keywords": {"vscode", "vs", "code", "editor", "browser", "google", "youtube", "url", "website", "site", "launch"},
+    },
+    "network": {
+        "tools": ["check_internet", "enable_wifi", "duckduckgo_search", "duckduckgo_search_images"],
+        "keywords": {
+            "internet", "online", "connection", "connected", "wifi", "wi-fi", "network",
+            "search", "web", "google", "lookup", "image", "images", "photo", "picture", "news",
+        },
+    },
+    "processes": {
+        "tools": ["find_process", "kill_process"],
+        "keywords": {"process", "processes", "pid", "kill", "running", "stop", "terminate"},
+    },
+    "packages": {
+        "tools": ["detect_operating_system", "install_package", "remove_package", "check_internet"],
+        "keywords": {"install", "uninstall", "package", "packages", "apt", "pip", "snap", "upgrade", "os", "distro"},
+    },
+    "deploy": {
+        "tools": ["run_deploy_script", "stop_frontend"],
+        "keywords": {"deploy", "deployment", "frontend", "backend", "server", "release"},
+    },
+    "system": {
+        "tools": ["run_command", "detect_operating_system"],
+        "keywords": {"command", "shell", "terminal", "date", "time", "disk", "memory", "cpu", "uptime", "ip"},
+    },
+}
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+-]*")
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "by",
+    "is", "are", "be", "it", "its", "this", "that", "my", "me", "i", "you", "your",
+    "what", "how", "when", "if", "do", "does", "can", "please", "used", "use",
+    "given", "return", "and", "from", "into", "all", "any", "now", "then",
+}
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def _tokens(text: str) -> List[str]:
+    words = _WORD.findall(text.lower().replace("_", " "))
+    return [_stem(w) for w in words if w not in _STOPWORDS]
+
+
+class ToolSelector:
+    def __init__(self, tools=tool_functions):
+        self.tools = list(tools)
+        self.order = {t.name: i for i, t in enumerate(self.tools)}
+        docs = {t.name: set(_tokens(f"{t.name} {t.description}")) for t in self.tools}
+        df = Counter(tok for toks in docs.values() for tok in toks)
+        n = len(docs)
+        self._docs = docs
+        self._idf = {tok: math.log((n + 1) / (c + 0.5)) for tok, c in df.items()}
+
+    def known(self, name: str) -> bool:
+        return name in self.order
+
+    def sort(self, names: Iterable[str]) -> List[str]:
+        """Registry order — the same set must always bind the same schema order."""
+        return sorted({n for n in names if n in self.order}, key=self.order.get)
+
+    def select(self, query: str, max_tools: int = MAX_TOOLS) -> List[str]:
+        words = set(re.findall(r"[a-z0-9-]+", query.lower()))
+        query_tokens = set(_tokens(query))
+
+        scores = Counter()
+        # Explicit mentions (e.g. a plan step "open_vscode") always win.
+        lowered = query.lower()
+        for name in self.order:
+            if name in lowered:
+                scores[name] += 100.0
+        for name, doc in self._docs.items():
+            if name in ON_DEMAND:
+                continue
+            overlap = query_tokens & doc
+            if overlap:
+                scores[name] += sum(self._idf[t] for t in overlap)
+        for category in TOOL_CATEGORIES.values():
+            hits = len(words & category["keywords"])
+            for name in category["tools"]:
+                if hits:
+                    scores[name] += 2.0 * hits
+
+        chosen = [name for name, score in scores.most_common() if score > 0][:max_tools]
+        return self.sort([*chosen, *ALWAYS_INCLUDE])
+
+    def widen(self, current: Iterable[str], requested: Iterable[str]) -> List[str]:
+        """Add the requested tools plus the rest of their categories."""
+        names = set(current)
+        for name in requested:
+            if not self.known(name):
+                continue
+            names.add(name)
+            for category in TOOL_CATEGORIES.values():
+                if name in category["tools"]:
+                    names.update(category["tools"])
+        return self.sort(names)
+
+
+_selector = None
+_selector_lock = threading.Lock()
+
+
+def get_selector() -> ToolSelector:
+    global _selector
+    if _selector is None:
+        with _selector_lock:
+            if _selector is None:
+                _selector = ToolSelector()
+    return _selector
+
+
+def _query_of(state) -> str:
+    for m in reversed(state.get("messages", [])):
+        if type(m).__name__ == "HumanMessage":
+            return m.content if isinstance(m.content, str) else str(m.content)
+    return ""
+
+
+def _has_spilled_output(state) -> bool:
+    """True if the history holds a stored tool output the model may want to page."""
+    return any(
+        isinstance(m.content, str) and "read_tool_output(handle=" in m.content
+        for m in state.get("messages", [])
+    )
+
+
+def resolve_tool_scope(state, query: Optional[str] = None) -> Optional[dict]:
+    """Return ``{"query": …, "tools": [...]}`` for this turn, or None for all tools.
+
+    The scope stored in state is reused while the latest human message is the
+    same one it was computed for, so tool iterations keep identical schemas.
+    ``query`` overrides that message: an approved plan is selected for from
+    the plan instruction, which becomes the latest human message from the
+    next iteration on, rather than from the "yes" that approved it.
+    """
+    if not SELECTION_ENABLED:
+        return None
+    query = _query_of(state) if query is None else query
+    scope = state.get("tool_scope")
+    if scope and scope.get("query") == query:
+        return scope
+    tools = get_selector().select(query)
+    if _has_spilled_output(state):
+        tools = get_selector().sort([*tools, "read_tool_output"])
+    logger.info(f"[TOOLS] Selected {len(tools)}/{len(tool_functions)} tools: {tools}")
+    return {"query": query, "tools": tools}
+
+
+def widen_tool_scope(scope: Optional[dict], tool_calls) -> Optional[dict]:
+    """Widen ``scope`` if the model asked for tools it was not given."""
+    if scope is None or not tool_calls:
+        return scope
+    missing = [tc["name"] for tc in tool_calls if tc["name"] not in scope["tools"]]
+    if not missing:
+        return scope
+    tools = get_selector().widen(scope["tools"], missing)
+    logger.info(f"[TOOLS] Model asked for {missing} — widening scope to {tools}")
+    return {"query": scope["query"], "tools": tools}
+
+
+def tools_for(names: Optional[Iterable[str]]) -> list:
+    if names is None:
+        return list(tool_functions)
+    wanted = set(names)
+    return [t for t in tool_functions if t.name in wanted]
@@ -1,12 +1,15 @@
+from core.subprocess_runtime import ToolLimits
 from tools_module import (
     runDeployScript,
     runCommand,
+    readToolOutput,
 )
 
 from tools_module.dangerous_tools import emptyTrash, emptyTmp, removeFile
 from tools_module.files_tools import (
     findFile,
     readFile,
+    tailLog,
     openFile,
     findFolder,
     getFileContent,
@@ -22,6 +25,7 @@ from tools_module.package_manager import detectOperatingSystem, installPackage,
 __all__ = [
     findFile.find_file,
     readFile.read_file,
+    tailLog.tail_log,
     openFile.open_file,
     findFolder.find_folder,
     getFileContent.get_file_content,
@@ -42,8 +46,31 @@ __all__ = [
     duckduckgo_search.duckduckgo_search,
     duckduckgo_search_images.duckduckgo_search_images,
     runCommand.run_command,
+    readToolOutput.read_tool_output,
 
     detectOperatingSystem.detect_operating_system,
     installPackage.install_package,
     removePackage.remove_package,
 ]
+
+# Subprocess limits per tool (core/subprocess_runtime.py). Unlisted tools get
+# SUBPROCESS_TIMEOUT / SUBPROCESS_MAX_OUTPUT; TOOL_TIMEOUT_<NAME> overrides a timeout.
+# find_file / find_folder walk in-process (core/fs_walk.py) and use theirs as the walk's budget;
+# tail_log uses its timeout to bound its backwards search and the longest follow_seconds.
+TOOL_LIMITS = {
+    "run_command": ToolLimits(timeout=120),
+    "find_file": ToolLimits(timeout=60),
+    "find_folder": ToolLimits(timeout=60),
+    "tail_log": ToolLimits(timeout=60),
+    "find_process": ToolLimits(timeout=10),
+    "detect_operating_system": ToolLimits(timeout=10),
+    "create_project_folder": ToolLimits(timeout=10),
+    "end_main_process": ToolLimits(timeout=10),
+    "enable_wifi": ToolLimits(timeout=30),
+    "stop_frontend": ToolLimits(timeout=30),
+    "install_package": ToolLimits(timeout=900, max_output=256 << 10),
+    "remove_package": ToolLimits(timeout=600, max_output=256 << 10),
+    "empty_trash": ToolLimits(timeout=300),
+    "clear_tmp": ToolLimits(timeout=300),
+    "remove_file": ToolLimits(timeout=300),
+}
@@ -0,0 +1,290 @@
+"""Per-node latency and token spans.
+
+Every graph node, tool call and CLI turn runs inside a :class:`Span`. The
+active span lives in a contextvar, so nested spans (a tool inside the
+``tools`` node, a node inside a turn) find their parent across threads and
+asyncio tasks. LLM calls don't open spans of their own; :class:`LLMTraceCallback`
+(attached to every model by the registry) adds time-to-first-token and
+Ollama's eval counters to the span that made the call:
+
+* ``ttft_ms`` — first streamed chunk, measured from the start of the call;
+* ``prompt_eval_count`` / ``prompt_eval_ms`` — prompt tokens Ollama had to
+  evaluate (prefill) and the time it took;
+* ``eval_count`` / ``eval_ms`` / ``tokens_per_s`` — generated tokens.
+
+A speculative stream (``ROUTER_SPECULATIVE``) starts inside ``classify`` but
+belongs to the node that claims it. Its calls go to a :class:`DeferredSpan`
+and are handed to the claiming node's span.
+
+Finished spans are appended to ``$ZKZK_DATA_DIR/traces.jsonl`` (rotated at
+``TRACE_FILE_MB``, ``TRACE_BACKUPS`` old files kept) and summarised per
+session for the CLI's ``/stats`` command. ``TRACING=0`` turns it all off.
+"""
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from core.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING", "1").strip() not in ("0", "false", "no")
+TRACE_FILE_MB = float(os.getenv("TRACE_FILE_MB", "10"))
+TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", "3"))
+TRACE_WINDOW = int(os.getenv("TRACE_WINDOW", "500"))  # samples kept per session and span
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("zkzk_span", default=None)
+_ids = itertools.count(1)
+
+
+def _graph_session() -> Optional[str]:
+    """The running graph's thread_id, if called inside a graph run."""
+    try:
+        from langgraph.config import get_config
+
+        return get_config().get("configurable", {}).get("thread_id")
+    except (ImportError, RuntimeError):
+        return None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (``q`` in 0–100) of ``values``."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+class Span:
+    __slots__ = ("id", "parent", "kind", "name", "session", "start", "attrs", "_t0")
+
+    def __init__(self, kind: str, name: str, parent: Optional["Span"], session: Optional[str], attrs: dict):
+        self.id = next(_ids)
+        self.parent = parent
+        self.kind = kind
+        self.name = name
+        self.session = session or (parent.session if parent else None)
+        self.start = time.time()
+        self.attrs = attrs
+        self._t0 = time.perf_counter()
+
+    def add_llm_call(self, metrics: dict) -> None:
+        """Fold one LLM call into this span (several calls add up; TTFT is the first)."""
+        self.attrs["llm_calls"] = self.attrs.get("llm_calls", 0) + 1
+        for key, value in metrics.items():
+            if value is None:
+                continue
+            if key in ("ttft_ms", "model"):
+                self.attrs.setdefault(key, value)
+            else:
+                self.attrs[key] = self.attrs.get(key, 0) + value
+        if self.attrs.get("eval_ms"):
+            self.attrs["tokens_per_s"] = self.attrs.get("eval_count", 0) / (self.attrs["eval_ms"] / 1000)
+
+    def record(self, duration_ms: float) -> dict:
+        return {
+            "ts": round(self.start, 3),
+            "id": self.id,
+            "parent": self.parent.id if self.parent else None,
+            "session": self.session,
+            "kind": self.kind,
+            "name": self.name,
+            "duration_ms": round(duration_ms, 2),
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.attrs.items()},
+        }
+
+
+class DeferredSpan:
+    """Stands in for a span chosen later: LLM calls are held until :meth:`hand_to`,
+    then forwarded (a call still streaming lands there when it ends)."""
+
+    id = None
+    session = None
+
+    def __init__(self):
+        self._calls: List[dict] = []
+        self._target: Optional[Span] = None
+        self._lock = threading.Lock()
+
+    def add_llm_call(self, metrics: dict) -> None:
+        with self._lock:
+            if self._target is None:
+                self._calls.append(metrics)
+                return
+            target = self._target
+        target.add_llm_call(metrics)
+
+    def hand_to(self, span: Span) -> None:
+        with self._lock:
+            self._target = span
+            calls, self._calls = self._calls, []
+        for metrics in calls:
+            span.add_llm_call(metrics)
+
+
+class Tracer:
+    def __init__(self, enabled: bool = TRACING_ENABLED, path=None):
+        self.enabled = enabled
+        self._path = path
+        self._sink: Optional[logging.Logger] = None
+        self._lock = threading.Lock()
+        # session -> "kind:name" -> recent span records
+        self._samples: Dict[str, Dict[str, deque]] = defaultdict(
+            lambda: defaultdict(lambda: deque(maxlen=TRACE_WINDOW))
+        )
+
+    def _get_sink(self) -> logging.Logger:
+        if self._sink is None:
+            with self._lock:
+                if self._sink is None:
+                    sink = logging.getLogger("zkzk.trace")
+                    sink.propagate = False
+                    sink.setLevel(logging.INFO)
+                    handler = RotatingFileHandler(
+                        self._path or data_path("traces.jsonl"),
+                        maxBytes=int(TRACE_FILE_MB * 2**20),
+                        backupCount=TRACE_BACKUPS,
+                        encoding="utf-8",
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    sink.addHandler(handler)
+                    self._sink = sink
+        return self._sink
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        return _current.get()
+
+    @contextmanager
+    def span(self, kind: str, name: str, session: Optional[str] = None, **attrs):
+        """Time the block as a span (yields the span, or None when tracing is off)."""
+        if not self.enabled:
+            yield None
+            return
+        span = Span(kind, name, _current.get(), session or _graph_session(), attrs)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            self._finish(span, (time.perf_counter() - span._t0) * 1000)
+
+    @contextmanager
+    def attach(self, span):
+        """Make ``span`` (e.g. a :class:`DeferredSpan`) the active one for the block."""
+        token = _current.set(span)
+        try:
+            yield span
+        finally:
+            _current.reset(token)
+
+    def _finish(self, span: Span, duration_ms: float) -> None:
+        record = span.record(duration_ms)
+        if span.session:
+            with self._lock:
+                self._samples[span.session][f"{span.kind}:{span.name}"].append(record)
+        try:
+            self._get_sink().info(json.dumps(record, ensure_ascii=False, default=str))
+        except OSError as e:
+            logger.warning(f"[TRACE] Could not write span: {e}")
+
+    def forget(self, session: str) -> None:
+        """Drop ``session``'s samples (its spans stay in the trace file)."""
+        with self._lock:
+            self._samples.pop(session, None)
+
+    # ------------------------------------------------------------------ #
+    # Summary
+    # ------------------------------------------------------------------ #
+    def summary(self, session: str) -> List[dict]:
+        """p50/p95 per span name for ``session``, turns first, then by total time."""
+        with self._lock:
+            groups = {key: list(records) for key, records in self._samples.get(session, {}).items()}
+        rows = []
+        for key, records in groups.items():
+            kind, name = key.split(":", 1)
+            durations = [r["duration_ms"] for r in records]
+            ttfts = [r["ttft_ms"] for r in records if r.get("ttft_ms") is not None]
+            speeds = [r["tokens_per_s"] for r in records if r.get("tokens_per_s")]
+            rows.append({
+                "kind": kind,
+                "name": name,
+                "count": len(records),
+                "total_ms": sum(durations),
+                "p50_ms": percentile(durations, 50),
+                "p95_ms": percentile(durations, 95),
+                "ttft_p50_ms": percentile(ttfts, 50),
+                "ttft_p95_ms": percentile(ttfts, 95),
+                "tokens_per_s_p50": percentile(speeds, 50),
+                "prompt_eval_count": sum(r.get("prompt_eval_count", 0) for r in records),
+                "eval_count": sum(r.get("eval_count", 0) for r in records),
+                "errors": sum(1 for r in records if r.get("error") or r.get("status") == "error"),
+            })
+        order = {"turn": 0, "node": 1, "tool": 2}
+        rows.sort(key=lambda r: (order.get(r["kind"], 3), -r["total_ms"]))
+        return rows
+
+
+class LLMTraceCallback(BaseCallbackHandler):
+    """Adds TTFT and Ollama's eval counters of every LLM call to the active span."""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._calls: Dict[UUID, list] = {}  # run_id -> [start, first_token, span]
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        span = self.tracer.current()
+        if span is not None:
+            if len(self._calls) > 256:  # calls abandoned mid-stream never end
+                self._calls.pop(next(iter(self._calls)), None)
+            self._calls[run_id] = [time.perf_counter(), None, span]
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs) -> None:
+        call = self._calls.get(run_id)
+        if call is not None and call[1] is None:
+            call[1] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        start, first, span = call
+        info = {}
+        for generations in response.generations:
+            for generation in generations:
+                info.update(generation.generation_info or {})
+                message = getattr(generation, "message", None)
+                if message is not None:
+                    info.update(message.response_metadata or {})
+        span.add_llm_call({
+            "model": info.get("model_name") or info.get("model"),
+            "ttft_ms": (first - start) * 1000 if first is not None else None,
+            "prompt_eval_count": info.get("prompt_eval_count"),
+            "prompt_eval_ms": (info.get("prompt_eval_duration") or 0) / 1e6,
+            "eval_count": info.get("eval_count"),
+            "eval_ms": (info.get("eval_duration") or 0) / 1e6,
+            "load_ms": (info.get("load_duration") or 0) / 1e6,
+        })
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs) -> None:
+        self._calls.pop(run_id, None)
+
+
+tracer = Tracer()
+llm_trace_callback = LLMTraceCallback(tracer)
@@ -1,13 +1,16 @@
-import logging, os, sys
+import logging, os, sys, uuid
 from dotenv import load_dotenv
 load_dotenv()  # Load .env before any module reads os.getenv()
 
 from langchain_core.messages import HumanMessage, AIMessage
-from core.agent import app
+from core.agent import compile_app
+from core.checkpointer import get_checkpointer
+from core.preload import preloader
 
 # from modules.voice_module import VoiceModule
 from models.tts import speak
 from preprocessing.strip_think_tags import strip_think_tags
+from preprocessing.history_summary import history_summarizer
 
 # -------------------------
 # Configure logging
@@ -28,34 +31,27 @@ logger = logging.getLogger(__name__)
 
 # voice_module = VoiceModule()
 
+# State lives in the checkpointer (CHECKPOINTS=0 keeps it in memory here).
+app = compile_app(get_checkpointer())
+config = {"configurable": {"thread_id": os.getenv("ZKZK_SESSION") or uuid.uuid4().hex[:12]}}
+
 # -------------------------
 # Main Execution
 # -------------------------
 def main():
     logger.info("[MAIN] Starting AI assistant")
 
-    # Warm-up the model
-    logger.info(
-        "Initializing and loading local AI model (this may take a few seconds)..."
-    )
-
-    # Initial State
-    messages = [
-        HumanMessage(content="this is a warm up message, generate a short response"),
-    ]
-
+    # Load the models in the background; the first request waits for it.
+    logger.info("[MAIN] Loading models in the background...")
+    preloader.start()
     current_state = {
-        "messages": messages,
+        "messages": [],
         "pending_confirmation": {"tool_name": None, "user_message": None},
         "running_processes": {},
         "category": None,
         "iteration_count": 0,
     }
-
-    logger.info("[MAIN] Warming up model...")
-    final_state = app.invoke(current_state)
-    current_state = final_state
-    logger.info("[MAIN] Model warm-up complete.")
+    logger.info(f"[MAIN] Session: {config['configurable']['thread_id']}")
 
     logger.info("AI Assistant Ready. Type 'exit' or 'quit' to stop.")
     logger.info(
@@ -86,13 +82,25 @@ def main():
             if user_input.lower() in ["exit", "quit", ""]:
                 break
 
+            if not preloader.done:
+                logger.info("[MAIN] Waiting for the models to finish loading...")
+                preloader.wait()
+
             # Append user message
-            current_state["messages"].append(HumanMessage(content=user_input))
-            current_state["iteration_count"] = 0  # Reset step counter for new request
+            message = HumanMessage(content=user_input)
+            if app.checkpointer is not None:
+                turn_input = {"messages": [message], "iteration_count": 0}
+                if not app.checkpointer.has_thread(config["configurable"]["thread_id"]):
+                    turn_input = {**current_state, **turn_input}
+            else:
+                current_state["messages"].append(message)
+                current_state["iteration_count"] = 0  # Reset step counter for new request
+                turn_input = current_state
 
-            final_state = app.invoke(current_state)
+            final_state = app.invoke(turn_input, config)
 
             current_state = final_state
+            history_summarizer.schedule(current_state)
 
             last_msg = current_state["messages"][-1]
             if isinstance(last_msg, AIMessage):
@@ -1,19 +1,8 @@
-from langchain_ollama import ChatOllama
-import pathlib , os
-from dotenv import load_dotenv
+from models.registry import model_registry
 
-base_dir = pathlib.Path(__file__).parent.parent
-load_dotenv(base_dir / ".env")
+# The executor's model is "the" model for code that does not name a node.
+# Node-specific instances come from ``model_registry.get(<node>)``.
+MODEL_NAME = model_registry.model_name("executor")
+BASE_URL = model_registry.base_url
 
-MODEL_NAME = (os.getenv("OLLAMA_MODEL") or "qwen3:1.7b-q4_K_M").strip()
-BASE_URL = (os.getenv("OLLAMA_BASE_URL") or "http://127.0.0.1:11434").strip()
-
-llm = ChatOllama(
-    model=MODEL_NAME,
-    timeout=30,
-    base_url=BASE_URL,
-    use_mmap=True,
-    keep_alive=1000000,
-    stream=True,
-    reasoning = False,
-)
+llm = model_registry.get("executor")
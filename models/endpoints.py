@@ -0,0 +1,335 @@
+"""Pool of Ollama endpoints with health probes and least-loaded dispatch.
+
+``OLLAMA_BASE_URLS`` (comma-separated) lists the hosts; without it the pool
+holds just ``OLLAMA_BASE_URL``. Each LLM call goes to one endpoint:
+
+* a chat session (the graph's ``thread_id``) is pinned to the endpoint that
+  served it first, so Ollama's KV cache for the conversation prefix stays warm
+  there;
+* otherwise the healthy endpoint with the lowest ``(in_flight + 1) × latency``
+  score wins (latency is an EWMA of time-to-first-chunk, seeded by the probes).
+  A session moves when its endpoint is down or lacks the model; if the pinned
+  endpoint just has ``OLLAMA_PIN_MAX_INFLIGHT`` requests running, that one call
+  borrows another endpoint and the pin stays. Pins are dropped when the
+  server closes a session (:meth:`EndpointPool.unpin`), and only the
+  ``OLLAMA_MAX_PINS`` most recently used are kept.
+
+A background thread probes ``/api/tags`` every ``OLLAMA_PROBE_INTERVAL``
+seconds, which tracks both health and the models each host has. A request
+that fails before its first chunk (connection refused, timeout, 5xx, model
+missing) marks the endpoint and is retried on the next one. A failure after
+streaming has started is raised, since replaying would duplicate output; the
+session's next call is simply re-pinned elsewhere.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional
+
+import httpx
+from langchain_ollama import ChatOllama
+from ollama import AsyncClient, Client, ResponseError
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+PROBE_INTERVAL = float(os.getenv("OLLAMA_PROBE_INTERVAL", "5"))
+CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "120"))
+PIN_MAX_INFLIGHT = int(os.getenv("OLLAMA_PIN_MAX_INFLIGHT", "4"))
+MAX_PINS = int(os.getenv("OLLAMA_MAX_PINS", "1024"))
+
+_EWMA = 0.3
+_RETRYABLE = (httpx.TransportError, ConnectionError)
+
+
+def configured_urls() -> List[str]:
+    urls = os.getenv("OLLAMA_BASE_URLS") or os.getenv("OLLAMA_BASE_URL") or "http://127.0.0.1:11434"
+    return [u.strip().rstrip("/") for u in urls.split(",") if u.strip()]
+
+
+def _session_key() -> Optional[str]:
+    """The running graph's thread_id, if this call happens inside a graph run."""
+    try:
+        from langgraph.config import get_config
+
+        return get_config().get("configurable", {}).get("thread_id")
+    except (ImportError, RuntimeError):
+        return None
+
+
+class Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        timeout = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+        self.client = Client(host=url, timeout=timeout)
+        self.async_client = AsyncClient(host=url, timeout=timeout)
+        self.healthy = True  # optimistic until the first probe says otherwise
+        self.in_flight = 0
+        self.latency = 1.0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.failed_at = 0.0
+        self.models: Optional[set] = None  # None = not probed yet
+
+    def has_model(self, model: Optional[str]) -> bool:
+        if model is None or self.models is None:
+            return True
+        return model in self.models or f"{model}:latest" in self.models
+
+    def score(self) -> float:
+        return (self.in_flight + 1) * self.latency
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "latency_s": self.latency,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "models": sorted(self.models) if self.models is not None else None,
+        }
+
+
+class EndpointPool:
+    def __init__(
+        self, urls: Optional[List[str]] = None, probe_interval: float = PROBE_INTERVAL, max_pins: int = MAX_PINS
+    ):
+        self.endpoints = [Endpoint(u) for u in (urls or configured_urls())]
+        self.probe_interval = probe_interval
+        self.max_pins = max(1, max_pins)
+        self._pins: "OrderedDict[str, Endpoint]" = OrderedDict()  # LRU: least recently used first
+        self._lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.failovers = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.endpoints)
+
+    # ------------------------------------------------------------------ #
+    # Health probes
+    # ------------------------------------------------------------------ #
+    def probe(self, endpoint: Endpoint) -> bool:
+        started = time.perf_counter()
+        try:
+            response = httpx.get(f"{endpoint.url}/api/tags", timeout=CONNECT_TIMEOUT)
+            response.raise_for_status()
+            models = {m.get("model") or m.get("name") for m in response.json().get("models", [])}
+        except Exception as e:  # noqa: BLE001
+            if endpoint.healthy:
+                logger.warning(f"[ENDPOINTS] {endpoint.url} is down: {e}")
+            with self._lock:
+                endpoint.healthy = False
+                endpoint.last_error = str(e)
+            return False
+        with self._lock:
+            if not endpoint.healthy:
+                logger.info(f"[ENDPOINTS] {endpoint.url} is back")
+            endpoint.healthy = True
+            endpoint.models = models
+            if endpoint.requests == 0:
+                endpoint.latency = time.perf_counter() - started
+        return True
+
+    def probe_all(self) -> None:
+        for endpoint in self.endpoints:
+            self.probe(endpoint)
+
+    def _probe_loop(self) -> None:
+        while True:
+            self.probe_all()
+            if self._stop.wait(self.probe_interval):
+                return
+
+    def start(self) -> None:
+        """Start background probing (idempotent; a single endpoint needs none)."""
+        if self.size < 2 or self._probe_thread is not None:
+            return
+        with self._lock:
+            if self._probe_thread is not None:
+                return
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop, name="ollama-probe", daemon=True
+            )
+            self._probe_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ------------------------------------------------------------------ #
+    # Dispatch
+    # ------------------------------------------------------------------ #
+    def acquire(self, model: Optional[str] = None, session: Optional[str] = None, exclude=()) -> Endpoint:
+        self.start()
+        with self._lock:
+            candidates = [
+                e for e in self.endpoints if e.url not in exclude and e.healthy and e.has_model(model)
+            ]
+            pinned = self._pins.get(session) if session else None
+            if pinned in candidates and pinned.in_flight < PIN_MAX_INFLIGHT:
+                endpoint = pinned
+            elif candidates:
+                endpoint = min(candidates, key=Endpoint.score)
+            else:
+                # Nothing looks healthy — probes may be stale, so try the
+                # endpoint that failed longest ago rather than giving up.
+                rest = [e for e in self.endpoints if e.url not in exclude] or self.endpoints
+                endpoint = min(rest, key=lambda e: e.failed_at)
+            # Pin new sessions, and move a pin only when its endpoint can't serve
+            # (an overloaded pin just borrows another endpoint for this call).
+            if session and pinned not in candidates:
+                if pinned is not None:
+                    logger.info(f"[ENDPOINTS] Session {session} moved {pinned.url} → {endpoint.url}")
+                self._pins[session] = endpoint
+                while len(self._pins) > self.max_pins:
+                    self._pins.popitem(last=False)
+            if session in self._pins:
+                self._pins.move_to_end(session)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+        return endpoint
+
+    def unpin(self, session: str) -> None:
+        """Forget ``session``'s endpoint (the session was closed)."""
+        with self._lock:
+            self._pins.pop(session, None)
+
+    def release(self, endpoint: Endpoint, first_chunk_s: Optional[float] = None, error=None) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+            if first_chunk_s is not None:
+                endpoint.latency = (1 - _EWMA) * endpoint.latency + _EWMA * first_chunk_s
+            if error is not None:
+                endpoint.failures += 1
+                endpoint.last_error = str(error)
+                endpoint.failed_at = time.time()
+
+    def mark_down(self, endpoint: Endpoint, error) -> None:
+        logger.warning(f"[ENDPOINTS] {endpoint.url} failed ({error}) — failing over")
+        with self._lock:
+            endpoint.healthy = False
+            self.failovers += 1
+
+    def mark_missing(self, endpoint: Endpoint, model: str) -> None:
+        with self._lock:
+            if endpoint.models is not None:
+                endpoint.models.discard(model)
+            else:
+                endpoint.models = set()
+            self.failovers += 1
+
+    def _retryable(self, endpoint: Endpoint, model: str, error) -> bool:
+        """Classify a pre-stream failure; True if another endpoint should be tried."""
+        if isinstance(error, _RETRYABLE):
+            self.mark_down(endpoint, error)
+            return True
+        if isinstance(error, ResponseError):
+            if error.status_code == 404:
+                logger.warning(f"[ENDPOINTS] {endpoint.url} does not have {model} — failing over")
+                self.mark_missing(endpoint, model)
+                return True
+            if error.status_code in (429, 500, 502, 503, 504):
+                self.mark_down(endpoint, error)
+                return True
+        return False
+
+    def stream(self, model: str, call, session: Optional[str] = None) -> Iterator:
+        """Run ``call(endpoint)`` (a sync chunk iterator) with failover before the first chunk."""
+        tried: set = set()
+        while True:
+            endpoint = self.acquire(model, session, exclude=tried)
+            started = time.perf_counter()
+            first = None
+            try:
+                for part in call(endpoint):
+                    if first is None:
+                        first = time.perf_counter() - started
+                    yield part
+            except Exception as e:
+                self.release(endpoint, first, error=e)
+                tried.add(endpoint.url)
+                if first is None and len(tried) < self.size and self._retryable(endpoint, model, e):
+                    continue
+                raise
+            except BaseException:  # consumer closed the stream / task cancelled
+                self.release(endpoint, first)
+                raise
+            self.release(endpoint, first)
+            return
+
+    async def astream(self, model: str, call, session: Optional[str] = None):
+        """Async :meth:`stream`; ``call(endpoint)`` returns an async chunk iterator."""
+        tried: set = set()
+        while True:
+            endpoint = self.acquire(model, session, exclude=tried)
+            started = time.perf_counter()
+            first = None
+            try:
+                async for part in call(endpoint):
+                    if first is None:
+                        first = time.perf_counter() - started
+                    yield part
+            except Exception as e:
+                self.release(endpoint, first, error=e)
+                tried.add(endpoint.url)
+                if first is None and len(tried) < self.size and self._retryable(endpoint, model, e):
+                    continue
+                raise
+            except BaseException:  # consumer closed the stream / task cancelled
+                self.release(endpoint, first)
+                raise
+            self.release(endpoint, first)
+            return
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "endpoints": [e.stats() for e in self.endpoints],
+                "pinned_sessions": len(self._pins),
+                "failovers": self.failovers,
+            }
+
+
+class PooledChatOllama(ChatOllama):
+    """``ChatOllama`` whose requests are dispatched through an :class:`EndpointPool`."""
+
+    _pool: EndpointPool = PrivateAttr()
+
+    def __init__(self, pool: EndpointPool, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._pool = pool
+
+    def _create_chat_stream(self, messages, stop=None, **kwargs):
+        chat_params = self._chat_params(messages, stop, **kwargs)
+
+        def call(endpoint: Endpoint):
+            if chat_params["stream"]:
+                yield from endpoint.client.chat(**chat_params)
+            else:
+                yield endpoint.client.chat(**chat_params)
+
+        yield from self._pool.stream(self.model, call, _session_key())
+
+    async def _acreate_chat_stream(self, messages, stop=None, **kwargs):
+        chat_params = self._chat_params(messages, stop, **kwargs)
+
+        async def call(endpoint: Endpoint):
+            if chat_params["stream"]:
+                async for part in await endpoint.async_client.chat(**chat_params):
+                    yield part
+            else:
+                yield await endpoint.async_client.chat(**chat_params)
+
+        async for part in self._pool.astream(self.model, call, _session_key()):
+            yield part
+
+
+endpoint_pool = EndpointPool()
@@ -0,0 +1,292 @@
+"""Per-node model pool.
+
+Every node used to share one ``ChatOllama`` with one set of options. The
+router only emits a short JSON label, so it can run on a much smaller model
+with a small context and output cap, while the executor keeps the larger one.
+
+Each node (``router``, ``planner``, ``executor``, ``conversational``,
+``deploy``, ``summarizer``) resolves its settings in this order:
+
+1. ``OLLAMA_<FIELD>_<NODE>`` env vars, e.g. ``OLLAMA_MODEL_ROUTER=qwen3:0.6b``,
+   ``OLLAMA_NUM_PREDICT_ROUTER=128``;
+2. ``nodes.<node>`` in the YAML file named by ``MODELS_CONFIG`` (default
+   ``models.yaml`` in the repo root, see ``models.example.yaml``);
+3. the YAML ``defaults`` section;
+4. the global env vars ``OLLAMA_MODEL``, ``OLLAMA_NUM_CTX``, … and the
+   built-in defaults.
+
+Nodes whose settings are identical share one ``ChatOllama`` instance.
+"""
+
+import logging
+import os
+import pathlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import httpx
+import yaml
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_ollama import ChatOllama
+
+from core.tracing import TRACING_ENABLED, llm_trace_callback
+from models.endpoints import EndpointPool, PooledChatOllama, endpoint_pool, CONNECT_TIMEOUT, READ_TIMEOUT
+
+base_dir = pathlib.Path(__file__).parent.parent
+load_dotenv(base_dir / ".env")
+
+logger = logging.getLogger(__name__)
+
+NODES = ("router", "planner", "executor", "conversational", "deploy", "summarizer")
+
+DEFAULT_MODEL = "qwen3:1.7b-q4_K_M"
+DEFAULT_KEEP_ALIVE = 1000000
+MODELS_CONFIG = pathlib.Path(os.getenv("MODELS_CONFIG") or base_dir / "models.yaml")
+
+_FIELDS = ("model", "num_ctx", "num_predict", "num_thread", "keep_alive")
+
+
+class ModelConfig(NamedTuple):
+    model: str
+    num_ctx: Optional[int] = None
+    num_predict: Optional[int] = None
+    num_thread: Optional[int] = None
+    keep_alive: Any = DEFAULT_KEEP_ALIVE
+
+    def options(self) -> Dict[str, int]:
+        """Ollama load-time options (a different value forces a model reload)."""
+        return {
+            k: v for k, v in (("num_ctx", self.num_ctx), ("num_thread", self.num_thread))
+            if v is not None
+        }
+
+
+def _coerce(field: str, value):
+    if value in (None, ""):
+        return None
+    if field == "model":
+        return str(value).strip()
+    if field == "keep_alive":
+        text = str(value).strip()
+        return int(text) if text.lstrip("-").isdigit() else text  # "30m", "-1", 600
+    return int(value)
+
+
+def _load_yaml(path: pathlib.Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        data = yaml.safe_load(f) or {}
+    logger.info(f"[MODELS] Loaded model config from {path}")
+    return data
+
+
+def resolve_configs(path: pathlib.Path = MODELS_CONFIG, env=os.environ) -> Dict[str, ModelConfig]:
+    data = _load_yaml(path)
+    defaults = data.get("defaults") or {}
+    nodes = data.get("nodes") or {}
+
+    configs = {}
+    for node in NODES:
+        values = {}
+        for field in _FIELDS:
+            value = None
+            for source in (
+                env.get(f"OLLAMA_{field.upper()}_{node.upper()}"),
+                (nodes.get(node) or {}).get(field),
+                defaults.get(field),
+                env.get(f"OLLAMA_{field.upper()}"),
+            ):
+                value = _coerce(field, source)
+                if value is not None:
+                    break
+            if value is not None:
+                values[field] = value
+        values.setdefault("model", DEFAULT_MODEL)
+        configs[node] = ModelConfig(**values)
+    return configs
+
+
+class ModelUsage(BaseCallbackHandler):
+    """Collects Ollama's eval counters from every finished call, per model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.models: Dict[str, Dict[str, float]] = {}
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                info = dict(generation.generation_info or {})
+                message = getattr(generation, "message", None)
+                if message is not None:
+                    info = {**(message.response_metadata or {}), **info}
+                if "eval_count" in info:
+                    self._record(info)
+
+    def _record(self, info: dict) -> None:
+        model = info.get("model_name") or info.get("model") or "?"
+        with self._lock:
+            row = self.models.setdefault(model, {
+                "calls": 0, "eval_count": 0, "eval_s": 0.0,
+                "prompt_eval_count": 0, "prompt_eval_s": 0.0, "load_s": 0.0,
+            })
+            row["calls"] += 1
+            row["eval_count"] += info.get("eval_count") or 0
+            row["eval_s"] += (info.get("eval_duration") or 0) / 1e9
+            row["prompt_eval_count"] += info.get("prompt_eval_count") or 0
+            row["prompt_eval_s"] += (info.get("prompt_eval_duration") or 0) / 1e9
+            row["load_s"] += (info.get("load_duration") or 0) / 1e9
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            rows = {m: dict(r) for m, r in self.models.items()}
+        for row in rows.values():
+            row["tokens_per_s"] = row["eval_count"] / row["eval_s"] if row["eval_s"] else 0.0
+            row["prompt_tokens_per_s"] = (
+                row["prompt_eval_count"] / row["prompt_eval_s"] if row["prompt_eval_s"] else 0.0
+            )
+        return rows
+
+
+class ModelRegistry:
+    def __init__(self, configs: Optional[Dict[str, ModelConfig]] = None, pool: EndpointPool = endpoint_pool):
+        self.configs = configs or resolve_configs()
+        self.pool = pool
+        self.base_url = pool.endpoints[0].url
+        self.usage = ModelUsage()
+        self.preload_seconds: Dict[str, float] = {}
+        self._instances: Dict[ModelConfig, ChatOllama] = {}
+        self._lock = threading.Lock()
+        self._warn_conflicts()
+
+    def config(self, node: str) -> ModelConfig:
+        return self.configs[node]
+
+    def model_name(self, node: str) -> str:
+        return self.configs[node].model
+
+    def get(self, node: str) -> ChatOllama:
+        """The ``ChatOllama`` for ``node`` (shared by nodes with identical settings)."""
+        config = self.configs[node]
+        llm = self._instances.get(config)
+        if llm is None:
+            with self._lock:
+                llm = self._instances.get(config)
+                if llm is None:
+                    kwargs = dict(
+                        model=config.model,
+                        base_url=self.base_url,
+                        client_kwargs={"timeout": httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)},
+                        use_mmap=True,
+                        keep_alive=config.keep_alive,
+                        num_ctx=config.num_ctx,
+                        num_predict=config.num_predict,
+                        num_thread=config.num_thread,
+                        stream=True,
+                        reasoning=False,
+                        callbacks=[self.usage, llm_trace_callback] if TRACING_ENABLED else [self.usage],
+                    )
+                    # Several hosts: dispatch each call through the endpoint pool.
+                    llm = PooledChatOllama(self.pool, **kwargs) if self.pool.size > 1 else ChatOllama(**kwargs)
+                    self._instances[config] = llm
+        return llm
+
+    def _warn_conflicts(self) -> None:
+        """Ollama keeps one runner per model: differing load options mean reloads."""
+        seen: Dict[str, tuple] = {}
+        for node, config in self.configs.items():
+            previous = seen.setdefault(config.model, (node, config.options()))
+            if previous[1] != config.options():
+                logger.warning(
+                    f"[MODELS] {previous[0]} and {node} both use {config.model} with different "
+                    f"num_ctx/num_thread ({previous[1]} vs {config.options()}) — Ollama will "
+                    f"reload the model whenever they alternate"
+                )
+
+    # ------------------------------------------------------------------ #
+    # Preload / report
+    # ------------------------------------------------------------------ #
+    def preload(self, nodes=NODES) -> Dict[str, Optional[str]]:
+        """Load every distinct model into Ollama in parallel, on every endpoint.
+
+        Returns ``{model: error or None}`` (an error only if no endpoint could
+        load it). An empty prompt makes Ollama load the model (with the node's
+        num_ctx/num_thread) without generating.
+        """
+        targets: Dict[str, ModelConfig] = {}
+        for node in nodes:
+            config = self.configs[node]
+            targets.setdefault(config.model, config)
+        jobs = [(endpoint, config) for config in targets.values() for endpoint in self.pool.endpoints]
+
+        def load(job) -> Optional[str]:
+            endpoint, config = job
+            start = time.perf_counter()
+            try:
+                endpoint.client.generate(
+                    model=config.model, prompt="", keep_alive=config.keep_alive,
+                    options=config.options() or None,
+                )
+            except Exception as e:  # noqa: BLE001 — report, don't crash startup
+                logger.warning(f"[MODELS] Could not preload {config.model} on {endpoint.url}: {e}")
+                return str(e)
+            took = time.perf_counter() - start
+            self.preload_seconds[config.model] = max(self.preload_seconds.get(config.model, 0.0), took)
+            logger.info(f"[MODELS] {config.model} loaded on {endpoint.url} in {took:.1f}s")
+            return None
+
+        with ThreadPoolExecutor(max_workers=max(1, len(jobs)), thread_name_prefix="preload") as pool:
+            errors = list(pool.map(load, jobs))
+        results: Dict[str, Optional[str]] = {}
+        for (_, config), error in zip(jobs, errors):
+            if error is None or results.get(config.model, error) is None:
+                results[config.model] = None
+            else:
+                results[config.model] = error
+        return results
+
+    def loaded(self) -> Dict[str, dict]:
+        """Models Ollama currently holds in memory (``/api/ps``), summed over endpoints."""
+        loaded: Dict[str, dict] = {}
+        for endpoint in self.pool.endpoints:
+            try:
+                response = endpoint.client.ps()
+            except Exception as e:  # noqa: BLE001
+                logger.warning(f"[MODELS] /api/ps on {endpoint.url} failed: {e}")
+                continue
+            for m in response.models:
+                row = loaded.setdefault(m.model, {"size": 0, "size_vram": 0, "endpoints": []})
+                row["size"] += m.size or 0
+                row["size_vram"] += m.size_vram or 0
+                row["endpoints"].append(endpoint.url)
+        return loaded
+
+    def report(self) -> List[dict]:
+        """One row per configured model: nodes, memory use and measured speed."""
+        loaded = self.loaded()
+        usage = self.usage.snapshot()
+        rows = {}
+        for node, config in self.configs.items():
+            row = rows.setdefault(config.model, {"model": config.model, "nodes": []})
+            row["nodes"].append(node)
+        for model, row in rows.items():
+            row["loaded"] = model in loaded
+            row.update({k: v for k, v in loaded.get(model, {}).items()})
+            row.update(usage.get(model, {}))
+            row["preload_s"] = self.preload_seconds.get(model)
+        return list(rows.values())
+
+    def describe(self) -> str:
+        """Short label for the CLI banner, e.g. ``qwen3:1.7b (router qwen3:0.6b)``."""
+        main = self.model_name("executor")
+        others = sorted({
+            f"{node} {c.model}" for node, c in self.configs.items() if c.model != main
+        })
+        return main + (f" ({', '.join(others)})" if others else "")
+
+
+model_registry = ModelRegistry()
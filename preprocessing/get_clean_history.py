@@ -1,7 +1,32 @@
+import logging
+import os
+
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 
+logger = logging.getLogger(__name__)
+
+
+def _budget(name: str):
+    value = os.getenv(name, "").strip()
+    return int(value) if value and int(value) > 0 else None
+
 
-def get_clean_history(state: dict, include_tool_messages: bool = True) -> list:
+# Per-node prompt budgets for the history (tokens). Unset / 0 = full history.
+HISTORY_BUDGETS = {
+    "execute": _budget("HISTORY_BUDGET_EXECUTE"),
+    "conversational": _budget("HISTORY_BUDGET_CONVERSATIONAL"),
+}
+
+# Latest windowing report per node — kept / summarized / dropped token counts.
+history_reports = {}
+
+
+def get_clean_history(
+    state: dict,
+    include_tool_messages: bool = True,
+    token_budget: int = None,
+    node: str = "",
+) -> list:
     """
     Returns a filtered list of messages from the state.
 
@@ -9,6 +34,12 @@ def get_clean_history(state: dict, include_tool_messages: bool = True) -> list:
         include_tool_messages: If True (default), ToolMessages are included so
             the executor LLM can see tool results. Set to False for router/planner
             nodes that only need the human/AI conversation flow.
+        token_budget: Optional budget (estimated tokens) for the returned
+            history. The last HISTORY_KEEP_TURNS turns are kept verbatim, older
+            turns are replaced by the rolling summary built in the background
+            by ``history_summarizer``, and whatever still does not fit is
+            dropped oldest-turn first. None (default) returns everything.
+        node: Name used when logging / recording the windowing report.
     """
     raw_messages = state.get("messages", [])
 
@@ -19,4 +50,55 @@ def get_clean_history(state: dict, include_tool_messages: bool = True) -> list:
         # Strip tool results — lighter context for router/planner
         allowed = (HumanMessage, AIMessage)
 
-    return [msg for msg in raw_messages if isinstance(msg, allowed)]
+    messages = [msg for msg in raw_messages if isinstance(msg, allowed)]
+    if token_budget is None:
+        return messages
+    return _window(messages, token_budget, node)
+
+
+def _window(messages: list, token_budget: int, node: str) -> list:
+    from core.context import estimate_tokens
+    from preprocessing.history_summary import history_summarizer, split_turns
+
+    fold = history_summarizer.fold_point(messages)
+    older, recent = messages[:fold], messages[fold:]
+
+    # The summary may cover only part of `older` if the latest fold is still
+    # being summarized; the uncovered tail is kept verbatim if it fits.
+    summary, covered = history_summarizer.lookup(older) if older else (None, 0)
+    uncovered = older[covered:]
+
+    recent_turns = split_turns(recent)
+    kept_turns = []
+    used = 0
+    summary_message = None
+    if summary:
+        summary_message = HumanMessage(content=f"[CONVERSATION SUMMARY] {summary}")
+        used += estimate_tokens(summary_message)
+
+    # Newest turns first; the latest turn is always kept whole.
+    for turn in reversed(split_turns(uncovered) + recent_turns):
+        cost = sum(estimate_tokens(m) for m in turn)
+        if kept_turns and used + cost > token_budget:
+            break
+        kept_turns.insert(0, turn)
+        used += cost
+
+    kept = [m for turn in kept_turns for m in turn]
+    kept_ids = {id(m) for m in kept}
+    summarized = sum(estimate_tokens(m) for m in older[:covered]) if summary else 0
+    dropped = sum(estimate_tokens(m) for m in messages if id(m) not in kept_ids) - summarized
+
+    report = {
+        "kept_tokens": used,
+        "kept_messages": len(kept),
+        "summarized_tokens": summarized,
+        "dropped_tokens": dropped,
+        "budget": token_budget,
+    }
+    history_reports[node or "default"] = report
+    logger.info(
+        f"[HISTORY] {node or 'history'}: kept ~{used}/{token_budget} tokens ({len(kept)} msgs)"
+        f", summarized ~{summarized}, dropped ~{dropped}"
+    )
+    return ([summary_message] if summary_message else []) + kept
@@ -0,0 +1,176 @@
+"""Rolling summary of old conversation turns, built off the critical path.
+
+After each turn the front end calls ``history_summarizer.schedule(state)``.
+Everything older than the last ``HISTORY_KEEP_TURNS`` turns is folded into a
+rolling summary on a background thread (previous summary + newly folded
+messages → new summary). ``get_clean_history`` then only has to look the
+summary up — it never waits for the LLM.
+
+Summaries are keyed by the id of the last human or AI message they cover, so
+the same store serves any number of sessions, and both the executor's view of
+the history and the conversational node's tool-free view find them.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from preprocessing.strip_think_tags import strip_think_tags
+
+logger = logging.getLogger(__name__)
+
+KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+MAX_SUMMARIES = 256
+# Each folded message is clipped before it is sent to the summarizer.
+MAX_CHARS_PER_MESSAGE = 600
+
+
+def message_key(message) -> str:
+    key = getattr(message, "id", None)
+    if key:
+        return key
+    content = getattr(message, "content", message)
+    return hashlib.sha1(f"{type(message).__name__}:{content!r}".encode()).hexdigest()
+
+
+def split_turns(messages) -> List[list]:
+    """Group messages into turns; a turn starts at every HumanMessage.
+
+    AI tool calls and their ToolMessages never start a turn, so a tool call
+    and its results are always kept or folded together.
+    """
+    turns = []
+    for m in messages:
+        if isinstance(m, HumanMessage) or not turns:
+            turns.append([m])
+        else:
+            turns[-1].append(m)
+    return turns
+
+
+def _transcript(messages) -> str:
+    lines = []
+    for m in messages:
+        content = m.content if isinstance(m.content, str) else str(m.content)
+        if isinstance(m, HumanMessage):
+            who = "User"
+        elif isinstance(m, ToolMessage):
+            who = f"Tool({getattr(m, 'name', None) or 'tool'})"
+        elif isinstance(m, AIMessage):
+            who = "Assistant"
+            if m.tool_calls:
+                calls = ", ".join(f"{tc['name']}({tc['args']})" for tc in m.tool_calls)
+                content = f"{content}\n[called {calls}]".strip()
+        else:
+            continue
+        if len(content) > MAX_CHARS_PER_MESSAGE:
+            content = content[:MAX_CHARS_PER_MESSAGE] + " …"
+        lines.append(f"{who}: {content}")
+    return "\n".join(lines)
+
+
+def _boundary(folded):
+    """Last message of ``folded`` that every view of the history keeps."""
+    return next(
+        (m for m in reversed(folded) if isinstance(m, (HumanMessage, AIMessage))),
+        folded[-1],
+    )
+
+
+class HistorySummarizer:
+    def __init__(self, keep_turns: int = KEEP_TURNS):
+        self.keep_turns = keep_turns
+        self._summaries = OrderedDict()  # key of last covered human/AI message -> summary
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summary")
+
+    def fold_point(self, messages, keep_turns: Optional[int] = None) -> int:
+        """Number of leading messages that fall outside the last ``keep_turns`` turns."""
+        turns = split_turns(messages)
+        keep = self.keep_turns if keep_turns is None else keep_turns
+        if len(turns) <= keep:
+            return 0
+        return sum(len(t) for t in turns[: len(turns) - keep])
+
+    def lookup(self, messages) -> Tuple[Optional[str], int]:
+        """Latest summary covering a prefix of ``messages`` → (summary, n_covered).
+
+        ``messages`` may be any filtered view of the history (with or without
+        ToolMessages): coverage is found by the boundary message's key, and a
+        fold always ends a turn, so the rest of that turn is covered too.
+        """
+        with self._lock:
+            for i in range(len(messages), 0, -1):
+                summary = self._summaries.get(message_key(messages[i - 1]))
+                if summary is not None:
+                    break
+            else:
+                return None, 0
+        while i < len(messages) and not isinstance(messages[i], HumanMessage):
+            i += 1
+        return summary, i
+
+    def schedule(self, state, keep_turns: Optional[int] = None) -> None:
+        """Fold everything older than the kept turns into the rolling summary (async)."""
+        from preprocessing.get_clean_history import get_clean_history, HISTORY_BUDGETS
+
+        if not any(HISTORY_BUDGETS.values()):
+            return  # no node windows its history — nothing will read a summary
+        messages = get_clean_history(state)
+        fold = self.fold_point(messages, keep_turns)
+        if fold == 0:
+            return
+        folded = messages[:fold]
+        key = message_key(_boundary(folded))
+        with self._lock:
+            if key in self._summaries or key in self._pending:
+                return
+            self._pending.add(key)
+        self._executor.submit(self._summarize, folded, key)
+
+    def _summarize(self, folded, key: str) -> None:
+        try:
+            previous, covered = self.lookup(folded)
+            new_messages = folded[covered:]
+            if not new_messages:
+                return
+            summary = self._call_llm(previous, new_messages)
+            with self._lock:
+                self._summaries[key] = summary
+                while len(self._summaries) > MAX_SUMMARIES:
+                    self._summaries.popitem(last=False)
+            logger.info(
+                f"[HISTORY] Summarized {len(new_messages)} messages "
+                f"(rolling summary now covers {len(folded)})"
+            )
+        except Exception as e:  # noqa: BLE001 — history falls back to dropping turns
+            logger.warning(f"[HISTORY] Summarization failed: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _call_llm(self, previous: Optional[str], new_messages) -> str:
+        from core.loadPrompts import LoadPrompts
+        from models.registry import model_registry
+
+        parts = []
+        if previous:
+            parts.append(f"Earlier summary:\n{previous}")
+        parts.append(f"New messages:\n{_transcript(new_messages)}")
+        response = model_registry.get("summarizer").invoke(
+            [
+                LoadPrompts().load_prompt("summarizer.yaml")[0],
+                HumanMessage(content="\n\n".join(parts)),
+            ]
+        )
+        return strip_think_tags(response.content or "")
+
+
+history_summarizer = HistorySummarizer()
@@ -0,0 +1,202 @@
+"""On-disk cache of router decisions.
+
+Users repeat the same short commands ("check my internet", "open vscode") all
+the time; each one used to go back through the router LLM. Decisions are
+stored in a small SQLite file keyed by a normalized form of the query, with
+LRU eviction and a TTL. The whole cache is dropped automatically when
+``prompts/router.yaml`` or the router model changes, because either can change
+what the right answer is.
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional, Tuple
+
+from core.paths import data_path
+
+logger = logging.getLogger(__name__)
+base_path = pathlib.Path(__file__).parent.parent
+
+ROUTER_PROMPT = base_path / "prompts" / "router.yaml"
+
+CACHE_ENABLED = os.getenv("ROUTER_CACHE", "1").strip() not in ("0", "false", "no")
+CACHE_TTL = float(os.getenv("ROUTER_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "1000"))
+
+# Politeness / address prefixes and suffixes that never change the route.
+_LEADING_FILLER = re.compile(
+    r"^(?:(?:please|pls|hey|hi|ok|okay|zkzk|agent|can you|could you|would you|"
+    r"will you|i want you to|i need you to)\s+)+"
+)
+_TRAILING_FILLER = re.compile(r"(?:\s+(?:please|pls|for me|now|thanks|thank you))+$")
+
+
+def normalize_query(text: str) -> str:
+    """Canonical form used as the cache key.
+
+    Case, punctuation, repeated whitespace and polite filler are dropped;
+    characters that matter in paths and commands (``. / - _ ~``) are kept.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"[^\w\s./~-]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip(" .")
+    text = _LEADING_FILLER.sub("", text)
+    text = _TRAILING_FILLER.sub("", text)
+    return text.strip()
+
+
+class RouterDecisionCache:
+    def __init__(
+        self,
+        model_name: str,
+        path: Optional[pathlib.Path] = None,
+        ttl: float = CACHE_TTL,
+        max_size: int = CACHE_SIZE,
+        prompt_path: pathlib.Path = ROUTER_PROMPT,
+    ):
+        self.model_name = model_name
+        self.path = path or data_path("router_cache.sqlite")
+        self.ttl = ttl
+        self.max_size = max_size
+        self.prompt_path = prompt_path
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+        self._llm_seconds = 0.0
+        self._llm_calls = 0
+
+        self._lock = threading.Lock()
+        self._prompt_mtime = None
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS decisions (
+                key       TEXT PRIMARY KEY,
+                route     TEXT NOT NULL,
+                rationale TEXT,
+                created   REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+            """
+        )
+        self._check_fingerprint()
+
+    # ------------------------------------------------------------------ #
+    # Invalidation
+    # ------------------------------------------------------------------ #
+    def _fingerprint(self) -> str:
+        digest = hashlib.sha256(self.model_name.encode())
+        try:
+            digest.update(self.prompt_path.read_bytes())
+        except OSError:
+            pass
+        return digest.hexdigest()
+
+    def _check_fingerprint(self) -> None:
+        """Drop every entry if router.yaml or the model changed since they were stored."""
+        try:
+            mtime = self.prompt_path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._prompt_mtime and mtime is not None:
+            return
+        self._prompt_mtime = mtime
+
+        fingerprint = self._fingerprint()
+        with self._lock:
+            row = self._conn.execute("SELECT v FROM meta WHERE k = 'fingerprint'").fetchone()
+            if row and row[0] == fingerprint:
+                return
+            if row:
+                self.invalidations += 1
+                logger.info("[ROUTER CACHE] router.yaml or model changed → cache cleared")
+            self._conn.execute("DELETE FROM decisions")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (k, v) VALUES ('fingerprint', ?)", (fingerprint,)
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------ #
+    # Lookup / store
+    # ------------------------------------------------------------------ #
+    def get(self, query: str) -> Optional[Tuple[str, str]]:
+        """Return (route, rationale) for a cached query, or None."""
+        key = normalize_query(query)
+        if not key:
+            return None
+        self._check_fingerprint()
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT route, rationale, created FROM decisions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            route, rationale, created = row
+            if now - created > self.ttl:
+                self._conn.execute("DELETE FROM decisions WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE decisions SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return route, rationale or ""
+
+    def put(self, query: str, route: str, rationale: str) -> None:
+        key = normalize_query(query)
+        if not key:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO decisions (key, route, rationale, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, route, rationale, now, now),
+            )
+            # LRU eviction — drop the least recently used rows beyond max_size.
+            self._conn.execute(
+                "DELETE FROM decisions WHERE key IN ("
+                " SELECT key FROM decisions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+            self._conn.commit()
+
+    def record_llm_latency(self, seconds: float) -> None:
+        """Feed the latency of a real router call, used to estimate time saved."""
+        self._llm_seconds += seconds
+        self._llm_calls += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM decisions")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+        lookups = self.hits + self.misses
+        avg_llm = self._llm_seconds / self._llm_calls if self._llm_calls else 0.0
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_llm_seconds": avg_llm,
+            "saved_seconds": self.hits * avg_llm,
+        }
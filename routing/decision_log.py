@@ -0,0 +1,70 @@
+"""Append-only JSONL log of router decisions.
+
+Every decision ``classify_node`` makes is written here together with the
+path that made it (``llm``, ``cache``, ``fast-path``, ``intent-model``). The
+``llm`` rows are the training labels for ``routing.intent_model`` and seed
+the fast path's nearest-neighbour index on startup.
+"""
+
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import Iterator, Optional
+
+from core.paths import data_path
+
+logger = logging.getLogger(__name__)
+
+LOG_ENABLED = os.getenv("ROUTER_DECISION_LOG", "1").strip() not in ("0", "false", "no")
+
+_lock = threading.Lock()
+
+
+def default_log_path() -> pathlib.Path:
+    return data_path("router_decisions.jsonl")
+
+
+def log_decision(
+    query: str,
+    route: str,
+    rationale: str,
+    source: str,
+    path: Optional[pathlib.Path] = None,
+) -> None:
+    if not LOG_ENABLED:
+        return
+    record = {
+        "ts": round(time.time(), 3),
+        "query": query,
+        "route": route,
+        "rationale": rationale,
+        "source": source,
+    }
+    try:
+        line = json.dumps(record, ensure_ascii=False)
+        with _lock, open(path or default_log_path(), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        logger.warning(f"[ROUTER LOG] Could not write decision: {e}")
+
+
+def read_decisions(
+    path: Optional[pathlib.Path] = None, sources: Optional[set] = None
+) -> Iterator[dict]:
+    """Yield logged decisions, optionally only those made by the given sources."""
+    path = path or default_log_path()
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a torn final line from a crash — skip it
+            if sources and record.get("source") not in sources:
+                continue
+            if record.get("query") and record.get("route"):
+                yield record
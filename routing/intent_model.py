@@ -0,0 +1,180 @@
+"""Tiny CPU-only intent classifier: TF-IDF features + softmax regression.
+
+The model is trained from the router decision log (see
+``routing.train_intent``) and stored as plain NumPy arrays in a ``.npz``
+file, so loading needs nothing beyond NumPy. Prediction touches only the
+handful of features present in the query and runs in well under a
+millisecond, which lets ``classify_node`` skip the router LLM whenever the
+model is confident.
+"""
+
+import logging
+import math
+import os
+import pathlib
+import threading
+from collections import Counter
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.paths import data_path
+from routing.decision_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+INTENT_CONFIDENCE = float(os.getenv("ROUTER_INTENT_CONFIDENCE", "0.9"))
+
+
+def default_model_path() -> pathlib.Path:
+    return pathlib.Path(os.getenv("ROUTER_INTENT_MODEL") or data_path("router_intent.npz"))
+
+
+def extract_terms(query: str) -> list:
+    """Word unigrams and bigrams of the normalized query."""
+    words = normalize_query(query).split()
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class IntentModel:
+    def __init__(self, vocab: Sequence[str], idf, weights, bias, labels: Sequence[str]):
+        self.vocab = {term: i for i, term in enumerate(vocab)}
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.weights = np.asarray(weights, dtype=np.float32)  # (n_features, n_classes)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.labels = list(labels)
+
+    # ------------------------------------------------------------------ #
+    # Features
+    # ------------------------------------------------------------------ #
+    def _sparse_features(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        counts = Counter(t for t in extract_terms(query) if t in self.vocab)
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        idx = np.fromiter((self.vocab[t] for t in counts), dtype=np.int64, count=len(counts))
+        tf = np.fromiter((1.0 + math.log(c) for c in counts.values()), dtype=np.float32, count=len(counts))
+        values = tf * self.idf[idx]
+        values /= np.linalg.norm(values) or 1.0
+        return idx, values
+
+    def predict_proba(self, query: str) -> np.ndarray:
+        idx, values = self._sparse_features(query)
+        logits = self.bias + values @ self.weights[idx]
+        logits = logits - logits.max()
+        exp = np.exp(logits)
+        return exp / exp.sum()
+
+    def predict(self, query: str) -> Tuple[str, float]:
+        """Return (route, confidence). Unknown vocabulary → low confidence."""
+        idx, _ = self._sparse_features(query)
+        if idx.size == 0:
+            return self.labels[int(np.argmax(self.bias))], 0.0
+        probs = self.predict_proba(query)
+        best = int(np.argmax(probs))
+        return self.labels[best], float(probs[best])
+
+    # ------------------------------------------------------------------ #
+    # Training
+    # ------------------------------------------------------------------ #
+    @classmethod
+    def train(
+        cls,
+        queries: Sequence[str],
+        routes: Sequence[str],
+        epochs: int = 300,
+        learning_rate: float = 1.0,
+        l2: float = 1e-4,
+        max_features: int = 5000,
+    ) -> "IntentModel":
+        labels = sorted(set(routes))
+        docs = [extract_terms(q) for q in queries]
+
+        df = Counter(t for doc in docs for t in set(doc))
+        vocab = [t for t, _ in df.most_common(max_features)]
+        index = {t: i for i, t in enumerate(vocab)}
+        n_docs = len(docs)
+        idf = np.array([math.log((1 + n_docs) / (1 + df[t])) + 1.0 for t in vocab], dtype=np.float32)
+
+        X = np.zeros((n_docs, len(vocab)), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            for term, count in Counter(doc).items():
+                col = index.get(term)
+                if col is not None:
+                    X[row, col] = (1.0 + math.log(count)) * idf[col]
+        X /= np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+
+        y = np.array([labels.index(r) for r in routes])
+        Y = np.eye(len(labels), dtype=np.float32)[y]
+        # Balance classes so a log dominated by one route still learns the others.
+        class_weight = n_docs / (len(labels) * np.bincount(y, minlength=len(labels)))
+        sample_weight = class_weight[y].astype(np.float32)[:, None]
+
+        W = np.zeros((len(vocab), len(labels)), dtype=np.float32)
+        b = np.zeros(len(labels), dtype=np.float32)
+        for _ in range(epochs):
+            logits = X @ W + b
+            logits -= logits.max(axis=1, keepdims=True)
+            P = np.exp(logits)
+            P /= P.sum(axis=1, keepdims=True)
+            grad = (P - Y) * sample_weight / n_docs
+            W -= learning_rate * (X.T @ grad + l2 * W)
+            b -= learning_rate * grad.sum(axis=0)
+
+        return cls(vocab, idf, W, b, labels)
+
+    # ------------------------------------------------------------------ #
+    # Persistence
+    # ------------------------------------------------------------------ #
+    def save(self, path: pathlib.Path) -> None:
+        vocab = sorted(self.vocab, key=self.vocab.get)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                vocab=np.array(vocab, dtype=str),
+                idf=self.idf,
+                weights=self.weights,
+                bias=self.bias,
+                labels=np.array(self.labels, dtype=str),
+            )
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "IntentModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["vocab"].tolist(),
+                data["idf"],
+                data["weights"],
+                data["bias"],
+                data["labels"].tolist(),
+            )
+
+
+class IntentModelLoader:
+    """Loads the exported model lazily and reloads it when the file is replaced."""
+
+    def __init__(self, path: Optional[pathlib.Path] = None):
+        self.path = path or default_model_path()
+        self._model = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[IntentModel]:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return None  # not trained yet
+        if mtime == self._mtime:
+            return self._model
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    self._model = IntentModel.load(self.path)
+                    logger.info(f"[INTENT MODEL] Loaded {self.path} ({len(self._model.vocab)} features)")
+                except Exception as e:  # noqa: BLE001 — fall back to the LLM router
+                    logger.warning(f"[INTENT MODEL] Could not load {self.path}: {e}")
+                    self._model = None
+                self._mtime = mtime
+        return self._model
+
+
+intent_model = IntentModelLoader()
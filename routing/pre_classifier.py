@@ -0,0 +1,311 @@
+"""Local pre-classifier that settles obvious routes without calling the router LLM.
+
+Two cheap signals are combined:
+
+1. Keyword / regex rules that mirror the example sections and the HARD
+   PRIORITY ORDER of ``prompts/router.yaml``.
+2. A nearest-neighbour lookup over previously routed queries, seeded with the
+   quoted examples from ``router.yaml`` and the LLM decisions in the router
+   decision log, and fed with every decision the LLM router makes afterwards.
+
+``classify`` always returns its best guess (or None); ``classify_node`` only
+trusts it when the confidence clears ``FAST_CONFIDENCE``.
+"""
+
+import logging
+import os
+import pathlib
+import re
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import yaml
+
+from routing.decision_log import read_decisions
+
+logger = logging.getLogger(__name__)
+base_path = pathlib.Path(__file__).parent.parent
+
+ROUTER_PROMPT = base_path / "prompts" / "router.yaml"
+
+FAST_PATH_ENABLED = os.getenv("ROUTER_FAST_PATH", "1").strip() not in ("0", "false", "no")
+FAST_CONFIDENCE = float(os.getenv("ROUTER_FAST_CONFIDENCE", "0.85"))
+MAX_NEIGHBOURS = int(os.getenv("ROUTER_MAX_NEIGHBOURS", "2000"))
+
+ROUTES = ("DIRECT_EXECUTION", "NEEDS_PLANNING", "CONVERSATIONAL")
+
+
+class FastRoute(NamedTuple):
+    route: str
+    confidence: float
+    source: str  # "rule:<name>" or "neighbour"
+    rationale: str
+
+
+# --------------------------------------------------------------------------- #
+# Rules — ordered like the router prompt's priority list, first match wins.
+# --------------------------------------------------------------------------- #
+_ACTION_VERBS = (
+    r"open|launch|start|kill|stop|check|read|show|list|clear|empty|find|search|"
+    r"locate|run|enable|turn on|install|uninstall|remove|delete|create|write|"
+    r"download|copy|move|rename"
+)
+# Verbs that are unambiguous as the first word of a one-step request
+# ("write me a poem" / "show me how grep works" are not system actions).
+_IMPERATIVE_VERBS = (
+    r"open|launch|kill|stop|check|read|list|clear|empty|find|search|locate|"
+    r"run|enable|turn on|install|uninstall|remove|delete|download"
+)
+
+# References to the user's own machine — a "what is …" about these is a
+# system-state question (DIRECT_EXECUTION), not general knowledge.
+_SYSTEM_STATE = re.compile(
+    r"\b(my|mine|this (?:pc|machine|computer|laptop|system|box)|running|installed|"
+    r"using|used|listening|ports?|pid|disk|storage|space (?:left|free|used)|free space|"
+    r"cpu|memory|ram|swap|load|uptime|battery|gpu|temperature|usage|left|free|"
+    r"ip address|ip|hostname|kernel|version|wifi|wi-fi|internet|network|folder|"
+    r"directory|desktop|downloads|files?|process(?:es)?|services?)\b"
+)
+
+# Live data the model cannot know: a "what is …" about these needs a web
+# search (DIRECT_EXECUTION), so it is left to the router LLM too.
+_LIVE_DATA = re.compile(
+    r"\b(weather|forecast|temperature|news|headlines?|price|prices|stock|stocks|"
+    r"exchange rate|score|scores|latest|today|tonight|tomorrow|right now|currently|current)\b"
+)
+
+_RULES = [
+    # 1. Date / time / current system state → always DIRECT_EXECUTION.
+    (
+        "datetime",
+        re.compile(
+            r"\b(what(?:'s| is)? (?:the )?(?:current )?(?:date|time|day)|"
+            r"what time is it|today'?s date|current (?:date|time))\b"
+        ),
+        "DIRECT_EXECUTION",
+        0.97,
+        "date/time needs a system command",
+    ),
+    # 2. Greetings and small talk.
+    (
+        "greeting",
+        re.compile(
+            r"^(hi|hello|hey|yo|hola|good (?:morning|afternoon|evening)|"
+            r"thanks|thank you|how are you(?: doing)?|who are you)"
+            r"(?:\s+(?:there|zkzk|agent|buddy))?[\s!.?]*$"
+        ),
+        "CONVERSATIONAL",
+        0.97,
+        "greeting / small talk",
+    ),
+    # 3. Multi-step work the router prompt lists under NEEDS_PLANNING.
+    (
+        "project_setup",
+        re.compile(
+            r"\b(?:create|make|build|start|scaffold|bootstrap|set ?up)\s+"
+            r"(?:a |an |my )?(?:new )?[\w.+-]*\s*(?:[\w.+-]+\s+)?(?:project|app|application)\b"
+            r".*\b(?:with|and|using)\b"
+        ),
+        "NEEDS_PLANNING",
+        0.9,
+        "project setup with extra components",
+    ),
+    (
+        "deploy",
+        re.compile(r"\b(?:deploy|set ?up (?:a |an |the )?(?:container|server|database|environment))\b"),
+        "NEEDS_PLANNING",
+        0.88,
+        "deployment / environment setup is multi-step",
+    ),
+    (
+        "find_then_act",
+        re.compile(r"\b(?:find|locate|search)\b.*\b(?:all|every)\b.*\b(?:and|then)\s+(?:delete|remove|move|copy|compress)\b"),
+        "NEEDS_PLANNING",
+        0.9,
+        "bulk find followed by an action",
+    ),
+    (
+        "chained_actions",
+        re.compile(rf"\b(?:{_ACTION_VERBS})\b.*\b(?:and|then|after that)\s+(?:then\s+)?(?:{_ACTION_VERBS})\b"),
+        "NEEDS_PLANNING",
+        0.8,
+        "several actions chained together",
+    ),
+    # 4. Single imperative system action.
+    (
+        "single_action",
+        re.compile(rf"^(?:please\s+|can you\s+|could you\s+)?(?:{_IMPERATIVE_VERBS})\b"),
+        "DIRECT_EXECUTION",
+        0.9,
+        "single system action",
+    ),
+    # 5. General knowledge — only when it is not about the user's machine.
+    (
+        "knowledge",
+        re.compile(
+            r"^(?:what is|what's|what are|explain|how does|how do(?:es)? .* work|"
+            r"why (?:is|does|do)|define|tell me about|what(?:'s| is) the difference between)\b"
+        ),
+        "CONVERSATIONAL",
+        0.88,
+        "general knowledge question",
+    ),
+]
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().strip()
+    text = re.sub(r"[^\w\s'./+-]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+_STOPWORDS = {
+    "a", "an", "the", "my", "me", "i", "to", "of", "in", "on", "for", "is",
+    "are", "please", "can", "you", "could", "would", "it", "this", "that",
+    "and", "or", "with", "do", "does",
+}
+
+
+def _tokens(text: str) -> frozenset:
+    return frozenset(t for t in _normalize(text).split() if t not in _STOPWORDS)
+
+
+def load_router_examples(path: pathlib.Path = ROUTER_PROMPT) -> list:
+    """Return (example, route) pairs from the quoted bullets in router.yaml."""
+    try:
+        with open(path, "r") as f:
+            data = yaml.safe_load(f)
+        template = data["messages"][0]["prompt"]["template"]
+    except Exception as e:  # noqa: BLE001 — the fast path is optional
+        logger.warning(f"[FAST ROUTER] Could not read router examples: {e}")
+        return []
+
+    examples = []
+    current = None
+    for line in template.splitlines():
+        stripped = line.strip()
+        heading = next((r for r in ROUTES if stripped.startswith(r + " ")), None)
+        if heading:
+            current = heading
+            continue
+        if stripped.startswith("##"):
+            current = None
+            continue
+        if current and stripped.startswith("-"):
+            for example in re.findall(r'"([^"]+)"', stripped):
+                examples.append((example, current))
+    return examples
+
+
+class NeighbourIndex:
+    """Bounded token-set index of routed queries (Jaccard similarity)."""
+
+    def __init__(self, max_size: int = MAX_NEIGHBOURS):
+        self.max_size = max_size
+        self._entries: "OrderedDict[frozenset, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, query: str, route: str) -> None:
+        tokens = _tokens(query)
+        if not tokens or route not in ROUTES:
+            return
+        with self._lock:
+            self._entries.pop(tokens, None)
+            self._entries[tokens] = route
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def nearest(self, query: str, k: int = 3) -> Optional[FastRoute]:
+        tokens = _tokens(query)
+        if not tokens:
+            return None
+        with self._lock:
+            scored = [
+                (len(tokens & other) / len(tokens | other), route)
+                for other, route in self._entries.items()
+                if tokens & other
+            ]
+        if not scored:
+            return None
+        scored.sort(key=lambda s: s[0], reverse=True)
+        top = scored[:k]
+        best_sim, best_route = top[0]
+        # Discount the best match by how much the other close neighbours disagree.
+        close = [route for sim, route in top if sim >= best_sim * 0.8]
+        agreement = close.count(best_route) / len(close)
+        return FastRoute(
+            best_route,
+            round(best_sim * agreement, 3),
+            "neighbour",
+            f"similar to a previously routed query (similarity {best_sim:.2f})",
+        )
+
+
+class PreClassifier:
+    def __init__(self):
+        self.neighbours = NeighbourIndex()
+        self._seeded = False
+
+    def _seed(self) -> None:
+        if self._seeded:
+            return
+        self._seeded = True
+        examples = load_router_examples()
+        for example, route in examples:
+            self.neighbours.add(example, route)
+        # Past LLM decisions, oldest first so the newest survive the size bound.
+        learned = 0
+        try:
+            for record in read_decisions(sources={"llm"}):
+                self.neighbours.add(record["query"], record["route"])
+                learned += 1
+        except OSError as e:
+            logger.warning(f"[FAST ROUTER] Could not read decision log: {e}")
+        logger.info(
+            f"[FAST ROUTER] Seeded {len(examples)} router.yaml examples and {learned} logged decisions"
+        )
+
+    def match_rules(self, query: str) -> Optional[FastRoute]:
+        text = _normalize(query)
+        for name, pattern, route, confidence, reason in _RULES:
+            if not pattern.search(text):
+                continue
+            if name == "knowledge" and (_SYSTEM_STATE.search(text) or _LIVE_DATA.search(text)):
+                continue
+            return FastRoute(route, confidence, f"rule:{name}", reason)
+        return None
+
+    def classify(self, query: str) -> Optional[FastRoute]:
+        """Best local guess for ``query`` (may be below FAST_CONFIDENCE)."""
+        self._seed()
+        by_rule = self.match_rules(query)
+        by_neighbour = self.neighbours.nearest(query)
+        candidates = [c for c in (by_rule, by_neighbour) if c is not None]
+        if not candidates:
+            return None
+        if by_rule and by_neighbour and by_rule.route == by_neighbour.route:
+            # Two independent signals agree — boost the stronger one slightly.
+            best = max(candidates, key=lambda c: c.confidence)
+            return best._replace(confidence=min(1.0, round(best.confidence + 0.05, 3)))
+        if by_rule and by_neighbour and by_neighbour.confidence >= FAST_CONFIDENCE:
+            # Strong disagreement between signals — don't trust either blindly.
+            return max(candidates, key=lambda c: c.confidence)._replace(
+                confidence=min(by_rule.confidence, by_neighbour.confidence) - 0.1
+            )
+        return max(candidates, key=lambda c: c.confidence)
+
+    def warm(self) -> None:
+        """Seed the neighbour index now rather than on the first query."""
+        self._seed()
+
+    def remember(self, query: str, route: str) -> None:
+        """Record a decision made by the LLM router for future lookups."""
+        self._seed()
+        self.neighbours.add(query, route)
+
+
+pre_classifier = PreClassifier()
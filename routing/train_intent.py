@@ -0,0 +1,145 @@
+"""Train and export the router intent model from the decision log.
+
+Usage:
+    python -m routing.train_intent                    # train on LLM decisions, report, export
+    python -m routing.train_intent --holdout 0.3      # bigger holdout split
+    python -m routing.train_intent --dry-run          # report only, don't overwrite the model
+
+The report covers holdout accuracy, per-route precision/recall, the confusion
+matrix, accuracy/coverage at several confidence thresholds, and a dedicated
+check on "dangerous" requests (delete, install, kill, …): the cheap path must
+never push a question about ``rm -rf`` into execution, or an actual deletion
+into chat.
+"""
+
+import argparse
+import pathlib
+import random
+import re
+import sys
+import time
+
+from routing.decision_log import default_log_path, read_decisions
+from routing.intent_model import IntentModel, INTENT_CONFIDENCE, default_model_path
+from routing.pre_classifier import load_router_examples
+
+# Mirrors execute_node.DANGEROUS_TOOLS plus the shell verbs behind them.
+DANGEROUS_PATTERN = re.compile(
+    r"\b(rm|delete|remove|erase|wipe|purge|trash|tmp|uninstall|install|apt|"
+    r"kill|format|shred|dd|chmod|chown|sudo)\b",
+    re.IGNORECASE,
+)
+
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
+
+
+def load_dataset(log_path: pathlib.Path, sources: set, with_examples: bool) -> list:
+    """Return deduplicated (query, route) pairs; the latest decision for a query wins."""
+    latest = {}
+    if with_examples:
+        for query, route in load_router_examples():
+            latest[query.strip().lower()] = (query, route)
+    for record in read_decisions(log_path, sources=sources):
+        latest[record["query"].strip().lower()] = (record["query"], record["route"])
+    return list(latest.values())
+
+
+def report(model: IntentModel, holdout: list, threshold: float) -> bool:
+    """Print the holdout report. Returns False if a dangerous request was misrouted."""
+    labels = model.labels
+    started = time.perf_counter()
+    predictions = [model.predict(q) for q, _ in holdout]
+    per_query_ms = (time.perf_counter() - started) * 1000 / max(len(holdout), 1)
+
+    correct = sum(pred == gold for (pred, _), (_, gold) in zip(predictions, holdout))
+    print(f"\nholdout: {len(holdout)} queries · accuracy {correct / max(len(holdout), 1):.1%}"
+          f" · {per_query_ms:.3f} ms/query")
+
+    print("\nper-route precision / recall")
+    for label in labels:
+        tp = sum(p == label and g == label for (p, _), (_, g) in zip(predictions, holdout))
+        fp = sum(p == label and g != label for (p, _), (_, g) in zip(predictions, holdout))
+        fn = sum(p != label and g == label for (p, _), (_, g) in zip(predictions, holdout))
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        print(f"  {label:<17} precision {precision:6.1%}   recall {recall:6.1%}   n={tp + fn}")
+
+    print("\nconfusion matrix (rows = LLM router, cols = intent model)")
+    print("  " + " " * 17 + "".join(f"{l[:12]:>14}" for l in labels))
+    for gold in labels:
+        row = [sum(p == pred and g == gold for (p, _), (_, g) in zip(predictions, holdout)) for pred in labels]
+        print(f"  {gold:<17}" + "".join(f"{n:>14}" for n in row))
+
+    print("\nconfidence threshold → coverage (answered locally) / accuracy on those")
+    for t in sorted(set(THRESHOLDS) | {threshold}):
+        answered = [(p, g) for (p, c), (_, g) in zip(predictions, holdout) if c >= t]
+        acc = sum(p == g for p, g in answered) / len(answered) if answered else 0.0
+        marker = "  ← ROUTER_INTENT_CONFIDENCE" if t == threshold else ""
+        print(f"  {t:.2f}   coverage {len(answered) / max(len(holdout), 1):6.1%}   accuracy {acc:6.1%}{marker}")
+
+    dangerous = [
+        (q, gold, pred, conf)
+        for (pred, conf), (q, gold) in zip(predictions, holdout)
+        if DANGEROUS_PATTERN.search(q)
+    ]
+    confident_misroutes = [d for d in dangerous if d[1] != d[2] and d[3] >= threshold]
+    print(f"\ndangerous requests in holdout: {len(dangerous)}")
+    if dangerous:
+        ok = sum(gold == pred for _, gold, pred, _ in dangerous)
+        print(f"  accuracy {ok / len(dangerous):.1%} · confident misroutes {len(confident_misroutes)}")
+    for q, gold, pred, conf in confident_misroutes:
+        print(f"  ✖ {q!r}: router={gold} model={pred} ({conf:.2f})")
+    return not confident_misroutes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="routing.train_intent", description="Train the router intent model from logged decisions."
+    )
+    parser.add_argument("--log", type=pathlib.Path, default=default_log_path(),
+                        help="decision log to train from (JSONL)")
+    parser.add_argument("--out", type=pathlib.Path, default=default_model_path(),
+                        help="where to export the model (.npz)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction held out for the report")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--threshold", type=float, default=INTENT_CONFIDENCE,
+                        help="confidence threshold to evaluate (default: ROUTER_INTENT_CONFIDENCE)")
+    parser.add_argument("--all-sources", action="store_true",
+                        help="also train on cache / fast-path decisions, not only LLM ones")
+    parser.add_argument("--no-examples", action="store_true",
+                        help="don't add the router.yaml examples to the training data")
+    parser.add_argument("--dry-run", action="store_true", help="report only, don't export")
+    args = parser.parse_args(argv)
+
+    sources = None if args.all_sources else {"llm"}
+    data = load_dataset(args.log, sources, with_examples=not args.no_examples)
+    routes = {route for _, route in data}
+    if len(data) < 10 or len(routes) < 2:
+        print(f"not enough data in {args.log}: {len(data)} queries over {len(routes)} routes", file=sys.stderr)
+        return 1
+
+    rng = random.Random(args.seed)
+    rng.shuffle(data)
+    n_holdout = max(1, int(len(data) * args.holdout))
+    holdout, train = data[:n_holdout], data[n_holdout:]
+
+    print(f"training on {len(train)} queries ({len(data)} total, {len(routes)} routes) from {args.log}")
+    model = IntentModel.train([q for q, _ in train], [r for _, r in train])
+    safe = report(model, holdout, args.threshold)
+
+    if args.dry_run:
+        return 0 if safe else 2
+
+    # Export a model fitted on everything — the holdout numbers above are the estimate.
+    final = IntentModel.train([q for q, _ in data], [r for _, r in data])
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    final.save(args.out)
+    print(f"\nexported {len(final.vocab)} features → {args.out}")
+    if not safe:
+        print("warning: dangerous requests were misrouted above the threshold — "
+              "consider raising ROUTER_INTENT_CONFIDENCE", file=sys.stderr)
+    return 0 if safe else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Multi-session HTTP server for the agent (``python -m server``)."""
@@ -0,0 +1,301 @@
+"""HTTP front end: many chat sessions in one process, replies streamed as SSE.
+
+    python -m server --host 127.0.0.1 --port 8765 --max-active 4 --max-queued 16
+
+Endpoints (JSON in, JSON out):
+
+* ``POST /sessions`` — ``{"user_id": …, "session_id": …}`` (both optional; a
+  saved session id is resumed) → the session.
+* ``GET /sessions`` · ``GET /sessions/<id>`` · ``DELETE /sessions/<id>``.
+* ``POST /sessions/<id>/messages`` — ``{"message": "…"}``. With
+  ``Accept: text/event-stream`` (or ``?stream=1``) the reply streams as
+  server-sent events: ``queued`` → ``start`` → ``token``… → ``done`` (or
+  ``error``). Otherwise the ``done`` payload comes back as one JSON object.
+  A pending dangerous-tool confirmation is answered by sending ``yes`` / ``no``
+  as the next message, as in the CLI.
+* ``POST /sessions/<id>/cancel`` — stop the running turn (tools' processes
+  are killed, the reply so far is kept); a streaming client that disconnects
+  cancels its turn the same way.
+* ``GET /status`` — active / queued turns, sessions, counters, model endpoints,
+  tool subprocesses.
+
+Busy answers: 404 unknown session, 409 the session already has a turn
+running, 429 (with ``Retry-After``) the wait queue is full, 503 a queued
+turn got no slot within ``SERVER_QUEUE_TIMEOUT`` seconds.
+
+Every session can run tools, including the dangerous ones after a ``yes``,
+so the server binds to localhost unless told otherwise.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .sessions import (
+    MAX_ACTIVE, MAX_QUEUED, QUEUE_TIMEOUT, QueueFull, QueueTimeout, SessionBusy, SessionManager,
+)
+
+log = logging.getLogger("server")
+
+HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+PORT = int(os.getenv("SERVER_PORT", "8765"))
+SWEEP_INTERVAL = 60  # seconds between idle-session sweeps
+KEEPALIVE = 15  # seconds between SSE comments while a turn is queued or thinking
+
+_SESSION_PATH = re.compile(r"^/sessions/([\w.:-]+)(/messages|/cancel)?$")
+
+
+class _Done:
+    """Queue sentinel: the turn finished (its last event is already queued)."""
+
+
+class AgentServer:
+    """The event loop that runs turns, plus the threaded HTTP server in front of it."""
+
+    def __init__(self, app, host: str = HOST, port: int = PORT, **limits):
+        self.manager = SessionManager(app, **limits)
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._run_loop, name="agent-loop", daemon=True)
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_later(SWEEP_INTERVAL, self._sweep)
+        self.loop.run_forever()
+
+    def _sweep(self) -> None:
+        closed = self.manager.sweep()
+        if closed:
+            log.info("closed %d idle sessions", closed)
+        self.loop.call_later(SWEEP_INTERVAL, self._sweep)
+
+    def start(self) -> "AgentServer":
+        self._loop_thread.start()
+        threading.Thread(target=self.httpd.serve_forever, name="http", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def status(self) -> dict:
+        from core import subprocess_runtime
+        from core.preload import preloader
+        from models.endpoints import endpoint_pool
+
+        return {
+            **self.manager.status(),
+            "models_ready": preloader.done and not preloader.failed,
+            "endpoints": endpoint_pool.stats(),
+            "subprocesses": subprocess_runtime.stats(),
+        }
+
+    def submit(self, session, text: str, position: int = 0):
+        """Schedule an admitted turn; returns ``(future, events)`` — events is a thread-safe queue."""
+        events: "queue.Queue" = queue.Queue()
+
+        def emit(kind: str, data: dict) -> None:
+            events.put((kind, data))
+
+        async def turn():
+            try:
+                return await self.manager.run_turn(session, text, emit, position)
+            finally:
+                events.put(_Done)
+
+        return asyncio.run_coroutine_threadsafe(turn(), self.loop), events
+
+    # ------------------------------------------------------------------ #
+    # HTTP
+    # ------------------------------------------------------------------ #
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):
+                log.debug("%s " + fmt, self.address_string(), *args)
+
+            def _json(self, obj, code: int = 200, headers: dict = None) -> None:
+                body = json.dumps(obj, ensure_ascii=False, default=str).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                if not length:
+                    return {}
+                data = json.loads(self.rfile.read(length))
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+                return data
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/status":
+                    return self._json(server.status())
+                if url.path == "/sessions":
+                    return self._json({"sessions": server.manager.sessions()})
+                match = _SESSION_PATH.match(url.path)
+                if match and not match.group(2):
+                    session = server.manager.get(match.group(1))
+                    if session is None:
+                        return self._json({"error": "unknown session"}, 404)
+                    return self._json(server.manager.describe(session))
+                self._json({"error": "not found"}, 404)
+
+            def do_DELETE(self):
+                match = _SESSION_PATH.match(urlparse(self.path).path)
+                if not match or match.group(2):
+                    return self._json({"error": "not found"}, 404)
+                if server.manager.get(match.group(1)) is None:
+                    return self._json({"error": "unknown session"}, 404)
+                if not server.manager.close(match.group(1)):
+                    return self._json({"error": "a turn is running in this session"}, 409)
+                self._json({"closed": match.group(1)})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                try:
+                    body = self._body()
+                except ValueError as e:
+                    return self._json({"error": f"bad JSON body: {e}"}, 400)
+                if url.path == "/sessions":
+                    session = server.manager.open(
+                        str(body.get("user_id") or "http-user"), body.get("session_id") or None
+                    )
+                    return self._json(server.manager.describe(session), 201)
+                match = _SESSION_PATH.match(url.path)
+                if not match or not match.group(2):
+                    return self._json({"error": "not found"}, 404)
+                if match.group(2) == "/cancel":
+                    if not server.manager.cancel(match.group(1)):
+                        return self._json({"error": "no turn is running in this session"}, 409)
+                    return self._json({"cancelling": match.group(1)}, 202)
+
+                text = str(body.get("message") or "").strip()
+                if not text:
+                    return self._json({"error": "'message' is required"}, 400)
+                try:
+                    session, position = server.manager.admit(match.group(1))
+                except KeyError:
+                    return self._json({"error": "unknown session"}, 404)
+                except SessionBusy:
+                    return self._json({"error": "a turn is already running in this session"}, 409)
+                except QueueFull as e:
+                    retry = max(1, int(server.manager.queue_timeout // 4))
+                    return self._json({"error": f"server busy: {e}"}, 429, {"Retry-After": str(retry)})
+
+                future, events = server.submit(session, text, position)
+                stream = "text/event-stream" in (self.headers.get("Accept") or "") or parse_qs(url.query).get(
+                    "stream", ["0"]
+                )[0] not in ("0", "false", "")
+                if stream:
+                    self._stream(session.session_id, future, events)
+                else:
+                    self._reply(future)
+
+            def _reply(self, future) -> None:
+                try:
+                    result = future.result()
+                except QueueTimeout as e:
+                    return self._json({"error": str(e)}, 503, {"Retry-After": "5"})
+                except Exception as e:  # noqa: BLE001 — report the turn's error to the client
+                    return self._json({"error": f"{type(e).__name__}: {e}"}, 500)
+                self._json(result)
+
+            def _stream(self, session_id: str, future, events) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    while True:
+                        try:
+                            item = events.get(timeout=KEEPALIVE)
+                        except queue.Empty:
+                            self.wfile.write(b": keep-alive\n\n")
+                            self.wfile.flush()
+                            continue
+                        if item is _Done:
+                            return
+                        kind, data = item
+                        payload = json.dumps(data, ensure_ascii=False, default=str)
+                        self.wfile.write(f"event: {kind}\ndata: {payload}\n\n".encode())
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client went away: stop generating for it.
+                    log.info("client disconnected; cancelling the turn")
+                    server.manager.cancel(session_id, "client disconnected")
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="server", description="Multi-session HTTP server for zkzkAgent.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-active", type=int, default=MAX_ACTIVE, help="turns running at once")
+    parser.add_argument("--max-queued", type=int, default=MAX_QUEUED, help="turns waiting for a slot")
+    parser.add_argument(
+        "--queue-timeout", type=float, default=QUEUE_TIMEOUT, help="seconds a turn may wait (0 = forever)"
+    )
+    parser.add_argument("--verbose", action="store_true", help="show the agent's internal INFO logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)-7s %(name)s: %(message)s",
+        force=True,
+    )
+    logging.getLogger("server").setLevel(logging.INFO)
+
+    started = time.time()
+    from core.agent import compile_app
+    from core.checkpointer import get_checkpointer
+    from core.preload import preloader
+
+    app = compile_app(get_checkpointer())
+    preloader.start()
+    server = AgentServer(
+        app, args.host, args.port,
+        max_active=args.max_active, max_queued=args.max_queued, queue_timeout=args.queue_timeout,
+    ).start()
+    log.info(
+        "serving on %s (graph loaded in %.1fs; %d turns at once, %d queued)",
+        server.url, time.time() - started, args.max_active, args.max_queued,
+    )
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(file=sys.stderr)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
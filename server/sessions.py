@@ -0,0 +1,293 @@
+"""Sessions and turn admission for the HTTP server.
+
+All turns run on one asyncio loop (a background thread), each through
+``app.ainvoke`` with its session's ``thread_id``. :class:`SessionManager`
+keeps the open :class:`ChatSession` objects and decides whether a new turn
+may run:
+
+* a session runs one turn at a time (a second message while one is in flight
+  is refused — :class:`SessionBusy`);
+* at most ``max_active`` turns run at once, which bounds the requests sent to
+  Ollama;
+* up to ``max_queued`` more wait for a slot, in arrival order. Beyond that a
+  turn is refused at once (:class:`QueueFull`, HTTP 429), and a queued turn
+  that gets no slot within ``queue_timeout`` seconds gives up (HTTP 503).
+
+A turn reports what happens through an ``events`` callback, called on the
+loop thread: ``queued``, ``start``, ``token`` (the text the nodes stream, the
+same the CLI prints), then ``done`` or ``error``.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from agent_nodes._stream import output_to
+from core.cancellation import CANCEL_GRACE, CancelToken, turn_scope
+from chat_cli.batch import final_message, summarize_tools
+from chat_cli.session import ChatSession
+
+log = logging.getLogger("server.sessions")
+
+MAX_ACTIVE = int(os.getenv("SERVER_MAX_ACTIVE", "4"))
+MAX_QUEUED = int(os.getenv("SERVER_MAX_QUEUED", "16"))
+QUEUE_TIMEOUT = float(os.getenv("SERVER_QUEUE_TIMEOUT", "60"))
+SESSION_IDLE = float(os.getenv("SERVER_SESSION_IDLE", "3600"))  # seconds before an idle session is closed
+
+Events = Callable[[str, dict], None]
+
+
+class QueueFull(Exception):
+    """Every slot is busy and the wait queue is full."""
+
+
+class SessionBusy(Exception):
+    """The session already has a turn in flight."""
+
+
+class QueueTimeout(Exception):
+    """A queued turn got no slot in time."""
+
+
+class _TokenSink:
+    """File-like target for ``agent_nodes._stream.emit`` that forwards text as events."""
+
+    def __init__(self, events: Events):
+        self._events = events
+
+    def write(self, text: str) -> int:
+        if text:
+            self._events("token", {"text": text})
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+class SessionManager:
+    def __init__(
+        self,
+        app,
+        max_active: int = MAX_ACTIVE,
+        max_queued: int = MAX_QUEUED,
+        queue_timeout: float = QUEUE_TIMEOUT,
+        session_idle: float = SESSION_IDLE,
+    ):
+        self.app = app
+        self.max_active = max(1, max_active)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        self.session_idle = session_idle
+        self.started = time.time()
+        self._lock = threading.Lock()  # guards everything below; HTTP threads and the loop both use it
+        self._sessions: Dict[str, ChatSession] = {}
+        self._last_used: Dict[str, float] = {}
+        self._busy = set()
+        self._tokens: Dict[str, CancelToken] = {}  # session -> token of its running turn
+        self._active = 0
+        self._queued = 0
+        self.served = 0
+        self.rejected = 0
+        self.failed = 0
+        self._slots: Optional[asyncio.Semaphore] = None  # created on the loop
+
+    # ------------------------------------------------------------------ #
+    # Sessions
+    # ------------------------------------------------------------------ #
+    def open(self, user_id: str, session_id: Optional[str] = None) -> ChatSession:
+        """Open a session; an id the checkpointer knows is resumed."""
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = ChatSession(user_id=user_id, session_id=session_id)
+                checkpointer = self.app.checkpointer
+                if session_id and checkpointer is not None and checkpointer.has_thread(session_id):
+                    values = self.app.get_state(session.config).values
+                    session.state = {**ChatSession.fresh_state(), **values}
+                    session.turns = sum(type(m).__name__ == "HumanMessage" for m in session.state["messages"])
+                self._sessions[session.session_id] = session
+            self._last_used[session.session_id] = time.time()
+            return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id: str) -> bool:
+        """Forget an idle session and everything kept in memory for it.
+
+        Its checkpoints stay on disk, so opening the id again resumes it.
+        """
+        from core.processes import running_processes
+        from core.tracing import tracer
+        from models.endpoints import endpoint_pool
+
+        with self._lock:
+            if session_id in self._busy or self._sessions.pop(session_id, None) is None:
+                return False
+            self._last_used.pop(session_id, None)
+        running_processes.drop_session(session_id)
+        endpoint_pool.unpin(session_id)
+        tracer.forget(session_id)
+        if self.app.checkpointer is not None:
+            self.app.checkpointer.forget(session_id)
+        return True
+
+    def sweep(self) -> int:
+        """Close sessions idle for longer than ``session_idle``; returns how many."""
+        cutoff = time.time() - self.session_idle
+        with self._lock:
+            idle = [sid for sid, t in self._last_used.items() if t < cutoff and sid not in self._busy]
+        return sum(self.close(sid) for sid in idle)
+
+    def describe(self, session: ChatSession) -> dict:
+        from core.processes import running_processes
+
+        pending = session.state.get("pending_confirmation") or {}
+        return {
+            "session_id": session.session_id,
+            "user_id": session.user_id,
+            "started_at": session.started_at.isoformat(timespec="seconds"),
+            "turns": session.turns,
+            "busy": session.session_id in self._busy,
+            "pending_confirmation": pending.get("tool_name"),
+            "pending_plan": bool(session.state.get("pending_plan")),
+            "running_processes": running_processes.for_session(session.session_id),
+        }
+
+    def sessions(self) -> list:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [self.describe(s) for s in sessions]
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "uptime_s": round(time.time() - self.started, 1),
+                "sessions": len(self._sessions),
+                "active_turns": self._active,
+                "queued_turns": self._queued,
+                "max_active": self.max_active,
+                "max_queued": self.max_queued,
+                "served": self.served,
+                "rejected": self.rejected,
+                "failed": self.failed,
+            }
+
+    # ------------------------------------------------------------------ #
+    # Turns
+    # ------------------------------------------------------------------ #
+    def cancel(self, session_id: str, reason: str = "cancelled by client") -> bool:
+        """Cancel the session's running turn; False if it has none."""
+        with self._lock:
+            token = self._tokens.get(session_id)
+        if token is None:
+            return False
+        token.cancel(reason)
+        return True
+
+    def admit(self, session_id: str) -> Tuple[ChatSession, int]:
+        """Reserve a turn for ``session_id`` or raise; called before the turn is scheduled.
+
+        Returns the session and the turn's place in the wait queue (0 = a slot
+        is free), taken here so that turns admitted together are told apart.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            if session_id in self._busy:
+                raise SessionBusy(session_id)
+            if self._active + self._queued >= self.max_active + self.max_queued:
+                self.rejected += 1
+                raise QueueFull(f"{self._active} turns running, {self._queued} queued")
+            position = self._active + self._queued + 1 - self.max_active
+            self._busy.add(session_id)
+            self._queued += 1
+            self._last_used[session_id] = time.time()
+            return session, max(0, position)
+
+    async def run_turn(self, session: ChatSession, text: str, events: Events, position: int = 0) -> dict:
+        """Run one admitted turn (``position`` from :meth:`admit`); the returned
+        ``done`` payload is also sent as an event."""
+        from core.preload import preloader
+        from core.tracing import tracer
+        from preprocessing.history_summary import history_summarizer
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_active)
+        try:
+            if position > 0:
+                events("queued", {"position": position})
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout or None)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._queued -= 1
+                    self.rejected += 1
+                raise QueueTimeout(f"no free slot within {self.queue_timeout:g}s")
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+            try:
+                if not preloader.done:
+                    await asyncio.to_thread(preloader.wait)
+                events("start", {"session_id": session.session_id})
+                checkpointed = self.app.checkpointer is not None
+                seen = len(session.state["messages"])
+                turn_input = session.turn_input(text, checkpointed)
+                started = time.perf_counter()
+                with tracer.span("turn", "turn", session=session.session_id) as span, \
+                        output_to(_TokenSink(events)), turn_scope() as token:
+                    with self._lock:
+                        self._tokens[session.session_id] = token
+                    # A cancelled turn stops cooperatively; if it is still running after the grace period, it is cut off.
+                    graph_run = asyncio.ensure_future(self.app.ainvoke(turn_input, session.config))
+                    loop = asyncio.get_running_loop()
+                    token.on_cancel(lambda: loop.call_soon_threadsafe(loop.call_later, CANCEL_GRACE, graph_run.cancel))
+                    try:
+                        session.state = await graph_run
+                    except BaseException:
+                        if span is not None:
+                            span.attrs["status"] = "error"
+                        if checkpointed:
+                            values = self.app.get_state(session.config).values
+                            if values:
+                                session.state = {**ChatSession.fresh_state(), **values}
+                        raise
+                history_summarizer.schedule(session.state)
+            finally:
+                self._slots.release()
+                with self._lock:
+                    self._active -= 1
+
+            messages = session.state.get("messages", [])
+            pending = session.state.get("pending_confirmation") or {}
+            result = {
+                "session_id": session.session_id,
+                "reply": final_message(messages),
+                "category": session.state.get("category"),
+                "pending_confirmation": pending.get("tool_name"),
+                "pending_plan": bool(session.state.get("pending_plan")),
+                "tool_calls": summarize_tools(messages[seen:]),
+                "cancelled": token.reason,
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+            with self._lock:
+                self.served += 1
+            events("done", result)
+            return result
+        except BaseException as exc:
+            with self._lock:
+                self.failed += not isinstance(exc, QueueTimeout)
+            status = 503 if isinstance(exc, QueueTimeout) else 500
+            events("error", {"error": f"{type(exc).__name__}: {exc}", "status": status})
+            raise
+        finally:
+            with self._lock:
+                self._busy.discard(session.session_id)
+                self._tokens.pop(session.session_id, None)
+                self._last_used[session.session_id] = time.time()
@@ -1,5 +1,6 @@
 from langchain_core.tools import tool
-import subprocess , logging
+import logging
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -8,7 +9,7 @@ logger = logging.getLogger(__name__)
 def open_browser(url: str) -> str:
     """Open a URL in the default web browser."""
     try:
-        subprocess.Popen(["xdg-open", url])
+        subprocess_runtime.spawn(["xdg-open", url], tool="open_browser")
         logger.info(f"[TOOL] Opened browser to {url}")
         return f"Opened browser to {url}"
     except Exception as e:
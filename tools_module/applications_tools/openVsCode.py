@@ -1,4 +1,5 @@
-import subprocess , logging
+import logging
+from core import subprocess_runtime
 from langchain_core.tools import tool
 
 logging.basicConfig(level=logging.INFO)
@@ -10,7 +11,7 @@ def open_vscode(path: str) -> str:
     """Open VSCode."""
     logger.info(f"[TOOL] open_vscode called")
     try:
-        subprocess.Popen(["code", "." if not path or path.strip() == "" else path])
+        subprocess_runtime.spawn(["code", "." if not path or path.strip() == "" else path], tool="open_vscode")
         logger.info(f"[TOOL] open_vscode success")
         return "VSCode opened successfully."
     except Exception as e:
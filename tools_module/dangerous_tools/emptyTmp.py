@@ -1,5 +1,6 @@
 from langchain_core.tools import tool
-import subprocess , logging
+import logging
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -9,22 +10,11 @@ def clear_tmp() -> str:
     """Clear tmp."""
     logger.info(f"[TOOL] clear_tmp called")
     try:
-        process = subprocess.Popen(
-            "rm -rf ~/tmp/*",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            shell=True,
-        )
-
-        output_lines = []
-        for line in iter(process.stdout.readline, ""):
-            if line:
-                line = line.strip()
-                logger.info(f"[TMP LOG] {line}")
-                output_lines.append(line)
-
-        process.wait()
+        result = subprocess_runtime.run("rm -rf ~/tmp/*", tool="clear_tmp", shell=True)
+        for line in (result.stdout + result.stderr).splitlines():
+            logger.info(f"[TMP LOG] {line.strip()}")
+        if result.note():
+            return f"Tmp was not fully cleared.\n{result.note()}"
         return "Tmp cleared successfully."
     except Exception as e:
         logger.error(f"[TOOL] clear_tmp error: {e}")
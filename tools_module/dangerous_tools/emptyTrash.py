@@ -1,5 +1,6 @@
-import subprocess, logging
+import logging
 from langchain_core.tools import tool
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -10,22 +11,12 @@ def empty_trash() -> str:
     """Empty Trash and log output."""
     logger.info(f"[TOOL] empty_trash called")
     try:
-        process = subprocess.Popen(
-            "rm -rf ~/.local/share/Trash/*",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            shell=True,
-        )
-
-        output_lines = []
-        for line in iter(process.stdout.readline, ""):
-            if line:
-                line = line.strip()
-                logger.info(f"[TRASH LOG] {line}")
-                output_lines.append(line)
-
-        process.wait()
+        result = subprocess_runtime.run("rm -rf ~/.local/share/Trash/*", tool="empty_trash", shell=True)
+        output_lines = [line.strip() for line in (result.stdout + result.stderr).splitlines() if line.strip()]
+        for line in output_lines:
+            logger.info(f"[TRASH LOG] {line}")
+        if result.note():
+            return f"Trash was not fully emptied.\n{result.note()}"
         return f"Trash emptied successfully. Logs:\n" + "\n".join(output_lines)
     except Exception as e:
         logger.error(f"[TOOL] empty_trash error: {e}")
@@ -36,11 +27,13 @@ def remove_file(path: str) -> str:
     """Remove a file."""
     logger.info(f"[TOOL] remove_file called with path={path}")
     try:
-        subprocess.Popen(["rm", "-rf", path])
+        result = subprocess_runtime.run(["rm", "-rf", path], tool="remove_file")
+        if not result.ok:
+            logger.error(f"[TOOL] remove_file error for path={path}: {result.stderr}")
+            return f"Error removing file {path}: {result.stderr.strip() or result.note()}"
         logger.info(f"[TOOL] remove_file success for path={path}")
         return f"File {path} removed successfully."
     except Exception as e:
         logger.error(f"[TOOL] remove_file error for path={path}: {e}")
         return f"Error removing file {path}: {e}"
     
-
@@ -1,5 +1,6 @@
-import subprocess , logging
+import logging
 from langchain_core.tools import tool
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -9,9 +10,12 @@ def remove_file(path: str) -> str:
     """Remove a file or folder."""
     logger.info(f"[TOOL] remove_file called with path={path}")
     try:
-        subprocess.Popen(["rm", "-rf", path])
+        result = subprocess_runtime.run(["rm", "-rf", path], tool="remove_file")
+        if not result.ok:
+            logger.error(f"[TOOL] remove_file error for path={path}: {result.stderr}")
+            return f"Error removing {path}: {result.stderr.strip() or result.note()}"
         logger.info(f"[TOOL] remove_file success for path={path}")
         return f"removed successfully."
     except Exception as e:
         logger.error(f"[TOOL] remove_file error for path={path}: {e}")
-        return f"Error removing {path}: {e}"
\ No newline at end of file
+        return f"Error removing {path}: {e}"
@@ -1,6 +1,7 @@
 from langchain_core.tools import tool
-import os , subprocess
+import os
 import logging
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,9 +25,9 @@ def create_project_folder(working_directory: str, project_name: str) -> str:
         return f'Error: Project folder "{project_name}" already exists at {abs_project_path}'
 
     try:
-        res = subprocess.run(f"mkdir -p {abs_project_path}", shell=True, check=True)
-        if res.returncode != 0:
-            return f"Failed to create project folder: {res.stderr.decode('utf-8')}"
+        res = subprocess_runtime.run(["mkdir", "-p", abs_project_path], tool="create_project_folder")
+        if not res.ok:
+            return f"Failed to create project folder: {res.stderr or res.note()}"
         logger.info(f"[TOOL] Successfully created project folder: {abs_project_path}")
         return f'Successfully created project folder "{project_name}" at {abs_project_path}'
     except OSError as e:
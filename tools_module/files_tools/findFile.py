@@ -1,44 +1,88 @@
 from langchain_core.tools import tool
+import asyncio
 import logging
-import subprocess
 import os
+from core.fs_index import get_file_index
+from core.fs_walk import Walk
+from core.subprocess_runtime import limits_for
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _from_index(filename: str, search_path: str, contains: bool = False):
+    """Answer from the filename index, or None to walk the disk."""
+    try:
+        result = get_file_index().search(filename, search_path, contains=contains)
+    except Exception as e:  # noqa: BLE001 — a broken index must not break the search
+        logger.warning(f"[TOOL] find_file index lookup failed: {e}")
+        return None
+    if result is None:
+        return None
+    logger.info(f"[TOOL] find_file found {len(result.paths)} in the index (scanned {result.age:.0f}s ago)")
+    output = "\n".join(result.paths)
+    return f"{output}\n{result.note()}" if result.truncated else output
+
+
+def _walk(filename: str, search_path: str, contains: bool = False) -> str:
+    """Walk the disk for the tool's reply.
+
+    :class:`Walk` yields matches as it finds them, but the tool returns one
+    string, so they are collected and sorted first: the caller gets the early
+    stop (result cap, timeout, cancellation), not a stream of partial results.
+    """
+    if not os.path.isdir(search_path):
+        return f"Error searching for file {filename}: {search_path} is not a directory"
+    walk = Walk(search_path, filename, contains=contains, budget=limits_for("find_file").timeout)
+    paths = sorted(walk)
+    note = walk.note()
+    logger.info(
+        f"[TOOL] find_file walked {walk.dirs_scanned} dirs in {walk.seconds:.2f}s, {len(paths)} found {note}"
+    )
+    if not paths:
+        if note:
+            return f"No files found matching {filename} in {search_path} before the search stopped.\n{note}"
+        return f"No files found matching {filename} in {search_path}"
+    output = "\n".join(paths)
+    return f"{output}\n{note}" if note else output
+
+
 @tool
-def find_file(filename: str, search_path: str = "~/") -> str:
-    """Search for a file in the given directory and its subdirectories."""
+def find_file(filename: str, search_path: str = "~/", match: str = "glob") -> str:
+    """Search for a file in the given directory and its subdirectories.
+    Args:
+        filename: The exact name or a glob like "*report*" (match="glob"), or part of the name (match="contains").
+        search_path: The directory to search in.
+        match: "glob" (case-sensitive, like find -name) or "contains" (case-insensitive substring).
+    """
     search_path = os.path.expanduser(search_path)
 
     logger.info(
-        f"[TOOL] find_file called with filename={filename}, search_path={search_path}"
+        f"[TOOL] find_file called with filename={filename}, search_path={search_path}, match={match}"
     )
+    if match not in ("glob", "contains"):
+        return f'Error: match must be "glob" or "contains", not "{match}"'
+    contains = match == "contains"
 
-    try:
-        result = subprocess.run(
-            ["find", search_path, "-name", filename],
-            capture_output=True,
-            text=True,
-        )
-
-        output = result.stdout.strip()
-        if output:
-            logger.info(f"[TOOL] find_file found:\n{output}")
-            return output
-            
-        if result.returncode != 0:
-            err_output = result.stderr.strip()
-            logger.error(f"[TOOL] find_file stderr: {err_output}")
-            return f"Error searching for file {filename} (but this might just be permission denied on some directories): {err_output}"
-
-        return f"No files found matching {filename} in {search_path}"
+    indexed = _from_index(filename, search_path, contains)
+    if indexed is not None:
+        return indexed
 
+    try:
+        return _walk(filename, search_path, contains)
     except Exception as e:
         logger.error(f"[TOOL] find_file exception: {e}")
         return f"Exception searching for file {filename}: {e}"
 
+
+async def _afind_file(filename: str, search_path: str = "~/", match: str = "glob") -> str:
+    # The index lookup and the walk block; keep them off the event loop.
+    return await asyncio.to_thread(find_file.func, filename, search_path, match)
+
+
+find_file.coroutine = _afind_file
+
     
 if __name__ == "__main__":
     # Example usage
-    result = find_file.invoke({"filename": "faroos*", "search_path": "~/Downloads"})
+    result = find_file.invoke({"filename": "faroos*", "search_path": "~/Downloads"})
\ No newline at end of file
@@ -2,6 +2,8 @@ from langchain_core.tools import tool
 import os
 import logging
 
+from core.paged_file import read_page
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -9,8 +11,8 @@ MAX_CHARS = 10000
 
 
 @tool
-def get_file_content(working_directory: str, file_path: str) -> str:
-    """Read a file and return its content. Limited to 10000 characters. Used for code reading within a working directory."""
+def get_file_content(working_directory: str, file_path: str, start_line: int = 1, num_lines: int = 400) -> str:
+    """Read a file and return its content. Limited to 10000 characters per call; pass start_line to read further. Used for code reading within a working directory."""
     logger.info(
         f"[TOOL] get_file_content called with working_directory={working_directory}, file_path={file_path}"
     )
@@ -21,13 +23,7 @@ def get_file_content(working_directory: str, file_path: str) -> str:
         return f"Error: {file_path} is not a subdirectory of {working_directory}"
 
     try:
-        with open(abs_file_path, "r") as file:
-            content = file.read(MAX_CHARS)
-            if len(content) >= MAX_CHARS:
-                content += (
-                    f'\n[...File "{file_path}" truncated at {MAX_CHARS} characters]'
-                )
-            return content
+        return read_page(abs_file_path, start_line, num_lines, MAX_CHARS)
     except FileNotFoundError:
         return f"Error: {file_path} not found"
     except Exception as e:
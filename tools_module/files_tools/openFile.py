@@ -1,5 +1,5 @@
 import os
-import subprocess
+from core import subprocess_runtime
 from langchain_core.tools import tool
 
 @tool
@@ -14,7 +14,7 @@ def open_file(file_path: str) -> str:
         return f"[ERROR] File not found: {file_path}"
 
     try:
-        subprocess.Popen(["xdg-open", file_path])
+        subprocess_runtime.spawn(["xdg-open", file_path], tool="open_file")
         return f"[SUCCESS] Opened file: {file_path}"
     except Exception as e:
         return f"[ERROR] Failed to open file {file_path}: {e}"
@@ -1,16 +1,37 @@
 from langchain_core.tools import tool
 import logging
+import os
+from typing import Optional
+
+from core.paged_file import read_page
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAX_CHARS = int(os.getenv("FILE_READ_MAX_CHARS", "20000"))
+
+
 @tool
-def read_file(path: str) -> str:
-    """Read a file and return its content."""
-    logger.info(f"[TOOL] read_file called with path={path}")
+def read_file(
+    path: str,
+    start_line: int = 1,
+    num_lines: int = 400,
+    byte_offset: Optional[int] = None,
+    byte_count: Optional[int] = None,
+) -> str:
+    """Read a file and return its content. Large files are returned a page at a time.
+    Args:
+        path: The file to read.
+        start_line: First line to return (1-based), e.g. 20000 to read from line 20000.
+        num_lines: How many lines to return.
+        byte_offset: Read a byte range from this offset instead of lines (binary files are hex-dumped).
+        byte_count: How many bytes to read from byte_offset.
+    """
+    logger.info(f"[TOOL] read_file called with path={path}, start_line={start_line}, num_lines={num_lines}")
     try:
-        with open(path, "r") as f:
-            content = f.read()
+        content = read_page(
+            os.path.expanduser(path), start_line, num_lines, MAX_CHARS, byte_offset, byte_count
+        )
         logger.info(f"[TOOL] read_file success, {len(content)} chars")
         return content
     except Exception as e:
@@ -0,0 +1,47 @@
+from langchain_core.tools import tool
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from core.paged_file import tail_page
+from core.subprocess_runtime import limits_for
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_CHARS = int(os.getenv("LOG_TAIL_MAX_CHARS", "4000"))
+
+
+@tool
+def tail_log(path: str, lines: int = 50, pattern: Optional[str] = None, follow_seconds: float = 0) -> str:
+    """Show the end of a log file: its last lines, or the last lines matching a pattern. Fast on files of any size.
+    Args:
+        path: The log file.
+        lines: How many lines (or matching lines) to return, newest last.
+        pattern: Regex to return only matching lines, e.g. "error|exception|traceback" (case-insensitive unless it has capitals).
+        follow_seconds: Also watch the file this many seconds and return the lines appended meanwhile.
+    """
+    # The tool's timeout (TOOL_LIMITS / TOOL_TIMEOUT_TAIL_LOG) bounds both the search and the follow.
+    timeout = limits_for("tail_log").timeout
+    follow_seconds = min(max(follow_seconds or 0, 0), timeout)
+    logger.info(
+        f"[TOOL] tail_log called with path={path}, lines={lines}, pattern={pattern}, follow_seconds={follow_seconds}"
+    )
+    try:
+        content = tail_page(
+            os.path.expanduser(path), lines, pattern or None, follow_seconds, MAX_CHARS, budget=timeout
+        )
+        logger.info(f"[TOOL] tail_log success, {len(content)} chars")
+        return content
+    except Exception as e:
+        logger.error(f"[TOOL] tail_log error: {e}")
+        return f"Error reading log {path}: {e}"
+
+
+async def _atail_log(path: str, lines: int = 50, pattern: Optional[str] = None, follow_seconds: float = 0) -> str:
+    # Following sleeps between polls; keep it off the event loop.
+    return await asyncio.to_thread(tail_log.func, path, lines, pattern, follow_seconds)
+
+
+tail_log.coroutine = _atail_log
@@ -1,7 +1,7 @@
-import subprocess
 import logging
 from langchain_core.tools import tool
 import time
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -11,15 +11,15 @@ logger = logging.getLogger(__name__)
 def enable_wifi() -> str:
     """Enables Wi-Fi using nmcli."""
     try:
-        subprocess.check_call(["nmcli", "radio", "wifi", "on"])
+        result = subprocess_runtime.run(["nmcli", "radio", "wifi", "on"], tool="enable_wifi")
+        if not result.ok:
+            logger.error(f"[TOOL] Failed to enable Wi-Fi: {result.stderr}")
+            return f"Failed to enable Wi-Fi: {result.stderr.strip() or result.note()}"
         time.sleep(2)  # Wait a moment for the Wi-Fi to enable
         logger.info("[TOOL] Wi-Fi enabled successfully")
         return "Wi-Fi enabled successfully. Please wait a moment for connection."
     except FileNotFoundError:
         return "Error: nmcli not found. Cannot manage Wi-Fi."
-    except subprocess.CalledProcessError as e:
-        logger.error(f"[TOOL] Failed to enable Wi-Fi: {e}")
-        return f"Failed to enable Wi-Fi: {e}"
     except Exception as e:
         logger.error(f"[TOOL] Enable Wi-Fi error: {e}")
-        return f"Error enabling Wi-Fi: {e}"
\ No newline at end of file
+        return f"Error enabling Wi-Fi: {e}"
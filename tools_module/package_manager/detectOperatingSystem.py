@@ -1,6 +1,6 @@
 from langchain_core.tools import tool
-import subprocess
 import logging
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -8,15 +8,8 @@ logger = logging.getLogger(__name__)
 @tool
 def detect_operating_system() -> str:
     """Detect the operating system."""
-    try:
-        result = subprocess.run(
-            ["uname", "-s"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
-        return f"Detected OS: {result.stdout.strip()}"
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to detect OS: {e}")
-        return f"Failed to detect OS: {e.stderr}"
\ No newline at end of file
+    result = subprocess_runtime.run(["uname", "-s"], tool="detect_operating_system")
+    if not result.ok:
+        logger.error(f"Failed to detect OS: {result.stderr}")
+        return f"Failed to detect OS: {result.stderr or result.note()}"
+    return f"Detected OS: {result.stdout.strip()}"
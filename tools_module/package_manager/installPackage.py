@@ -1,25 +1,32 @@
 from langchain_core.tools import tool
-import subprocess
 import logging
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _reply(result) -> str:
+    if result.timed_out or result.cancelled:
+        logger.warning(f"Installation stopped: {result.note()}")
+        return f"Installation did not finish:\n{result.stdout}\n{result.note()}"
+    if result.returncode != 0:
+        logger.error(f"Failed to install package: {result.stderr}")
+        return f"Failed to install package:\n{result.stderr}"
+    logger.info(f"Installation output: {result.stdout}")
+    return f"Package installed successfully:\n{result.stdout}"
+
+
 @tool
 def install_package(installation_command: str) -> str:
     """Install system package using the provided installation command."""
     logger.info(f"Installing package with command: {installation_command}")
-    try:
-        result = subprocess.run(
-            installation_command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
-        logger.info(f"Installation output: {result.stdout}")
-        return f"Package installed successfully:\n{result.stdout}"
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to install package: {e.stderr}")
-        return f"Failed to install package:\n{e.stderr}"
\ No newline at end of file
+    return _reply(subprocess_runtime.run(installation_command, tool="install_package", shell=True))
+
+
+async def _ainstall_package(installation_command: str) -> str:
+    logger.info(f"Installing package with command: {installation_command}")
+    return _reply(await subprocess_runtime.arun(installation_command, tool="install_package", shell=True))
+
+
+install_package.coroutine = _ainstall_package
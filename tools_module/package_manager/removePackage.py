@@ -1,25 +1,32 @@
 from langchain_core.tools import tool
-import subprocess
 import logging
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _reply(result) -> str:
+    if result.timed_out or result.cancelled:
+        logger.warning(f"Removal stopped: {result.note()}")
+        return f"Removal did not finish:\n{result.stdout}\n{result.note()}"
+    if result.returncode != 0:
+        logger.error(f"Failed to remove package: {result.stderr}")
+        return f"Failed to remove package:\n{result.stderr}"
+    logger.info(f"Removal output: {result.stdout}")
+    return f"Package removed successfully:\n{result.stdout}"
+
+
 @tool
 def remove_package(remove_command: str) -> str:
     """Remove system package using the provided remove command."""
     logger.info(f"Removing package with command: {remove_command}")
-    try:
-        result = subprocess.run(
-            remove_command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
-        logger.info(f"Removal output: {result.stdout}")
-        return f"Package removed successfully:\n{result.stdout}"
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to remove package: {e.stderr}")
-        return f"Failed to remove package:\n{e.stderr}"
\ No newline at end of file
+    return _reply(subprocess_runtime.run(remove_command, tool="remove_package", shell=True))
+
+
+async def _aremove_package(remove_command: str) -> str:
+    logger.info(f"Removing package with command: {remove_command}")
+    return _reply(await subprocess_runtime.arun(remove_command, tool="remove_package", shell=True))
+
+
+remove_package.coroutine = _aremove_package
@@ -1,5 +1,6 @@
 from langchain_core.tools import tool
-import logging , subprocess
+import logging
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -9,9 +10,9 @@ def find_process(process_name: str) -> str:
     """Find a process by name."""
     logger.info(f"[TOOL] find_process called with process_name={process_name}")
     try:
-        result = subprocess.run(["pgrep", process_name], stdout=subprocess.PIPE)
+        result = subprocess_runtime.run(["pgrep", process_name], tool="find_process")
         if result.returncode == 0:
-            return f"Process {process_name} found with PID {result.stdout.decode().strip()}"
+            return f"Process {process_name} found with PID {result.stdout.strip()}"
         else:
             return f"Process {process_name} not found"
     except Exception as e:
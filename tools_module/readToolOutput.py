@@ -0,0 +1,22 @@
+from langchain_core.tools import tool
+import logging
+
+from core.tool_output_store import tool_output_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@tool
+def read_tool_output(handle: str, start_line: int = 1, num_lines: int = 200, line_offset: int = 0) -> str:
+    """Read more of a large tool output that was stored as a handle (e.g. "out-1a2b3c4d5e6f7a8b").
+    Args:
+        handle: The handle shown in the truncated tool output.
+        start_line: First line to return (1-based).
+        num_lines: How many lines to return.
+        line_offset: Characters to skip in the first line, to continue a very long line.
+    """
+    logger.info(
+        f"[TOOL] read_tool_output called with handle={handle}, start_line={start_line}, num_lines={num_lines}, line_offset={line_offset}"
+    )
+    return tool_output_store.page(handle, start_line, num_lines, line_offset)
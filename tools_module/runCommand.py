@@ -1,16 +1,32 @@
 from langchain_core.tools import tool
-import subprocess , logging
+import logging
+from core import subprocess_runtime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _reply(command: str, result) -> str:
+    note = result.note()
+    if result.timed_out or result.cancelled:
+        logger.warning(f"Command stopped: {command}\n{note}")
+        return f"{result.stdout}\n{note}".lstrip()
+    if result.returncode != 0:
+        logger.error(f"Error executing command: {command}\nError: {result.stderr}")
+        return f"Error: {result.stderr}"
+    logger.info(f"Command executed successfully: {result.stdout}")
+    return f"{result.stdout}\n{note}" if note else result.stdout
+
+
 @tool
 def run_command(command: str) -> str:
     """Run a shell command and return the output."""
-    try:
-        result = subprocess.run(command, shell=True, check=True, text=True, capture_output=True, executable='/bin/bash')
-        logger.info(f"Command executed successfully: {result.stdout}")
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error executing command: {command}\nError: {e.stderr}")
-        return f"Error: {e.stderr}"
+    return _reply(command, subprocess_runtime.run(command, tool="run_command", shell=True))
+
+
+async def _arun_command(command: str) -> str:
+    return _reply(command, await subprocess_runtime.arun(command, tool="run_command", shell=True))
+
+
+# The async graph awaits the process on the event loop instead of a worker thread.
+run_command.coroutine = _arun_command
@@ -1,6 +1,9 @@
-import os, sys, pexpect, logging, pathlib, environ , json , re , subprocess
+import os, sys, pexpect, logging, pathlib, environ , json , re , contextlib
 from langchain_core.tools import tool
-from models.LLM import llm
+from models.registry import model_registry
+from core.processes import running_processes
+from core import subprocess_runtime
+from core.cancellation import cancellable_process, cancelled_note, is_cancelled
 
 base_dir = pathlib.Path(__file__).parent.parent
 env = environ.Env()
@@ -11,7 +14,6 @@ GPG_PASSWORD = os.getenv("GPG_PASSWORD", "")
 SSH_FRONTEND = os.getenv("SSH_FRONTEND", "")
 FRONTEND_PORT = os.getenv("FRONTEND_PORT", "")
 DEPLOYFILE_PATH = os.getenv("DEPLOYFILE_PATH", "")
-running_processes = {}
 
 
 @tool
@@ -21,6 +23,7 @@ def run_deploy_script(user_instruction: str):
     user_instruction: e.g. "deploy backend application"
     """
     deploy_path = DEPLOYFILE_PATH
+    cleanup = contextlib.ExitStack()
 
     try:
         env_vars = os.environ.copy()
@@ -28,6 +31,8 @@ def run_deploy_script(user_instruction: str):
 
         child = pexpect.spawn(f"bash {deploy_path}", env=env_vars, encoding="utf-8", timeout=900)
         child.logfile_read = sys.stdout
+        # pexpect children lead their own session: cancelling the turn kills the script's group.
+        cleanup.enter_context(cancellable_process(child.pid))
 
         # === First prompt: server choice ===
         child.expect("Enter your choice")
@@ -43,7 +48,7 @@ def run_deploy_script(user_instruction: str):
         }}
         Only return valid JSON.
         """
-        response = llm.invoke([{"role": "user", "content": ai_prompt}]).content.strip()
+        response = model_registry.get("deploy").invoke([{"role": "user", "content": ai_prompt}]).content.strip()
 
         try:
             choices = json.loads(response)
@@ -74,7 +79,7 @@ def run_deploy_script(user_instruction: str):
             match = re.search(r"Frontend PID:\s*(\d+)", output)
             if match:
                 pid = int(match.group(1))
-                running_processes["frontend"] = pid
+                running_processes.set("frontend", pid)
                 logger.info(f"[FRONTEND RUNNING] PID: {pid}")
             else:
                 logger.error(f"[FRONTEND ERROR] Could not find PID in output:\n{output}")
@@ -97,8 +102,13 @@ def run_deploy_script(user_instruction: str):
         return "[DEPLOY COMPLETED] Script finished successfully"
 
     except Exception as e:
+        if is_cancelled():
+            logger.warning("[DEPLOY CANCELLED] Deploy script stopped")
+            return f"[DEPLOY STOPPED] {cancelled_note()}"
         logger.error(f"[DEPLOY ERROR] {e}")
         return f"[ERROR] Deploy script failed: {e}"
+    finally:
+        cleanup.close()
 
 
 @tool
@@ -110,19 +120,19 @@ def stop_frontend():
     pid = running_processes.get("frontend")
     if not pid:
         ssh_command = f"{SSH_FRONTEND} 'kill -9 $(lsof -t -i :{FRONTEND_PORT})' && echo 'Frontend stopped'"
-        result = subprocess.run(ssh_command, shell=True)
-        running_processes["frontend"] = None
+        result = subprocess_runtime.run(ssh_command, tool="stop_frontend", shell=True)
+        running_processes.pop("frontend")
         output = result.stdout
         logger.info(f"[FRONTEND STOPPED] {output}")
         return "[INFO] Frontend stopped"
     try:
         ssh_command = f"{SSH_FRONTEND} 'kill -9 {pid}' && echo 'Frontend stopped'"
-        result = subprocess.run(ssh_command, shell=True)
+        result = subprocess_runtime.run(ssh_command, tool="stop_frontend", shell=True)
         output = result.stdout
-        running_processes["frontend"] = None
+        running_processes.pop("frontend")
         logger.info(f"[FRONTEND STOPPED] {output}")
         return f"[FRONTEND STOPPED] PID {pid} killed"
     except Exception as e:
         logger.error(f"[STOP ERROR] {e}")
-        running_processes["frontend"] = None
+        running_processes.pop("frontend")
         return f"[ERROR] Failed to stop frontend: {e}"
\ No newline at end of file